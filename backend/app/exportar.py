@@ -0,0 +1,59 @@
+"""
+Exporta facturas sinteticas a archivos Parquet o CSV particionados
+
+Uso:
+    python exportar.py 1000000 --formato parquet --destino datos/
+"""
+import argparse
+import json
+import os
+import sys
+
+from services.catalogo import Catalogo
+from services.columnar import GeneradorColumnar
+from services.exportacion import FORMATOS_EXPORTACION, exportar_facturas
+from services.generador import PRECIO_POR_DEFECTO
+from services.motores import crear_generador
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Exporta facturas sinteticas a Parquet o CSV")
+    parser.add_argument("cantidad", type=int, help="Numero de facturas a exportar")
+    parser.add_argument("--destino", default="exportacion", help="Directorio de salida")
+    parser.add_argument("--formato", choices=FORMATOS_EXPORTACION, default="parquet")
+    parser.add_argument("--prefijo", default="FAC-", help="Prefijo de los numeros de factura")
+    parser.add_argument("--inicio", type=int, default=1, help="Primer consecutivo")
+    parser.add_argument("--semilla", type=int, default=None, help="Semilla para datos reproducibles")
+    parser.add_argument("--facturas-por-grupo", type=int, default=100_000,
+                        help="Facturas por grupo de filas (acota la memoria)")
+    parser.add_argument("--grupos-por-archivo", type=int, default=10,
+                        help="Grupos de filas por archivo de particion")
+    parser.add_argument("--catalogo", default=os.getenv("CATALOGO_RUTA"),
+                        help="Catalogo de productos en JSON (por defecto CATALOGO_RUTA)")
+    args = parser.parse_args(argv)
+
+    try:
+        # El mismo generador que el servidor: motor y catalogo de las variables de entorno
+        catalogo = Catalogo.cargar(args.catalogo, PRECIO_POR_DEFECTO) if args.catalogo else None
+        generador = crear_generador(os.getenv("MOTOR_GENERADOR", "faker"), catalogo=catalogo)
+        resultado = exportar_facturas(
+            args.destino,
+            args.cantidad,
+            GeneradorColumnar.desde_generador(generador),
+            formato=args.formato,
+            prefijo=args.prefijo,
+            inicio=args.inicio,
+            semilla=args.semilla,
+            facturas_por_grupo=args.facturas_por_grupo,
+            grupos_por_archivo=args.grupos_por_archivo,
+        )
+    except (OSError, ValueError, RuntimeError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    print(json.dumps(resultado, indent=2, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
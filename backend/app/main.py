@@ -1,12 +1,58 @@
-from fastapi import FastAPI, HTTPException
+import json
+import os
+import time
+import uuid
+from contextlib import asynccontextmanager
+from datetime import date, datetime
+from functools import lru_cache, partial
+from itertools import islice
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterator, Literal, Optional
+from fastapi import FastAPI, Header, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from services.generador import GeneradorFacturas
+from fastapi.responses import JSONResponse, StreamingResponse
+from prometheus_client import CONTENT_TYPE_LATEST
+from starlette.background import BackgroundTask
+from services.arranque import Calentamiento
+from services.catalogo import Catalogo
+from services.cache import CacheFacturas, EntradaCache, etag_coincide
+from services.ejecutor import EjecutorAcotado, EjecutorSaturado
+from services.factura_grande import json_factura_grande, ndjson_factura_grande
+from services.limites import LimitadorTasa, LimiteExcedido, VueloUnico
+from services import metricas
+from services.perfilado import AlmacenPerfiles, MiddlewarePerfilado, Perfilado
+from services.persistencia import AlmacenFacturas, AlmacenSaturado
+from services.reserva import ReservaFacturas
+from services.generador import DIAS_FECHA_DETERMINISTA, PRECIO_POR_DEFECTO, numeros_factura
+from services.motores import crear_generador
+from services.paralelo import GeneracionParalela
 from models.factura import Factura
+from models.lote import SolicitudAgregacion, SolicitudExportacion, SolicitudLote
+
+# Las agregaciones, la exportacion y el generador columnar dependen de numpy (y
+# pyarrow): se importan en su primer uso para no alargar el arranque
+if TYPE_CHECKING:
+    from services.columnar import GeneradorColumnar
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Calienta el generador, arranca la reserva de facturas y libera los hilos y procesos al detener el servicio"""
+    calentamiento.iniciar()
+    reserva_facturas.iniciar()
+    yield
+    reserva_facturas.detener()
+    ejecutor.cerrar()
+    if almacen_facturas is not None:
+        almacen_facturas.cerrar()
+    generacion_paralela.cerrar()
+
 
 app = FastAPI(
     title="API Generador de Facturas",
     description="API para generar facturas sinteticas con datos en español",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configurar CORS para permitir peticiones desde el frontend
@@ -18,8 +64,179 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Metricas Prometheus: latencia y peticiones por ruta (METRICAS_HABILITADAS=0 las
+# desactiva) y etapas de la generacion en una de cada METRICAS_ETAPAS_CADA facturas
+METRICAS_HABILITADAS = os.getenv("METRICAS_HABILITADAS", "1") != "0"
+if METRICAS_HABILITADAS:
+    app.add_middleware(metricas.MiddlewareMetricas)
+muestreo_etapas = metricas.MuestreoEtapas(
+    int(os.getenv("METRICAS_ETAPAS_CADA", "10")) if METRICAS_HABILITADAS else 0
+)
+
+# Perfilado bajo demanda: las peticiones con el token PERFIL_TOKEN (cabecera
+# X-Perfil-Token o parametro "perfil") y una fraccion PERFIL_MUESTREO del trafico
+# se perfilan por muestreo y se guardan en PERFIL_DIR (ultimos PERFIL_MAX_ARCHIVOS)
+perfilado = Perfilado(
+    AlmacenPerfiles(
+        Path(os.getenv("PERFIL_DIR", "perfiles")),
+        max_archivos=int(os.getenv("PERFIL_MAX_ARCHIVOS", "200"))
+    ),
+    token=os.getenv("PERFIL_TOKEN"),
+    muestreo=float(os.getenv("PERFIL_MUESTREO", "0")),
+    intervalo=float(os.getenv("PERFIL_INTERVALO_MS", "1")) / 1000
+)
+if perfilado.habilitado:
+    app.add_middleware(MiddlewarePerfilado, perfilado=perfilado)
+
+# Semilla global: si se define, cada numero de factura produce siempre la misma factura
+FACTURAS_SEMILLA = os.getenv("FACTURAS_SEMILLA")
+
+# Motor de generacion: "faker" (por defecto) o "rapido" (pools precalculados)
+MOTOR_GENERADOR = os.getenv("MOTOR_GENERADOR", "faker")
+
+# Catalogo de productos opcional (JSON con categorias, productos, precios y
+# pesos); sin el se usa el catalogo integrado con pesos iguales
+CATALOGO_RUTA = os.getenv("CATALOGO_RUTA")
+catalogo = Catalogo.cargar(CATALOGO_RUTA, PRECIO_POR_DEFECTO) if CATALOGO_RUTA else None
+
 # Instancia del generador
-generador = GeneradorFacturas()
+generador = crear_generador(
+    MOTOR_GENERADOR,
+    semilla=int(FACTURAS_SEMILLA) if FACTURAS_SEMILLA else None,
+    catalogo=catalogo
+)
+
+# Cache de respuestas serializadas (solo en modo determinista o con almacen)
+cache_facturas = CacheFacturas(
+    max_entradas=int(os.getenv("CACHE_FACTURAS_MAX", "1024")),
+    ttl=float(os.getenv("CACHE_FACTURAS_TTL", "0")) or None
+)
+
+# En modo determinista o con almacen la factura solo depende del numero
+CACHE_CONTROL_INMUTABLE = "public, max-age=31536000, immutable"
+
+# Pool de procesos para los lotes paralelos (se arranca en el primer uso)
+generacion_paralela = GeneracionParalela(
+    procesos=int(os.getenv("PROCESOS_GENERACION", "0")) or None,
+    motor=MOTOR_GENERADOR,
+    semilla=generador.semilla,
+    catalogo=catalogo
+)
+
+# Ejecutor dedicado para generar fuera del bucle de eventos: hilos del pool,
+# trabajos admitidos a la vez (0 sin limite) y segundos sugeridos en Retry-After
+ejecutor = EjecutorAcotado(
+    hilos=int(os.getenv("HILOS_GENERACION", "0")) or None,
+    max_pendientes=int(os.getenv("MAX_PENDIENTES_GENERACION", "64")),
+    reintentar_en=int(os.getenv("REINTENTAR_EN_SEGUNDOS", "1"))
+)
+
+# Las peticiones concurrentes de una misma factura comparten una sola generacion
+vuelo_unico = VueloUnico()
+
+# Limitador de tasa por cliente de los endpoints que generan: fichas por segundo
+# (0 lo desactiva), rafaga admitida y clientes recordados. El cliente es la IP de
+# la conexion o, con LIMITE_CABECERA_CLIENTE (ej. X-Forwarded-For), la ultima
+# direccion de esa cabecera, la que anade el frontend o el proxy de confianza
+limitador = LimitadorTasa(
+    tasa=float(os.getenv("LIMITE_PETICIONES_POR_SEGUNDO", "0")),
+    rafaga=float(os.getenv("LIMITE_RAFAGA", "20")),
+    max_clientes=int(os.getenv("LIMITE_MAX_CLIENTES", "10000"))
+)
+LIMITE_CABECERA_CLIENTE = os.getenv("LIMITE_CABECERA_CLIENTE")
+metricas.registrar_limites(vuelo_unico, limitador)
+
+# Almacen SQLite opcional (FACTURAS_DB): la primera consulta de un numero genera
+# y guarda la factura y las siguientes la leen; las escrituras se agrupan en
+# transacciones de hasta FACTURAS_DB_LOTE facturas cada FACTURAS_DB_INTERVALO_MS;
+# con FACTURAS_DB_MAX_PENDIENTES sin escribir se responde 503
+FACTURAS_DB = os.getenv("FACTURAS_DB")
+almacen_facturas = AlmacenFacturas(
+    Path(FACTURAS_DB),
+    lote=int(os.getenv("FACTURAS_DB_LOTE", "500")),
+    intervalo=float(os.getenv("FACTURAS_DB_INTERVALO_MS", "50")) / 1000,
+    max_pendientes=int(os.getenv("FACTURAS_DB_MAX_PENDIENTES", "50000"))
+) if FACTURAS_DB else None
+
+# Reserva de facturas pregeneradas (sin modo determinista ni almacen): tamaño
+# (0 la desactiva) y facturas por segundo que genera el hilo de recarga (0 sin limite)
+reserva_facturas = ReservaFacturas(
+    generador,
+    tamano=0 if generador.determinista or FACTURAS_DB else int(os.getenv("RESERVA_FACTURAS", "0")),
+    recarga_por_segundo=float(os.getenv("RESERVA_RECARGA_POR_SEGUNDO", "0"))
+)
+if reserva_facturas.habilitada:
+    metricas.registrar_reserva(reserva_facturas)
+
+# Calentamiento al arrancar (CALENTAMIENTO): "sincrono" prepara el generador
+# (faker, su locale y los pools del motor rapido) antes de aceptar trafico,
+# "segundo_plano" lo hace en un hilo mientras el servicio ya responde (/ready
+# devuelve 503 hasta terminar) y "no" lo deja todo para el primer uso
+calentamiento = Calentamiento(
+    [("generador", lambda: generador.calentar())],
+    modo=os.getenv("CALENTAMIENTO", "sincrono")
+)
+
+# Facturas que se agrupan en cada fragmento enviado por el stream NDJSON
+FACTURAS_POR_FRAGMENTO = 64
+
+# Lineas maximas de una factura grande y lineas por fragmento de su stream
+MAX_LINEAS_FACTURA_GRANDE = int(os.getenv("MAX_LINEAS_FACTURA_GRANDE", "1000000"))
+LINEAS_POR_FRAGMENTO = 1000
+
+# Directorio donde el endpoint de exportacion escribe los archivos
+EXPORTACION_DIR = Path(os.getenv("EXPORTACION_DIR", "exportaciones"))
+
+
+@lru_cache(maxsize=1)
+def generador_columnar() -> "GeneradorColumnar":
+    """Generador columnar compartido, creado en el primer uso"""
+    from services.columnar import GeneradorColumnar
+    return GeneradorColumnar.desde_generador(generador)
+
+
+@app.exception_handler(EjecutorSaturado)
+async def ejecutor_saturado(request: Request, exc: EjecutorSaturado):
+    """Responde 429 cuando el ejecutor no admite mas trabajos"""
+    return JSONResponse(
+        status_code=429,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.reintentar_en)}
+    )
+
+
+@app.exception_handler(LimiteExcedido)
+async def limite_excedido(request: Request, exc: LimiteExcedido):
+    """Responde 429 cuando el cliente supera su tasa de peticiones"""
+    return JSONResponse(
+        status_code=429,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.reintentar_en)}
+    )
+
+
+@app.exception_handler(AlmacenSaturado)
+async def almacen_saturado(request: Request, exc: AlmacenSaturado):
+    """Responde 503 cuando el almacen acumula demasiadas facturas sin escribir"""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.reintentar_en)}
+    )
+
+
+def _cliente(request: Request) -> str:
+    """Identifica al cliente para el limitador de tasa"""
+    if LIMITE_CABECERA_CLIENTE:
+        valor = request.headers.get(LIMITE_CABECERA_CLIENTE)
+        if valor:
+            return valor.rsplit(",", 1)[-1].strip()
+    return request.client.host if request.client else "desconocido"
+
+
+def _limitar(request: Request) -> None:
+    """Gasta una ficha del cliente o responde 429 si no le quedan"""
+    limitador.comprobar(_cliente(request))
 
 
 @app.get("/")
@@ -30,25 +247,396 @@ def read_root():
         "version": "1.0.0",
         "endpoints": {
             "generar_factura": "/api/factura/{numero_factura}",
+            "generar_factura_grande": "/api/factura/{numero_factura}/grande",
+            "generar_lote": "/api/facturas/lote",
+            "listar_facturas": "/api/facturas",
+            "exportar": "/api/facturas/exportar",
             "documentacion": "/docs"
         }
     }
 
 
 @app.get("/api/factura/{numero_factura}", response_model=Factura)
-def generar_factura(numero_factura: str):
+async def generar_factura(
+    numero_factura: str,
+    request: Request,
+    if_none_match: Optional[str] = Header(None)
+):
     """
     Genera una factura con datos sinteticos
     
     - **numero_factura**: Numero unico de la factura (ej: FAC-2025-001)
+    
+    Solo las peticiones que tienen que generar gastan fichas del limitador;
+    las que piden un numero que ya se esta generando esperan esa generacion.
     """
     try:
-        factura = generador.generar_factura(numero_factura)
-        return factura
+        if _facturas_estables():
+            # Los aciertos de cache se sirven sin pasar por el ejecutor
+            entrada = cache_facturas.obtener(numero_factura)
+            if entrada is None:
+                if not vuelo_unico.en_vuelo(numero_factura):
+                    _limitar(request)
+                entrada = await vuelo_unico.ejecutar(
+                    numero_factura, partial(ejecutor.ejecutar, _generar_entrada, numero_factura)
+                )
+            return _respuesta_determinista(entrada, if_none_match)
+        # Con la reserva activa la factura pregenerada se sirve desde el bucle de eventos
+        contenido = reserva_facturas.tomar(numero_factura) if reserva_facturas.habilitada else None
+        if contenido is None:
+            if not vuelo_unico.en_vuelo(numero_factura):
+                _limitar(request)
+            contenido = await vuelo_unico.ejecutar(
+                numero_factura, partial(ejecutor.ejecutar, _factura_json, numero_factura)
+            )
+        return Response(contenido, media_type="application/json")
+    except (EjecutorSaturado, LimiteExcedido, AlmacenSaturado):
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al generar factura: {str(e)}")
 
 
+@app.get("/api/factura/{numero_factura}/grande")
+async def generar_factura_grande(
+    numero_factura: str,
+    request: Request,
+    lineas: int = Query(10000, ge=1, le=MAX_LINEAS_FACTURA_GRANDE),
+    formato: Literal["json", "ndjson"] = "json"
+):
+    """
+    Genera una factura con un numero arbitrario de lineas y la devuelve en streaming
+    
+    - **numero_factura**: Numero unico de la factura
+    - **lineas**: Numero de lineas de producto (hasta ``MAX_LINEAS_FACTURA_GRANDE``)
+    - **formato**: ``json`` (documento ``Factura``) o ``ndjson`` (encabezado,
+      una linea por producto y totales)
+    
+    Las lineas se generan a medida que se envian y los totales se acumulan
+    por el camino, asi que la memoria no depende del tamaño de la factura.
+    """
+    _limitar(request)
+    ejecutor.reservar()
+    flujo = ejecutor.iterar(_stream_factura_grande(numero_factura, lineas, formato))
+    return StreamingResponse(
+        flujo,
+        media_type="application/x-ndjson" if formato == "ndjson" else "application/json",
+        background=BackgroundTask(flujo.cerrar)
+    )
+
+
+def _stream_factura_grande(numero_factura: str, lineas: int, formato: str) -> Iterator[bytes]:
+    """Genera el encabezado en el primer fragmento (ya en el ejecutor) y serializa las lineas"""
+    encabezado, detalle = generador.factura_grande(numero_factura, lineas)
+    serializar = ndjson_factura_grande if formato == "ndjson" else json_factura_grande
+    yield from serializar(encabezado, detalle, LINEAS_POR_FRAGMENTO)
+
+
+def _factura_json(numero_factura: str) -> bytes:
+    """
+    Genera la factura y la serializa directamente a bytes JSON
+
+    La factura interna es correcta por construccion, asi que no se crean
+    modelos Pydantic ni se valida contra ``response_model``; la salida es
+    identica byte a byte a la de ``Factura``.
+    """
+    cronometro = muestreo_etapas.cronometro()
+    if cronometro is None:
+        return generador.generar_factura_interna(numero_factura).a_json()
+    contenido = generador.generar_factura_interna(numero_factura, cronometro=cronometro).a_json()
+    cronometro.marcar("serializacion")
+    cronometro.publicar()
+    return contenido
+
+
+def _facturas_estables() -> bool:
+    """Cada numero corresponde siempre a la misma factura (modo determinista o almacen)"""
+    return generador.determinista or almacen_facturas is not None
+
+
+def _factura_almacenada(numero_factura: str) -> bytes:
+    """Lee la factura del almacen o la genera y la guarda (la primera queda fija)"""
+    contenido = almacen_facturas.obtener(numero_factura)
+    if contenido is None:
+        factura = generador.generar_factura_interna(numero_factura)
+        contenido = almacen_facturas.guardar(factura, factura.a_json())
+    return contenido
+
+
+def _generar_entrada(numero_factura: str) -> EntradaCache:
+    """Obtiene la factura serializada (del almacen o generada) y la guarda en la cache de bytes"""
+    if almacen_facturas is not None:
+        return cache_facturas.guardar(numero_factura, _factura_almacenada(numero_factura))
+    return cache_facturas.guardar(numero_factura, _factura_json(numero_factura))
+
+
+def _respuesta_determinista(entrada: EntradaCache, if_none_match: Optional[str]) -> Response:
+    """Sirve la factura cacheada y responde 304 si el cliente ya la tiene"""
+    headers = {"ETag": entrada.etag, "Cache-Control": CACHE_CONTROL_INMUTABLE}
+    if etag_coincide(if_none_match, entrada.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(entrada.contenido, media_type="application/json", headers=headers)
+
+
+@app.get("/api/cache/estadisticas")
+def estadisticas_cache():
+    """Devuelve los contadores de la cache de facturas"""
+    return {
+        "habilitada": _facturas_estables() and cache_facturas.habilitada,
+        **cache_facturas.estadisticas()
+    }
+
+
+@app.get("/api/facturas")
+async def listar_facturas(
+    cliente: Optional[str] = None,
+    ciudad: Optional[str] = None,
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+    limite: int = Query(50, ge=1, le=500),
+    despues: Optional[str] = None
+):
+    """
+    Lista las facturas guardadas en el almacen, por fecha de emision y numero
+
+    - **cliente** / **ciudad**: filtros exactos por nombre del cliente y ciudad
+    - **desde** / **hasta**: rango de fechas de emision (incluido)
+    - **despues**: cursor ``siguiente`` de la pagina anterior (paginacion por clave)
+    """
+    if almacen_facturas is None:
+        raise HTTPException(status_code=404, detail="Almacen de facturas no habilitado (FACTURAS_DB)")
+    try:
+        facturas, siguiente = await ejecutor.ejecutar(
+            partial(almacen_facturas.listar, cliente, ciudad, desde, hasta, limite, despues)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    # Los JSON guardados se concatenan sin volver a serializarlos
+    contenido = (
+        b'{"facturas":[' + b",".join(facturas) + b'],"siguiente":'
+        + json.dumps(siguiente).encode() + b"}"
+    )
+    return Response(contenido, media_type="application/json")
+
+
+def _agregar(solicitud: SolicitudAgregacion) -> dict:
+    """Calcula los grupos de la solicitud con el generador columnar o desde el almacen"""
+    from services.agregacion import agregar_columnas, agregar_lotes
+    inicio = time.perf_counter()
+    if solicitud.origen == "almacen":
+        claves, subtotal, impuesto = almacen_facturas.columnas_agregacion(
+            solicitud.agrupar_por, solicitud.desde, solicitud.hasta
+        )
+        grupos = agregar_columnas(claves, subtotal, impuesto)
+        resultado = {}
+    else:
+        bloques = generador_columnar().generar_bloques(solicitud.cantidad, semilla=solicitud.semilla)
+        grupos, facturas, lineas = agregar_lotes(bloques, solicitud.agrupar_por, DIAS_FECHA_DETERMINISTA)
+        resultado = {"facturas": facturas, "lineas": lineas}
+    return {
+        "agrupar_por": solicitud.agrupar_por,
+        "origen": solicitud.origen,
+        **resultado,
+        "filas": sum(grupo["filas"] for grupo in grupos),
+        "grupos": grupos,
+        "segundos": round(time.perf_counter() - inicio, 3),
+    }
+
+
+@app.post("/api/facturas/agregados")
+async def agregar_facturas(solicitud: SolicitudAgregacion, request: Request):
+    """
+    Sumas, conteos y percentiles del total agrupados por categoria, ciudad, empresa, fecha o mes
+
+    ``categoria`` agrupa lineas de producto (subtotal de la linea y su IVA);
+    el resto agrupa facturas (la ciudad es la del cliente). Los calculos son
+    vectorizados con NumPy sobre columnas, sin crear objetos ``Factura``.
+    """
+    if solicitud.origen == "almacen" and almacen_facturas is None:
+        raise HTTPException(status_code=404, detail="Almacen de facturas no habilitado (FACTURAS_DB)")
+    if (
+        solicitud.origen == "generado"
+        and solicitud.agrupar_por != "categoria"
+        and not generador_columnar().genera_encabezados
+    ):
+        raise HTTPException(status_code=501, detail="El generador no dispone de empresas y ciudades")
+    if solicitud.origen == "generado":
+        _limitar(request)
+    return await ejecutor.ejecutar(_agregar, solicitud)
+
+
+@app.get("/api/almacen/estadisticas")
+def estadisticas_almacen():
+    """Devuelve los contadores del almacen de facturas"""
+    if almacen_facturas is None:
+        return {"habilitado": False}
+    return {"habilitado": True, **almacen_facturas.estadisticas()}
+
+
+def _numeros_lote(solicitud: SolicitudLote) -> Iterator[str]:
+    """Numeros de factura del lote: la lista explicita o el rango consecutivo"""
+    if solicitud.numeros is not None:
+        return iter(solicitud.numeros)
+    return numeros_factura(solicitud.prefijo, solicitud.inicio, solicitud.cantidad)
+
+
+def _facturas_almacenadas(numeros: Iterator[str]) -> Iterator[bytes]:
+    """
+    Facturas del almacen por grupos de ``FACTURAS_POR_FRAGMENTO`` numeros
+
+    Cada grupo se lee con una consulta; las que faltan se generan y se
+    guardan, igual que en ``/api/factura/{numero_factura}``.
+    """
+    while grupo := list(islice(numeros, FACTURAS_POR_FRAGMENTO)):
+        guardadas = almacen_facturas.obtener_varios(grupo)
+        faltan = [numero for numero in grupo if numero not in guardadas]
+        for factura in generador.generar_facturas_internas(faltan):
+            guardadas[factura.numero_factura] = almacen_facturas.guardar(factura, factura.a_json())
+        for numero in grupo:
+            yield guardadas[numero]
+
+
+def _facturas_serializadas(solicitud: SolicitudLote) -> Iterator[bytes]:
+    """
+    Facturas del lote ya serializadas, generadas en este proceso o en el pool
+
+    Con almacen cada numero es la factura guardada (o la que se guarda al
+    generarla), asi que no se usan ``semilla`` ni ``paralelo``.
+    """
+    numeros = _numeros_lote(solicitud)
+    if almacen_facturas is not None:
+        return _facturas_almacenadas(numeros)
+    if solicitud.paralelo:
+        return generacion_paralela.generar_numeros(numeros, solicitud.semilla)
+    return (
+        factura.a_json()
+        for factura in generador.generar_facturas_internas(numeros, solicitud.semilla)
+    )
+
+
+def _stream_lote(solicitud: SolicitudLote) -> Iterator[bytes]:
+    """Serializa el lote como NDJSON agrupando varias facturas por fragmento"""
+    fragmento = []
+    for factura in _facturas_serializadas(solicitud):
+        fragmento.append(factura)
+        if len(fragmento) >= FACTURAS_POR_FRAGMENTO:
+            yield b"\n".join(fragmento) + b"\n"
+            fragmento.clear()
+    if fragmento:
+        yield b"\n".join(fragmento) + b"\n"
+
+
+@app.get("/api/reserva/estadisticas")
+def estadisticas_reserva():
+    """Devuelve la profundidad y los contadores de la reserva de facturas"""
+    return {"habilitada": reserva_facturas.habilitada, **reserva_facturas.estadisticas()}
+
+
+@app.get("/api/limites/estadisticas")
+def estadisticas_limites():
+    """Devuelve los contadores de la agrupacion de peticiones y del limitador de tasa"""
+    return {"coalescencia": vuelo_unico.estadisticas(), "limitador": limitador.estadisticas()}
+
+
+@app.get("/api/ejecutor/estadisticas")
+def estadisticas_ejecutor():
+    """Devuelve la configuracion y los contadores del ejecutor de generacion"""
+    return ejecutor.estadisticas()
+
+
+@app.post("/api/facturas/lote")
+async def generar_lote(solicitud: SolicitudLote, request: Request):
+    """
+    Genera un lote de facturas y las devuelve como NDJSON (una factura por linea)
+    
+    - **cantidad**: Numero de facturas a generar
+    - **numeros**: Lista explicita de numeros de factura (alternativa a cantidad)
+    - **prefijo**: Prefijo de los numeros de factura (ej: FAC-)
+    - **inicio**: Primer consecutivo del lote
+    - **semilla**: Semilla opcional para obtener un lote reproducible
+    - **paralelo**: Reparte la generacion entre varios procesos
+    
+    El lote ocupa un hueco del ejecutor mientras dura el stream y cada
+    fragmento se genera en el pool de hilos. El hueco tambien se libera si el
+    cliente se desconecta antes de que empiece el stream.
+    """
+    _limitar(request)
+    ejecutor.reservar()
+    flujo = ejecutor.iterar(_stream_lote(solicitud))
+    return StreamingResponse(
+        flujo,
+        media_type="application/x-ndjson",
+        background=BackgroundTask(flujo.cerrar)
+    )
+
+
+@app.post("/api/facturas/exportar")
+async def exportar(solicitud: SolicitudExportacion, request: Request):
+    """
+    Escribe facturas generadas en archivos Parquet o CSV particionados
+    
+    Genera tablas planas de encabezados y lineas en un subdirectorio nuevo de
+    ``EXPORTACION_DIR`` y devuelve el resumen con los archivos creados.
+    """
+    _limitar(request)
+    from services.exportacion import exportar_facturas
+    destino = EXPORTACION_DIR / f"{datetime.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:8]}"
+    try:
+        return await ejecutor.ejecutar(partial(
+            exportar_facturas,
+            destino,
+            solicitud.cantidad,
+            generador_columnar(),
+            formato=solicitud.formato,
+            prefijo=solicitud.prefijo,
+            inicio=solicitud.inicio,
+            semilla=solicitud.semilla,
+            facturas_por_grupo=solicitud.facturas_por_grupo,
+        ))
+    except RuntimeError as e:
+        raise HTTPException(status_code=501, detail=str(e)) from e
+
+
+def _autorizar_perfiles(authorization: Optional[str]) -> None:
+    """Los perfiles solo se consultan con ``Authorization: Bearer <PERFIL_TOKEN>``"""
+    if perfilado.token is None:
+        raise HTTPException(status_code=404, detail="Perfilado no habilitado")
+    esquema, _, token = (authorization or "").partition(" ")
+    if esquema.lower() != "bearer" or not perfilado.token_valido(token):
+        raise HTTPException(status_code=403, detail="Token de perfilado invalido")
+
+
+@app.get("/api/perfiles", include_in_schema=False)
+def listar_perfiles(authorization: Optional[str] = Header(None)):
+    """Perfiles guardados, del mas reciente al mas antiguo"""
+    _autorizar_perfiles(authorization)
+    return perfilado.almacen.listar()
+
+
+@app.get("/api/perfiles/{nombre}", include_in_schema=False)
+def obtener_perfil(nombre: str, authorization: Optional[str] = Header(None)):
+    """Perfil en formato de pilas plegadas (flamegraph.pl, speedscope)"""
+    _autorizar_perfiles(authorization)
+    contenido = perfilado.almacen.leer(nombre)
+    if contenido is None:
+        raise HTTPException(status_code=404, detail="Perfil no encontrado")
+    return Response(contenido, media_type="text/plain")
+
+
+@app.get("/metrics", include_in_schema=False)
+def exponer_metricas():
+    """Metricas en formato de texto de Prometheus"""
+    return Response(metricas.exponer(), media_type=CONTENT_TYPE_LATEST)
+
+
+@app.get("/ready")
+def readiness_check():
+    """Indica si el servicio termino de calentarse y puede recibir trafico (503 si no)"""
+    estado = calentamiento.estado()
+    if not estado["listo"]:
+        return JSONResponse(status_code=503, content={"status": "calentando", **estado})
+    return {"status": "ok", **estado}
+
+
 @app.get("/health")
 def health_check():
     """Endpoint para verificar el estado del servicio"""
@@ -1,3 +1,16 @@
 from .factura import Empresa, Cliente, DetalleProducto, Factura
+from .interno import ClienteInterno, EmpresaInterna, FacturaInterna, LineaFactura
+from .lote import SolicitudExportacion, SolicitudLote
 
-__all__ = ["Empresa", "Cliente", "DetalleProducto", "Factura"]
+__all__ = [
+    "Empresa",
+    "Cliente",
+    "DetalleProducto",
+    "Factura",
+    "EmpresaInterna",
+    "ClienteInterno",
+    "LineaFactura",
+    "FacturaInterna",
+    "SolicitudExportacion",
+    "SolicitudLote",
+]
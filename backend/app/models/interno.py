@@ -0,0 +1,63 @@
+from dataclasses import dataclass
+from datetime import date
+from typing import Annotated
+from pydantic import Field, TypeAdapter
+from models.factura import Factura
+
+
+@dataclass(slots=True, frozen=True)
+class EmpresaInterna:
+    """Datos de la empresa emisora dentro del generador"""
+    nombre: str
+    direccion: str
+    telefono: str
+    email: str
+
+
+@dataclass(slots=True, frozen=True)
+class ClienteInterno:
+    """Datos del cliente dentro del generador"""
+    nombre: str
+    direccion: str
+    telefono: str
+
+
+@dataclass(slots=True, frozen=True)
+class LineaFactura:
+    """Linea de producto con su subtotal ya calculado"""
+    producto: str
+    categoria: str
+    cantidad: int
+    precio_unitario: float
+    # No forma parte del esquema publico: se omite al serializar
+    subtotal: Annotated[float, Field(exclude=True)]
+
+
+@dataclass(slots=True, frozen=True)
+class FacturaInterna:
+    """
+    Representacion compacta de una factura para la generacion y los lotes
+
+    Los valores son correctos por construccion, asi que no se validan; solo se
+    convierten al modelo ``Factura`` en el borde de la API (``a_modelo``) o se
+    serializan directamente con el mismo JSON que ``Factura`` (``a_json``).
+    """
+    numero_factura: str
+    fecha_emision: date
+    empresa: EmpresaInterna
+    cliente: ClienteInterno
+    detalle: tuple[LineaFactura, ...]
+    subtotal: float
+    impuesto: float
+    total: float
+
+    def a_modelo(self) -> Factura:
+        """Convierte la factura al modelo Pydantic de la API"""
+        return Factura.model_validate(self, from_attributes=True)
+
+    def a_json(self) -> bytes:
+        """Serializa la factura con el mismo JSON que ``Factura.model_dump_json``"""
+        return _ADAPTADOR.dump_json(self)
+
+
+_ADAPTADOR = TypeAdapter(FacturaInterna)
@@ -0,0 +1,55 @@
+from datetime import date
+from pydantic import BaseModel, Field, model_validator
+from typing import Literal, Optional
+
+
+class SolicitudLote(BaseModel):
+    """
+    Modelo de la solicitud de generacion masiva de facturas
+    
+    El lote se define por un rango (``cantidad`` facturas desde ``inicio``) o
+    por una lista explicita de ``numeros``.
+    """
+    cantidad: Optional[int] = Field(None, gt=0, le=1_000_000, description="Numero de facturas a generar")
+    numeros: Optional[list[str]] = Field(
+        None, min_length=1, max_length=100_000, description="Numeros de factura explicitos"
+    )
+    prefijo: str = Field("FAC-", max_length=50, description="Prefijo de los numeros de factura")
+    inicio: int = Field(1, ge=0, description="Primer consecutivo del lote")
+    semilla: Optional[int] = Field(None, description="Semilla para obtener un lote reproducible")
+    paralelo: bool = Field(False, description="Reparte la generacion entre varios procesos")
+    
+    @model_validator(mode="after")
+    def validar_rango(self) -> "SolicitudLote":
+        """Exige exactamente una forma de indicar las facturas del lote"""
+        if (self.cantidad is None) == (self.numeros is None):
+            raise ValueError("Indique 'cantidad' o 'numeros', pero no ambos")
+        return self
+
+
+class SolicitudExportacion(BaseModel):
+    """Modelo de la solicitud de exportacion de facturas a archivos"""
+    cantidad: int = Field(..., gt=0, le=100_000_000, description="Numero de facturas a exportar")
+    formato: Literal["parquet", "csv"] = Field("parquet", description="Formato de los archivos")
+    prefijo: str = Field("FAC-", max_length=50, description="Prefijo de los numeros de factura")
+    inicio: int = Field(1, ge=0, description="Primer consecutivo")
+    semilla: Optional[int] = Field(None, description="Semilla para obtener datos reproducibles")
+    facturas_por_grupo: int = Field(100_000, ge=1_000, le=1_000_000, description="Facturas por grupo de filas")
+
+
+class SolicitudAgregacion(BaseModel):
+    """
+    Modelo de la solicitud de agregacion de facturas
+    
+    ``origen`` indica si se agregan facturas generadas al vuelo con el
+    generador columnar (``cantidad`` y ``semilla``) o las guardadas en el
+    almacen (filtradas por ``desde``/``hasta``).
+    """
+    agrupar_por: Literal["categoria", "ciudad", "empresa", "fecha", "mes"] = Field(
+        ..., description="Campo por el que se agrupa"
+    )
+    origen: Literal["generado", "almacen"] = Field("generado", description="Facturas que se agregan")
+    cantidad: int = Field(100_000, gt=0, le=2_000_000, description="Facturas a generar (origen generado)")
+    semilla: Optional[int] = Field(None, description="Semilla para obtener datos reproducibles")
+    desde: Optional[date] = Field(None, description="Fecha de emision minima (origen almacen)")
+    hasta: Optional[date] = Field(None, description="Fecha de emision maxima (origen almacen)")
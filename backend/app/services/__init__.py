@@ -1,3 +1,25 @@
-from .generador import GeneradorFacturas
+from .generador import GeneradorFacturas, numeros_factura, semilla_factura
+from .rapido import GeneradorFacturasRapido
+from .motores import MOTORES, crear_generador
 
-__all__ = ["GeneradorFacturas"]
+# El generador columnar depende de numpy: se importa solo si se usa
+_COLUMNAR = ("GeneradorColumnar", "LoteColumnar")
+
+
+def __getattr__(nombre):
+    if nombre in _COLUMNAR:
+        from . import columnar
+        return getattr(columnar, nombre)
+    raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
+
+
+__all__ = [
+    "GeneradorColumnar",
+    "GeneradorFacturas",
+    "GeneradorFacturasRapido",
+    "LoteColumnar",
+    "MOTORES",
+    "crear_generador",
+    "numeros_factura",
+    "semilla_factura",
+]
@@ -0,0 +1,108 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass(frozen=True)
+class EntradaCache:
+    """Respuesta serializada almacenada en la cache"""
+    contenido: bytes
+    etag: str
+    expira: Optional[float]
+
+
+class CacheFacturas:
+    """
+    Cache LRU acotada de respuestas JSON ya serializadas
+
+    Guarda los bytes de la respuesta (no objetos ``Factura``), de modo que un
+    acierto evita tanto la generacion como la serializacion. Las entradas se
+    expulsan por antiguedad de uso al superar ``max_entradas`` y, si se define
+    ``ttl`` (en segundos), al caducar.
+    """
+
+    def __init__(self, max_entradas: int = 1024, ttl: Optional[float] = None):
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self._entradas: OrderedDict[str, EntradaCache] = OrderedDict()
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.expulsiones = 0
+
+    @property
+    def habilitada(self) -> bool:
+        """Indica si la cache puede almacenar entradas"""
+        return self.max_entradas > 0
+
+    @staticmethod
+    def calcular_etag(contenido: bytes) -> str:
+        """Calcula un ETag fuerte a partir del contenido serializado"""
+        return '"' + hashlib.blake2b(contenido, digest_size=16).hexdigest() + '"'
+
+    def obtener(self, clave: str) -> Optional[EntradaCache]:
+        """Devuelve la entrada de la clave o None si no existe o ha caducado"""
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is not None and entrada.expira is not None and entrada.expira <= time.monotonic():
+                del self._entradas[clave]
+                self.expulsiones += 1
+                entrada = None
+            if entrada is None:
+                self.fallos += 1
+                return None
+            self._entradas.move_to_end(clave)
+            self.aciertos += 1
+            return entrada
+
+    def guardar(self, clave: str, contenido: bytes) -> EntradaCache:
+        """Almacena el contenido de la clave y expulsa las entradas menos usadas"""
+        expira = time.monotonic() + self.ttl if self.ttl else None
+        entrada = EntradaCache(contenido, self.calcular_etag(contenido), expira)
+        if not self.habilitada:
+            return entrada
+        with self._lock:
+            self._entradas[clave] = entrada
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+                self.expulsiones += 1
+        return entrada
+
+    def limpiar(self) -> None:
+        """Elimina todas las entradas y reinicia los contadores"""
+        with self._lock:
+            self._entradas.clear()
+            self.aciertos = self.fallos = self.expulsiones = 0
+
+    def estadisticas(self) -> dict:
+        """Devuelve los contadores de uso de la cache"""
+        with self._lock:
+            consultas = self.aciertos + self.fallos
+            return {
+                "entradas": len(self._entradas),
+                "max_entradas": self.max_entradas,
+                "ttl": self.ttl,
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "expulsiones": self.expulsiones,
+                "tasa_aciertos": self.aciertos / consultas if consultas else 0.0,
+            }
+
+
+def etag_coincide(if_none_match: Optional[str], etag: str) -> bool:
+    """Comprueba si la cabecera If-None-Match incluye el ETag (comparacion debil)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for candidato in if_none_match.split(","):
+        candidato = candidato.strip()
+        if candidato.startswith("W/"):
+            candidato = candidato[2:]
+        if candidato == etag:
+            return True
+    return False
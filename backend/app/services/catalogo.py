@@ -0,0 +1,236 @@
+import json
+import math
+from pathlib import Path
+from typing import Callable, Iterator, Mapping, Optional, Sequence, Union
+
+# Intentos de rechazo al elegir categorias distintas con pesos antes de pasar
+# al metodo exacto (lineal en el numero de categorias)
+INTENTOS_POR_CATEGORIA = 8
+
+
+def tabla_alias(pesos: Sequence[float]) -> tuple[tuple[float, ...], tuple[int, ...]]:
+    """
+    Construye las tablas del metodo alias (Vose) para muestrear con pesos en O(1)
+
+    Devuelve ``(probabilidad, alias)``: para muestrear se elige una casilla
+    ``i`` uniforme y se devuelve ``i`` con probabilidad ``probabilidad[i]`` o
+    ``alias[i]`` en caso contrario. Con pesos iguales todas las
+    probabilidades son 1, asi que el muestreo equivale a elegir uniformemente.
+    """
+    n = len(pesos)
+    if n == 0:
+        raise ValueError("No se puede construir una tabla alias sin pesos")
+    if any(not math.isfinite(p) or p <= 0 for p in pesos):
+        raise ValueError("Los pesos deben ser numeros positivos")
+    if all(p == pesos[0] for p in pesos):
+        return (1.0,) * n, tuple(range(n))
+
+    total = math.fsum(pesos)
+    escalados = [p * n / total for p in pesos]
+    probabilidad = [1.0] * n
+    alias = list(range(n))
+    pequenos = [i for i, p in enumerate(escalados) if p < 1.0]
+    grandes = [i for i, p in enumerate(escalados) if p >= 1.0]
+    while pequenos and grandes:
+        pequeno = pequenos.pop()
+        grande = grandes[-1]
+        probabilidad[pequeno] = escalados[pequeno]
+        alias[pequeno] = grande
+        escalados[grande] -= 1.0 - escalados[pequeno]
+        if escalados[grande] < 1.0:
+            pequenos.append(grandes.pop())
+    # Las casillas que quedan valen 1 salvo por errores de redondeo
+    return tuple(probabilidad), tuple(alias)
+
+
+class Catalogo:
+    """
+    Catalogo de productos precompilado para generar lineas de factura
+
+    Se construye una vez al arrancar y guarda arrays planos: nombre,
+    categoria, peso y rango de precio de cada producto, los productos de cada
+    categoria como un rango contiguo (``inicio``, ``conteo``) y las tablas del
+    metodo alias de las categorias y de los productos dentro de cada
+    categoria. Elegir una categoria o un producto cuesta O(1) sin importar el
+    tamaño del catalogo.
+
+    Con todos los pesos iguales (el catalogo por defecto) el muestreo consume
+    el generador aleatorio exactamente como antes de tener pesos, de modo que
+    las facturas deterministas no cambian.
+    """
+
+    def __init__(
+        self,
+        categorias: Sequence[tuple[str, float]],
+        productos: Sequence[tuple[str, int, float, int, int]]
+    ):
+        """
+        ``categorias`` es una secuencia de ``(nombre, peso)`` y ``productos``
+        una de ``(nombre, indice de categoria, peso, precio minimo, precio maximo)``
+        agrupada por categoria en el mismo orden.
+        """
+        if not categorias:
+            raise ValueError("El catalogo no tiene categorias")
+        self.categorias = tuple(nombre for nombre, _ in categorias)
+        if len(set(self.categorias)) != len(self.categorias):
+            raise ValueError("El catalogo tiene categorias repetidas")
+        self.pesos_categoria = tuple(float(peso) for _, peso in categorias)
+
+        self.productos = tuple(p[0] for p in productos)
+        self.categoria_producto = tuple(p[1] for p in productos)
+        self.pesos_producto = tuple(float(p[2]) for p in productos)
+        self.precio_min = tuple(p[3] for p in productos)
+        self.precio_max = tuple(p[4] for p in productos)
+        # Amplitud del rango de precios (el maximo esta incluido)
+        self.rango_precio = tuple(p[4] - p[3] + 1 for p in productos)
+        if any(r < 1 or m < 0 for r, m in zip(self.rango_precio, self.precio_min, strict=True)):
+            raise ValueError("Cada producto necesita un rango de precios [minimo, maximo] valido")
+
+        inicio: list[Optional[int]] = [None] * len(self.categorias)
+        conteo = [0] * len(self.categorias)
+        anterior = None
+        for i, c in enumerate(self.categoria_producto):
+            if c != anterior:
+                if not 0 <= c < len(self.categorias) or inicio[c] is not None:
+                    raise ValueError("Los productos deben estar agrupados por categoria")
+                inicio[c] = i
+                anterior = c
+            conteo[c] += 1
+        for nombre, n in zip(self.categorias, conteo, strict=True):
+            if n == 0:
+                raise ValueError(f"La categoria {nombre} no tiene productos")
+        self.inicio = tuple(inicio)
+        self.conteo = tuple(conteo)
+        self.productos_por_categoria = tuple(
+            self.productos[i:i + n] for i, n in zip(self.inicio, self.conteo, strict=True)
+        )
+
+        self.probabilidad_categoria, self.alias_categoria = tabla_alias(self.pesos_categoria)
+        self.categorias_uniformes = len(set(self.pesos_categoria)) == 1
+
+        # Tablas alias de los productos de cada categoria, aplanadas con indices globales
+        probabilidad, alias = [], []
+        uniformes = []
+        for i, n in zip(self.inicio, self.conteo, strict=True):
+            pesos = self.pesos_producto[i:i + n]
+            tabla_probabilidad, tabla_alias_local = tabla_alias(pesos)
+            probabilidad.extend(tabla_probabilidad)
+            alias.extend(i + a for a in tabla_alias_local)
+            uniformes.append(len(set(pesos)) == 1)
+        self.probabilidad_producto = tuple(probabilidad)
+        self.alias_producto = tuple(alias)
+        self.productos_uniformes = tuple(uniformes)
+
+    def __len__(self) -> int:
+        return len(self.productos)
+
+    def categoria(self, r: Callable[[], float]) -> int:
+        """Elige una categoria segun su peso con una sola llamada a ``r``"""
+        x = r() * len(self.categorias)
+        i = int(x)
+        return i if x - i < self.probabilidad_categoria[i] else self.alias_categoria[i]
+
+    def producto(self, categoria: int, r: Callable[[], float]) -> int:
+        """Elige un producto de la categoria segun su peso; devuelve su indice global"""
+        x = r() * self.conteo[categoria]
+        i = int(x)
+        k = self.inicio[categoria] + i
+        return k if x - i < self.probabilidad_producto[k] else self.alias_producto[k]
+
+    def muestrear_categorias(self, r: Callable[[], float], cantidad: int) -> Iterator[int]:
+        """
+        Elige perezosamente ``cantidad`` categorias distintas (como mucho todas) segun su peso
+
+        Cada categoria se sortea al pedirla, asi que las llamadas a ``r`` se
+        intercalan con las de quien las consume. Con pesos iguales es un
+        Fisher-Yates parcial sobre un diccionario de intercambios: O(cantidad)
+        y la misma secuencia que sobre una lista completa. Con pesos se sortea
+        con la tabla alias y se descartan las repetidas, lo que equivale a
+        muestrear sin reemplazo proporcional al peso; si los pesos se
+        concentran en las ya elegidas y se agotan los intentos, la categoria
+        se elige recorriendo las libres.
+        """
+        n = len(self.categorias)
+        cantidad = min(cantidad, n)
+        if self.categorias_uniformes:
+            intercambios: dict[int, int] = {}
+            for i in range(cantidad):
+                j = i + int(r() * (n - i))
+                yield intercambios.get(j, j)
+                intercambios[j] = intercambios.get(i, i)
+            return
+
+        vistas = set()
+        intentos = INTENTOS_POR_CATEGORIA * cantidad
+        while len(vistas) < cantidad:
+            if intentos:
+                intentos -= 1
+                c = self.categoria(r)
+                if c in vistas:
+                    continue
+            else:
+                libres = [c for c in range(n) if c not in vistas]
+                x = r() * math.fsum(self.pesos_categoria[c] for c in libres)
+                for c in libres:
+                    x -= self.pesos_categoria[c]
+                    if x < 0:
+                        break
+            vistas.add(c)
+            yield c
+
+    def como_diccionario(self) -> dict[str, list[str]]:
+        """Productos de cada categoria, en el formato de ``GeneradorFacturas.productos``"""
+        return {c: list(p) for c, p in zip(self.categorias, self.productos_por_categoria, strict=True)}
+
+    @classmethod
+    def desde_diccionario(
+        cls,
+        productos: Mapping[str, Sequence[str]],
+        precios: Mapping[str, tuple[int, int]],
+        precio_por_defecto: tuple[int, int],
+        pesos: Optional[Mapping[str, float]] = None
+    ) -> "Catalogo":
+        """Catalogo con los productos por categoria y los precios de cada categoria"""
+        pesos = pesos or {}
+        categorias = [(c, pesos.get(c, 1.0)) for c in productos]
+        filas = [
+            (nombre, c, 1.0, *precios.get(categoria, precio_por_defecto))
+            for c, categoria in enumerate(productos)
+            for nombre in productos[categoria]
+        ]
+        return cls(categorias, filas)
+
+    @classmethod
+    def desde_datos(cls, datos: Mapping, precio_por_defecto: tuple[int, int]) -> "Catalogo":
+        """
+        Catalogo a partir de su descripcion (el contenido de un archivo de catalogo)
+
+        ``datos["categorias"]`` es una lista de categorias con ``nombre``,
+        ``productos`` y opcionalmente ``peso`` y ``precio`` (``[minimo,
+        maximo]``). Cada producto es un nombre o un objeto con ``nombre`` y
+        opcionalmente su propio ``peso`` y ``precio``. El precio por defecto de
+        las categorias puede indicarse en ``datos["precio_por_defecto"]``.
+        """
+        try:
+            precio_por_defecto = tuple(datos.get("precio_por_defecto", precio_por_defecto))
+            categorias, filas = [], []
+            for c, categoria in enumerate(datos["categorias"]):
+                precio_categoria = tuple(categoria.get("precio", precio_por_defecto))
+                categorias.append((categoria["nombre"], float(categoria.get("peso", 1.0))))
+                for producto in categoria["productos"]:
+                    if isinstance(producto, str):
+                        producto = {"nombre": producto}
+                    precio_min, precio_max = producto.get("precio", precio_categoria)
+                    filas.append((
+                        producto["nombre"], c, float(producto.get("peso", 1.0)),
+                        int(precio_min), int(precio_max)
+                    ))
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"Catalogo con formato invalido: {e!r}") from None
+        return cls(categorias, filas)
+
+    @classmethod
+    def cargar(cls, ruta: Union[str, Path], precio_por_defecto: tuple[int, int]) -> "Catalogo":
+        """Carga un catalogo desde un archivo JSON (ver ``desde_datos``)"""
+        with open(ruta, encoding="utf-8") as archivo:
+            return cls.desde_datos(json.load(archivo), precio_por_defecto)
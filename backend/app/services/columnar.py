@@ -0,0 +1,269 @@
+from dataclasses import dataclass
+from typing import Iterator, Optional, Sequence, Union
+import numpy as np
+from services.catalogo import INTENTOS_POR_CATEGORIA, Catalogo
+from services.generador import (
+    DIAS_FECHA_DETERMINISTA,
+    FECHA_BASE_DETERMINISTA,
+    PRECIO_POR_DEFECTO,
+    PRECIOS_CATEGORIA,
+    TASA_IVA,
+    TIPOS_NEGOCIO,
+    GeneradorFacturas,
+)
+
+# Hasta este numero de categorias se eligen ordenando una clave por categoria;
+# por encima, con la tabla alias (el coste ya no depende del catalogo)
+CATEGORIAS_ORDENACION = 24
+
+
+@dataclass
+class LoteColumnar:
+    """
+    Lote de facturas en formato columnar
+
+    Las columnas por linea estan agrupadas por factura; ``desplazamientos``
+    (de tamaño ``num_facturas + 1``) indica donde empieza cada factura, como
+    los offsets de una lista Arrow. Categorias, productos, empresas, ciudades
+    y clientes se guardan como indices sobre sus diccionarios.
+    """
+    categorias: tuple[str, ...]
+    productos: tuple[str, ...]
+
+    # Columnas por linea
+    categoria: np.ndarray
+    producto: np.ndarray
+    cantidad: np.ndarray
+    precio_unitario: np.ndarray
+    subtotal_linea: np.ndarray
+
+    # Columnas por factura
+    desplazamientos: np.ndarray
+    subtotal: np.ndarray
+    impuesto: np.ndarray
+    total: np.ndarray
+
+    # Columnas de encabezado (solo si el generador conoce empresas, ciudades y apellidos)
+    empresas: tuple[str, ...] = ()
+    ciudades: tuple[str, ...] = ()
+    apellidos: tuple[str, ...] = ()
+    tipos_negocio: tuple[str, ...] = TIPOS_NEGOCIO
+    empresa: Optional[np.ndarray] = None
+    ciudad_empresa: Optional[np.ndarray] = None
+    tipo_cliente: Optional[np.ndarray] = None
+    apellido_cliente: Optional[np.ndarray] = None
+    ciudad_cliente: Optional[np.ndarray] = None
+    dia_emision: Optional[np.ndarray] = None
+
+    @property
+    def num_facturas(self) -> int:
+        return len(self.subtotal)
+
+    @property
+    def num_lineas(self) -> int:
+        return len(self.cantidad)
+
+    @property
+    def lineas_por_factura(self) -> np.ndarray:
+        return np.diff(self.desplazamientos)
+
+    def factura_de_linea(self) -> np.ndarray:
+        """Devuelve, para cada linea, el indice de su factura dentro del lote"""
+        return np.repeat(np.arange(self.num_facturas), self.lineas_por_factura)
+
+    @property
+    def tiene_encabezados(self) -> bool:
+        return self.empresa is not None
+
+    def fechas_emision(self) -> np.ndarray:
+        """Devuelve la fecha de emision de cada factura como ``datetime64[D]``"""
+        return np.datetime64(FECHA_BASE_DETERMINISTA, "D") + self.dia_emision
+
+
+class GeneradorColumnar:
+    """
+    Generador vectorizado de lineas de factura con NumPy
+
+    Genera columnas completas de una vez en lugar de un ``DetalleProducto``
+    por linea. Respeta las reglas de ``GeneradorFacturas``: entre 3 y 8 lineas
+    por factura con categorias distintas, cantidades de 1 a 20, los rangos de
+    precio de cada producto y el IVA del 19% sobre el subtotal de la factura.
+    ``productos`` es un ``Catalogo`` (con sus pesos) o un diccionario de
+    productos por categoria con los precios por defecto.
+    """
+
+    def __init__(
+        self,
+        productos: Union[Catalogo, dict[str, list[str]]],
+        empresas: Sequence[str] = (),
+        ciudades: Sequence[str] = (),
+        apellidos: Sequence[str] = (),
+        lineas_min: int = 3,
+        lineas_max: int = 8
+    ):
+        self.empresas = tuple(empresas)
+        self.ciudades = tuple(ciudades)
+        self.apellidos = tuple(apellidos)
+        if not isinstance(productos, Catalogo):
+            productos = Catalogo.desde_diccionario(productos, PRECIOS_CATEGORIA, PRECIO_POR_DEFECTO)
+        catalogo = productos
+        self.categorias = catalogo.categorias
+        self.productos = catalogo.productos
+        # Con menos categorias que lineas cada factura usa todas, como en los motores por fila
+        self.lineas_max = min(lineas_max, len(self.categorias))
+        self.lineas_min = min(lineas_min, self.lineas_max)
+
+        # Productos de cada categoria: primer indice global y cantidad
+        self._inicio_productos = np.array(catalogo.inicio, dtype=np.int64)
+        self._conteo_productos = np.array(catalogo.conteo, dtype=np.int64)
+
+        # Tablas alias de los productos (indices globales) y rango de precio de cada uno
+        self._probabilidad_producto = np.array(catalogo.probabilidad_producto, dtype=np.float64)
+        self._alias_producto = np.array(catalogo.alias_producto, dtype=np.int64)
+        self._precio_min = np.array(catalogo.precio_min, dtype=np.int64)
+        self._precio_max = np.array(catalogo.precio_max, dtype=np.int64)
+
+        # Tabla alias y pesos de las categorias
+        self._probabilidad_categoria = np.array(catalogo.probabilidad_categoria, dtype=np.float64)
+        self._alias_categoria = np.array(catalogo.alias_categoria, dtype=np.int64)
+        self._pesos_categoria = np.array(catalogo.pesos_categoria, dtype=np.float64)
+        self._categorias_uniformes = catalogo.categorias_uniformes
+        self._tipo_categoria = np.int8 if len(self.categorias) <= np.iinfo(np.int8).max else np.int32
+
+    @classmethod
+    def desde_generador(cls, generador: GeneradorFacturas) -> "GeneradorColumnar":
+        """Crea un generador columnar con el catalogo, empresas y ciudades de un generador"""
+        from services.rapido import construir_pools
+
+        apellidos = getattr(generador, "apellidos", None) or construir_pools()[1]
+        return cls(generador.catalogo, generador.empresas, generador.ciudades, apellidos)
+
+    @property
+    def genera_encabezados(self) -> bool:
+        return bool(self.empresas and self.ciudades and self.apellidos)
+
+    def _generar_encabezados(self, num_facturas: int, rng: np.random.Generator) -> dict:
+        """Genera los indices de empresa, cliente, ciudades y fecha de cada factura"""
+        return {
+            "empresas": self.empresas,
+            "ciudades": self.ciudades,
+            "apellidos": self.apellidos,
+            "empresa": rng.integers(0, len(self.empresas), num_facturas, dtype=np.int16),
+            "ciudad_empresa": rng.integers(0, len(self.ciudades), num_facturas, dtype=np.int16),
+            "tipo_cliente": rng.integers(0, len(TIPOS_NEGOCIO), num_facturas, dtype=np.int16),
+            "apellido_cliente": rng.integers(0, len(self.apellidos), num_facturas, dtype=np.int32),
+            "ciudad_cliente": rng.integers(0, len(self.ciudades), num_facturas, dtype=np.int16),
+            "dia_emision": rng.integers(0, DIAS_FECHA_DETERMINISTA, num_facturas, dtype=np.int16),
+        }
+
+    def _muestrear_categorias(self, lineas: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        """
+        Categorias distintas de cada factura, aplanadas en el orden de las lineas
+
+        Con pocas categorias (hasta ``CATEGORIAS_ORDENACION``) se ordena una
+        clave aleatoria por categoria y factura: permutacion uniforme o, con
+        pesos, claves exponenciales divididas por el peso, que equivale a
+        muestrear sin reemplazo proporcional al peso (Efraimidis-Spirakis).
+        Con mas, como ``Catalogo.muestrear_categorias``: cada posicion se
+        sortea con la tabla alias y las facturas que repiten categoria vuelven
+        a sortear esa posicion; tras ``INTENTOS_POR_CATEGORIA`` rondas las
+        pocas que siguen repitiendo eligen entre sus categorias libres segun
+        el peso. Asi el coste por factura no crece con el catalogo.
+        """
+        num_categorias = len(self.categorias)
+        if num_categorias <= CATEGORIAS_ORDENACION:
+            if self._categorias_uniformes:
+                claves = rng.random((len(lineas), num_categorias))
+            else:
+                claves = rng.exponential(size=(len(lineas), num_categorias)) / self._pesos_categoria
+            orden = np.argsort(claves, axis=1)
+            return orden[np.arange(num_categorias) < lineas[:, None]]
+
+        elegidas = np.empty((len(lineas), self.lineas_max), dtype=np.int64)
+        for k in range(self.lineas_max):
+            filas = np.flatnonzero(lineas > k)
+            for _ in range(INTENTOS_POR_CATEGORIA):
+                x = rng.random(len(filas)) * num_categorias
+                casilla = x.astype(np.int64)
+                candidatas = np.where(
+                    x - casilla < self._probabilidad_categoria[casilla],
+                    casilla,
+                    self._alias_categoria[casilla]
+                )
+                elegidas[filas, k] = candidatas
+                filas = filas[(elegidas[filas, :k] == candidatas[:, None]).any(axis=1)]
+                if not len(filas):
+                    break
+            if len(filas):
+                libres = np.ones((len(filas), num_categorias), dtype=bool)
+                libres[np.arange(len(filas))[:, None], elegidas[filas, :k]] = False
+                acumulado = np.cumsum(libres * self._pesos_categoria, axis=1)
+                x = rng.random(len(filas)) * acumulado[:, -1]
+                elegidas[filas, k] = (acumulado <= x[:, None]).sum(axis=1)
+        return elegidas[np.arange(self.lineas_max) < lineas[:, None]]
+
+    def generar(self, num_facturas: int, rng: Optional[np.random.Generator] = None) -> LoteColumnar:
+        """Genera las columnas de ``num_facturas`` facturas"""
+        if rng is None:
+            rng = np.random.default_rng()
+
+        lineas = rng.integers(self.lineas_min, self.lineas_max + 1, size=num_facturas)
+        desplazamientos = np.zeros(num_facturas + 1, dtype=np.int64)
+        np.cumsum(lineas, out=desplazamientos[1:])
+
+        categoria = self._muestrear_categorias(lineas, rng).astype(self._tipo_categoria)
+
+        # Producto por la tabla alias de su categoria: casilla uniforme y alias
+        num_lineas = len(categoria)
+        casilla = rng.random(num_lineas) * self._conteo_productos[categoria]
+        posicion = casilla.astype(np.int64)
+        producto = self._inicio_productos[categoria] + posicion
+        producto = np.where(
+            casilla - posicion < self._probabilidad_producto[producto],
+            producto,
+            self._alias_producto[producto]
+        ).astype(np.int32)
+        cantidad = rng.integers(1, 21, size=num_lineas, dtype=np.int32)
+        precio_unitario = rng.integers(
+            self._precio_min[producto], self._precio_max[producto] + 1
+        ).astype(np.int32)
+        subtotal_linea = cantidad.astype(np.int64) * precio_unitario
+
+        if num_facturas:
+            subtotal = np.add.reduceat(subtotal_linea, desplazamientos[:-1]).astype(np.float64)
+        else:
+            subtotal = np.zeros(0, dtype=np.float64)
+        impuesto = np.round(subtotal * TASA_IVA, 2)  # IVA del 19%
+
+        encabezados = self._generar_encabezados(num_facturas, rng) if self.genera_encabezados else {}
+
+        return LoteColumnar(
+            categorias=self.categorias,
+            productos=self.productos,
+            categoria=categoria,
+            producto=producto,
+            cantidad=cantidad,
+            precio_unitario=precio_unitario,
+            subtotal_linea=subtotal_linea,
+            desplazamientos=desplazamientos,
+            subtotal=subtotal,
+            impuesto=impuesto,
+            total=subtotal + impuesto,
+            **encabezados,
+        )
+
+    def generar_bloques(
+        self,
+        num_facturas: int,
+        facturas_por_bloque: int = 100_000,
+        semilla: Optional[int] = None
+    ) -> Iterator[LoteColumnar]:
+        """
+        Genera ``num_facturas`` en bloques de tamaño fijo
+
+        La memoria maxima depende del tamaño del bloque y no del total. Con
+        ``semilla`` la secuencia de bloques es reproducible.
+        """
+        rng = np.random.default_rng(semilla)
+        for inicio in range(0, num_facturas, facturas_por_bloque):
+            yield self.generar(min(facturas_por_bloque, num_facturas - inicio), rng)
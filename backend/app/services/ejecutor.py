@@ -0,0 +1,164 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import AsyncIterator, Callable, Generic, Iterator, Optional, TypeVar
+from services.perfilado import perfil_actual
+
+T = TypeVar("T")
+
+_FIN = object()
+
+
+class EjecutorSaturado(Exception):
+    """Se supero el numero maximo de trabajos pendientes del ejecutor"""
+
+    def __init__(self, reintentar_en: int):
+        super().__init__("Servicio saturado, reintente mas tarde")
+        self.reintentar_en = reintentar_en
+
+
+class EjecutorAcotado:
+    """
+    Ejecutor dedicado para el trabajo de CPU de los endpoints asincronos
+
+    Los trabajos corren en un pool propio de ``hilos`` hilos, separado del
+    threadpool por defecto de FastAPI. Como maximo se admiten
+    ``max_pendientes`` trabajos a la vez (en ejecucion o en cola); por encima
+    se lanza ``EjecutorSaturado`` sin encolar, de modo que la latencia bajo
+    saturacion queda acotada en lugar de crecer con la cola. Con
+    ``max_pendientes=0`` no hay limite.
+    """
+
+    def __init__(
+        self, hilos: Optional[int] = None, max_pendientes: int = 64, reintentar_en: int = 1
+    ):
+        self.hilos = hilos or os.cpu_count() or 1
+        self.max_pendientes = max_pendientes
+        self.reintentar_en = reintentar_en
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.pendientes = 0
+        self.completados = 0
+        self.rechazados = 0
+
+    def _obtener_executor(self) -> ThreadPoolExecutor:
+        """Arranca el pool en el primer uso (y de nuevo tras ``cerrar``)"""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.hilos, thread_name_prefix="generacion"
+                )
+            return self._executor
+
+    def reservar(self) -> None:
+        """Ocupa un hueco de trabajo o lanza ``EjecutorSaturado`` si no quedan"""
+        with self._lock:
+            if self.max_pendientes and self.pendientes >= self.max_pendientes:
+                self.rechazados += 1
+                raise EjecutorSaturado(self.reintentar_en)
+            self.pendientes += 1
+
+    def liberar(self) -> None:
+        with self._lock:
+            self.pendientes -= 1
+            self.completados += 1
+
+    async def ejecutar(self, funcion: Callable[..., T], *args) -> T:
+        """
+        Ejecuta ``funcion`` en el pool sin bloquear el bucle de eventos
+
+        El hueco se libera cuando termina el trabajo en el pool, no cuando
+        deja de esperarse: si se cancela la corrutina (el cliente se fue) el
+        hilo sigue ocupado y el hueco tambien.
+        """
+        self.reservar()
+        perfil = perfil_actual()
+        if perfil is not None:
+            funcion = perfil.envolver(funcion)
+        try:
+            futuro = self._obtener_executor().submit(funcion, *args)
+        except BaseException:
+            self.liberar()
+            raise
+        futuro.add_done_callback(self._liberar_al_terminar)
+        return await asyncio.wrap_future(futuro)
+
+    def _liberar_al_terminar(self, futuro: Future) -> None:
+        self.liberar()
+
+    def iterar(self, iterador: Iterator[T]) -> "FlujoEjecutor[T]":
+        """
+        Consume un iterador sincrono en el pool, un elemento por vez
+
+        Debe llamarse despues de ``reservar``; el hueco se libera al cerrarse
+        el flujo devuelto (ver ``FlujoEjecutor``).
+        """
+        return FlujoEjecutor(self, iterador)
+
+    def estadisticas(self) -> dict:
+        """Devuelve la configuracion y los contadores del ejecutor"""
+        with self._lock:
+            return {
+                "hilos": self.hilos,
+                "max_pendientes": self.max_pendientes,
+                "pendientes": self.pendientes,
+                "completados": self.completados,
+                "rechazados": self.rechazados,
+            }
+
+    def cerrar(self) -> None:
+        """Detiene los hilos del pool"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        # Sin el lock: los trabajos en curso lo necesitan para liberar su hueco
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+
+class FlujoEjecutor(Generic[T]):
+    """
+    Iterador asincrono que consume un iterador sincrono en el pool del ejecutor
+
+    Ocupa el hueco reservado hasta ``cerrar``, que se llama al agotarse o
+    cerrarse la iteracion. Un ``StreamingResponse`` no llega a iterar el flujo
+    si el cliente se desconecta antes de empezar, asi que ``cerrar`` tambien
+    debe pasarse como tarea de fondo de la respuesta; cerrar mas de una vez
+    no tiene efecto. Si queda un elemento generandose en el pool, el hueco se
+    libera cuando ese trabajo termina.
+    """
+
+    def __init__(self, ejecutor: EjecutorAcotado, iterador: Iterator[T]):
+        self._ejecutor = ejecutor
+        self._iterador = iterador
+        self._futuro: Optional[Future] = None
+        self._cerrado = False
+
+    def __aiter__(self) -> AsyncIterator[T]:
+        return self._iterar()
+
+    async def _iterar(self) -> AsyncIterator[T]:
+        perfil = perfil_actual()
+        siguiente = next if perfil is None else perfil.envolver(next)
+        try:
+            if self._cerrado:
+                return
+            executor = self._ejecutor._obtener_executor()
+            while True:
+                self._futuro = executor.submit(siguiente, self._iterador, _FIN)
+                elemento = await asyncio.wrap_future(self._futuro)
+                if elemento is _FIN:
+                    return
+                yield elemento
+        finally:
+            self.cerrar()
+
+    def cerrar(self) -> None:
+        """Libera el hueco del ejecutor (al terminar el elemento en curso, si lo hay)"""
+        if self._cerrado:
+            return
+        self._cerrado = True
+        if self._futuro is not None and not self._futuro.done():
+            self._futuro.add_done_callback(self._ejecutor._liberar_al_terminar)
+        else:
+            self._ejecutor.liberar()
@@ -0,0 +1,224 @@
+import csv
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Iterator, Optional
+import numpy as np
+from services.columnar import GeneradorColumnar, LoteColumnar
+
+FORMATOS_EXPORTACION = ("csv", "parquet")
+
+# Bloques generados que pueden esperar a ser escritos (acota la memoria maxima)
+BLOQUES_EN_COLA = 2
+
+
+def _numeros(prefijo: str, desde: int, hasta: int) -> np.ndarray:
+    """Numeros de factura consecutivos con el mismo formato que ``numeros_factura``"""
+    consecutivos = np.char.zfill(np.arange(desde, hasta).astype(str), 6)
+    return np.char.add(prefijo, consecutivos)
+
+
+def _tablas(lote: LoteColumnar, prefijo: str, primer_numero: int) -> tuple[dict, dict]:
+    """Construye las columnas planas de encabezados y lineas de un bloque"""
+    numeros = _numeros(prefijo, primer_numero, primer_numero + lote.num_facturas)
+    ciudades = np.asarray(lote.ciudades)
+    clientes = np.char.add(
+        np.asarray(lote.tipos_negocio)[lote.tipo_cliente],
+        np.char.add(" ", np.asarray(lote.apellidos)[lote.apellido_cliente])
+    )
+    encabezados = {
+        "numero_factura": numeros,
+        "fecha_emision": lote.fechas_emision(),
+        "empresa": np.asarray(lote.empresas)[lote.empresa],
+        "ciudad_empresa": ciudades[lote.ciudad_empresa],
+        "cliente": clientes,
+        "ciudad_cliente": ciudades[lote.ciudad_cliente],
+        "num_lineas": lote.lineas_por_factura,
+        "subtotal": lote.subtotal,
+        "impuesto": lote.impuesto,
+        "total": lote.total,
+    }
+
+    factura = lote.factura_de_linea()
+    lineas = {
+        "numero_factura": numeros[factura],
+        "linea": np.arange(lote.num_lineas) - lote.desplazamientos[factura] + 1,
+        "categoria": np.asarray(lote.categorias)[lote.categoria],
+        "producto": np.asarray(lote.productos)[lote.producto],
+        "cantidad": lote.cantidad,
+        "precio_unitario": lote.precio_unitario,
+        "subtotal": lote.subtotal_linea,
+    }
+    return encabezados, lineas
+
+
+class _EscritorParticiones:
+    """Escribe bloques de columnas en archivos ``part-NNNNN`` de una tabla"""
+
+    def __init__(self, directorio: Path, formato: str, grupos_por_archivo: int):
+        self.directorio = directorio
+        self.formato = formato
+        self.grupos_por_archivo = grupos_por_archivo
+        self.archivos: list[Path] = []
+        self.filas = 0
+        self._actual = None
+        self._grupos = 0
+        directorio.mkdir(parents=True, exist_ok=True)
+
+    def _abrir(self, columnas: dict) -> None:
+        ruta = self.directorio / f"part-{len(self.archivos):05d}.{self.formato}"
+        self.archivos.append(ruta)
+        self._grupos = 0
+        if self.formato == "parquet":
+            import pyarrow.parquet as pq
+
+            self._actual = pq.ParquetWriter(ruta, _tabla_arrow(columnas).schema)
+        else:
+            archivo = open(ruta, "w", newline="", encoding="utf-8")
+            self._actual = (archivo, csv.writer(archivo))
+            self._actual[1].writerow(columnas.keys())
+
+    def escribir(self, columnas: dict) -> None:
+        """Escribe un bloque como un grupo de filas del archivo actual"""
+        if self._actual is None or self._grupos >= self.grupos_por_archivo:
+            self.cerrar()
+            self._abrir(columnas)
+        if self.formato == "parquet":
+            tabla = _tabla_arrow(columnas)
+            self._actual.write_table(tabla, row_group_size=tabla.num_rows)
+        else:
+            self._actual[1].writerows(zip(*(c.tolist() for c in columnas.values()), strict=True))
+        self._grupos += 1
+        self.filas += len(next(iter(columnas.values())))
+
+    def cerrar(self) -> None:
+        if self._actual is None:
+            return
+        if self.formato == "parquet":
+            self._actual.close()
+        else:
+            self._actual[0].close()
+        self._actual = None
+
+
+def _tabla_arrow(columnas: dict):
+    import pyarrow as pa
+
+    return pa.table({nombre: pa.array(valores) for nombre, valores in columnas.items()})
+
+
+def _poner(cola: queue.Queue, elemento, cancelado: threading.Event) -> bool:
+    """Encola ``elemento`` esperando hueco; devuelve False si se cancela antes"""
+    while not cancelado.is_set():
+        try:
+            cola.put(elemento, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _producir_bloques(
+    columnar: GeneradorColumnar,
+    cantidad: int,
+    facturas_por_grupo: int,
+    semilla: Optional[int],
+    cola: queue.Queue,
+    cancelado: threading.Event
+) -> None:
+    """Genera los bloques en un hilo aparte para solapar generacion y escritura"""
+    try:
+        for lote in columnar.generar_bloques(cantidad, facturas_por_grupo, semilla):
+            if not _poner(cola, lote, cancelado):
+                return
+        _poner(cola, None, cancelado)
+    except BaseException as e:  # el error se relanza en el hilo que escribe
+        _poner(cola, e, cancelado)
+
+
+def _bloques_en_paralelo(
+    columnar: GeneradorColumnar,
+    cantidad: int,
+    facturas_por_grupo: int,
+    semilla: Optional[int]
+) -> Iterator[LoteColumnar]:
+    cola: queue.Queue = queue.Queue(maxsize=BLOQUES_EN_COLA)
+    cancelado = threading.Event()
+    productor = threading.Thread(
+        target=_producir_bloques,
+        args=(columnar, cantidad, facturas_por_grupo, semilla, cola, cancelado),
+        daemon=True
+    )
+    productor.start()
+    try:
+        while True:
+            elemento = cola.get()
+            if elemento is None:
+                return
+            if isinstance(elemento, BaseException):
+                raise elemento
+            yield elemento
+    finally:
+        cancelado.set()
+        productor.join()
+
+
+def exportar_facturas(
+    destino: Path,
+    cantidad: int,
+    columnar: GeneradorColumnar,
+    formato: str = "parquet",
+    prefijo: str = "FAC-",
+    inicio: int = 1,
+    semilla: Optional[int] = None,
+    facturas_por_grupo: int = 100_000,
+    grupos_por_archivo: int = 10
+) -> dict:
+    """
+    Escribe ``cantidad`` facturas generadas como tablas planas particionadas
+
+    Crea ``destino/encabezados`` y ``destino/lineas`` con archivos
+    ``part-NNNNN.csv`` o ``.parquet``. Cada bloque de ``facturas_por_grupo``
+    facturas se escribe como un grupo de filas, y un hilo genera el siguiente
+    bloque mientras se escribe el actual; la memoria maxima depende del tamaño
+    del bloque y no de ``cantidad``.
+    """
+    if formato not in FORMATOS_EXPORTACION:
+        raise ValueError(f"Formato no soportado: {formato} (opciones: {', '.join(FORMATOS_EXPORTACION)})")
+    if formato == "parquet":
+        try:
+            import pyarrow.parquet  # noqa: F401
+        except ImportError:
+            raise RuntimeError("La exportacion a Parquet requiere el paquete pyarrow") from None
+    if not columnar.genera_encabezados:
+        raise ValueError("El generador columnar necesita empresas, ciudades y apellidos para exportar")
+
+    destino = Path(destino)
+    escritores = {
+        "encabezados": _EscritorParticiones(destino / "encabezados", formato, grupos_por_archivo),
+        "lineas": _EscritorParticiones(destino / "lineas", formato, grupos_por_archivo),
+    }
+    t0 = time.perf_counter()
+    numero = inicio
+    try:
+        for lote in _bloques_en_paralelo(columnar, cantidad, facturas_por_grupo, semilla):
+            encabezados, lineas = _tablas(lote, prefijo, numero)
+            escritores["encabezados"].escribir(encabezados)
+            escritores["lineas"].escribir(lineas)
+            numero += lote.num_facturas
+    finally:
+        for escritor in escritores.values():
+            escritor.cerrar()
+
+    return {
+        "destino": str(destino),
+        "formato": formato,
+        "facturas": escritores["encabezados"].filas,
+        "lineas": escritores["lineas"].filas,
+        "archivos": {
+            tabla: [str(ruta.relative_to(destino)) for ruta in escritor.archivos]
+            for tabla, escritor in escritores.items()
+        },
+        "segundos": round(time.perf_counter() - t0, 3),
+    }
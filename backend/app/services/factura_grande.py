@@ -0,0 +1,98 @@
+from itertools import islice
+from typing import Iterable, Iterator
+from pydantic import TypeAdapter
+from pydantic_core import to_json
+from models.interno import FacturaInterna, LineaFactura
+from services.generador import TASA_IVA
+
+_ADAPTADOR_LINEA = TypeAdapter(LineaFactura)
+_ADAPTADOR_LINEAS = TypeAdapter(list[LineaFactura])
+
+# Marca que separa el encabezado serializado del detalle
+_DETALLE = b'"detalle":['
+
+
+class TotalesIncrementales:
+    """Subtotal, IVA y total acumulados linea a linea (mismo calculo que ``generar_factura_interna``)"""
+
+    __slots__ = ("lineas", "subtotal")
+
+    def __init__(self):
+        self.lineas = 0
+        self.subtotal = 0.0
+
+    def agregar(self, linea: LineaFactura) -> None:
+        self.lineas += 1
+        self.subtotal += linea.subtotal
+
+    @property
+    def impuesto(self) -> float:
+        return round(self.subtotal * TASA_IVA, 2)  # IVA del 19%
+
+    @property
+    def total(self) -> float:
+        return self.subtotal + self.impuesto
+
+
+def _fragmentos(lineas: Iterable[LineaFactura], por_fragmento: int, totales: TotalesIncrementales) -> Iterator[list]:
+    """Agrupa las lineas en listas de ``por_fragmento`` acumulando los totales"""
+    lineas = iter(lineas)
+    while fragmento := list(islice(lineas, por_fragmento)):
+        for linea in fragmento:
+            totales.agregar(linea)
+        yield fragmento
+
+
+def _prefijo(encabezado: FacturaInterna) -> bytes:
+    """JSON del encabezado hasta el inicio del detalle, con el mismo formato que ``a_json``"""
+    prefijo, marca, _ = encabezado.a_json().partition(_DETALLE)
+    return prefijo + marca
+
+
+def json_factura_grande(
+    encabezado: FacturaInterna,
+    lineas: Iterable[LineaFactura],
+    por_fragmento: int = 1000
+) -> Iterator[bytes]:
+    """
+    Serializa una factura como un unico documento JSON emitido por fragmentos
+
+    En el esquema ``Factura`` el detalle va antes de los totales, asi que las
+    lineas se emiten a medida que se generan y los totales acumulados se
+    escriben al final; la memoria no depende del numero de lineas.
+    """
+    totales = TotalesIncrementales()
+    yield _prefijo(encabezado)
+    separador = b""
+    for fragmento in _fragmentos(lineas, por_fragmento, totales):
+        yield separador + _ADAPTADOR_LINEAS.dump_json(fragmento)[1:-1]
+        separador = b","
+    yield (
+        b'],"subtotal":' + to_json(totales.subtotal)
+        + b',"impuesto":' + to_json(totales.impuesto)
+        + b',"total":' + to_json(totales.total) + b"}"
+    )
+
+
+def ndjson_factura_grande(
+    encabezado: FacturaInterna,
+    lineas: Iterable[LineaFactura],
+    por_fragmento: int = 1000
+) -> Iterator[bytes]:
+    """
+    Serializa una factura como NDJSON: encabezado, una linea por producto y totales
+
+    La primera linea tiene los datos de la factura sin detalle, cada linea
+    siguiente un producto y la ultima ``lineas``, ``subtotal``, ``impuesto`` y
+    ``total``.
+    """
+    totales = TotalesIncrementales()
+    yield _prefijo(encabezado)[:-len(_DETALLE)].rstrip(b",") + b"}\n"
+    for fragmento in _fragmentos(lineas, por_fragmento, totales):
+        yield b"\n".join(_ADAPTADOR_LINEA.dump_json(linea) for linea in fragmento) + b"\n"
+    yield to_json({
+        "lineas": totales.lineas,
+        "subtotal": totales.subtotal,
+        "impuesto": totales.impuesto,
+        "total": totales.total,
+    }) + b"\n"
@@ -1,14 +1,78 @@
-from faker import Faker
-from datetime import date
+from datetime import date, timedelta
+from functools import cached_property
+from typing import TYPE_CHECKING, Iterable, Iterator, Optional
+import hashlib
 import random
+import threading
 from models.factura import Empresa, Cliente, DetalleProducto, Factura
+from models.interno import ClienteInterno, EmpresaInterna, FacturaInterna, LineaFactura
+from services.catalogo import Catalogo
+
+if TYPE_CHECKING:
+    from faker import Faker
+    from services.metricas import Cronometro
+
+
+def numeros_factura(prefijo: str, inicio: int, cantidad: int) -> Iterator[str]:
+    """Genera los numeros de factura consecutivos de un lote"""
+    for n in range(inicio, inicio + cantidad):
+        yield f"{prefijo}{n:06d}"
+
+
+# Precios realistas segun categoria
+PRECIOS_CATEGORIA = {
+    "Dulces": (800, 3000),
+    "Carnes": (15000, 35000),
+    "Frutas": (2000, 8000),
+    "Bebidas": (1500, 5000),
+    "Lacteos": (3000, 12000),
+    "Granos": (2000, 8000),
+    "Aseo": (5000, 15000),
+    "Panaderia": (1000, 4000)
+}
+PRECIO_POR_DEFECTO = (1000, 10000)
+
+# Tipos de negocio de los clientes
+TIPOS_NEGOCIO = (
+    "Supermercado", "Tienda", "Minimercado", "Drogueria",
+    "Restaurante", "Cafeteria", "Panaderia"
+)
+
+# IVA aplicado a todas las facturas
+TASA_IVA = 0.19
+
+# Las facturas deterministas toman su fecha de este rango para ser estables en el tiempo
+FECHA_BASE_DETERMINISTA = date(2025, 1, 1)
+DIAS_FECHA_DETERMINISTA = 365
+
+
+def crear_faker() -> "Faker":
+    """Crea un Faker en español; faker y su locale se importan en la primera llamada"""
+    from faker import Faker
+    return Faker('es_ES')
+
+
+def semilla_factura(numero_factura: str, semilla: int) -> int:
+    """Deriva una semilla estable (independiente del proceso) para una factura"""
+    digest = hashlib.blake2b(f"{semilla}:{numero_factura}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
 
 
 class GeneradorFacturas:
-    """Clase para generar facturas con datos sinteticos en español"""
+    """
+    Clase para generar facturas con datos sinteticos en español
+    
+    Con ``semilla`` el generador funciona en modo determinista: cada factura se
+    deriva de un hash estable de su numero y la semilla, de modo que el mismo
+    numero produce siempre la misma factura. Con ``catalogo`` los productos,
+    sus precios y sus pesos salen de ese catalogo en lugar del integrado.
+    """
     
-    def __init__(self):
-        self.fake = Faker('es_ES')
+    def __init__(self, semilla: Optional[int] = None, catalogo: Optional[Catalogo] = None):
+        self.semilla = semilla
+        
+        # Instancias de Faker por hilo para el modo determinista
+        self._local = threading.local()
         
         # Productos colombianos variados por categoria
         self.productos = {
@@ -50,6 +114,13 @@ class GeneradorFacturas:
             ]
         }
         
+        # Catalogo precompilado: con pesos iguales reproduce el muestreo uniforme
+        if catalogo is None:
+            catalogo = Catalogo.desde_diccionario(self.productos, PRECIOS_CATEGORIA, PRECIO_POR_DEFECTO)
+        else:
+            self.productos = catalogo.como_diccionario()
+        self.catalogo = catalogo
+        
         # Empresas colombianas tipicas
         self.empresas = [
             "Distribuidora La Esperanza S.A.S",
@@ -67,79 +138,168 @@ class GeneradorFacturas:
             "Bucaramanga", "Pereira", "Manizales", "Ibague", "Cucuta"
         ]
     
-    def generar_empresa(self) -> Empresa:
+    def empresa_interna(self, fake: Optional["Faker"] = None) -> EmpresaInterna:
         """Genera datos de una empresa colombiana"""
-        ciudad = random.choice(self.ciudades)
-        return Empresa(
-            nombre=random.choice(self.empresas),
-            direccion=f"{self.fake.street_name()} #{random.randint(10, 99)}-{random.randint(10, 99)}, {ciudad}",
-            telefono=f"+57 {random.randint(300, 321)} {random.randint(100, 999)} {random.randint(1000, 9999)}",
-            email=self.fake.email()
+        fake, rng = self._fuentes(fake)
+        ciudad = rng.choice(self.ciudades)
+        return EmpresaInterna(
+            nombre=rng.choice(self.empresas),
+            direccion=f"{fake.street_name()} #{rng.randint(10, 99)}-{rng.randint(10, 99)}, {ciudad}",
+            telefono=f"+57 {rng.randint(300, 321)} {rng.randint(100, 999)} {rng.randint(1000, 9999)}",
+            email=fake.email()
         )
     
-    def generar_cliente(self) -> Cliente:
+    def cliente_interno(self, fake: Optional["Faker"] = None) -> ClienteInterno:
         """Genera datos de un cliente colombiano"""
-        ciudad = random.choice(self.ciudades)
-        tipo_negocio = random.choice([
-            "Supermercado", "Tienda", "Minimercado", "Drogueria",
-            "Restaurante", "Cafeteria", "Panaderia"
-        ])
-        nombre_negocio = f"{tipo_negocio} {self.fake.last_name()}"
-        
-        return Cliente(
+        fake, rng = self._fuentes(fake)
+        ciudad = rng.choice(self.ciudades)
+        tipo_negocio = rng.choice(TIPOS_NEGOCIO)
+        nombre_negocio = f"{tipo_negocio} {fake.last_name()}"
+        
+        return ClienteInterno(
             nombre=nombre_negocio,
-            direccion=f"{self.fake.street_name()} #{random.randint(10, 99)}-{random.randint(10, 99)}, {ciudad}",
-            telefono=f"+57 {random.randint(300, 321)} {random.randint(100, 999)} {random.randint(1000, 9999)}"
+            direccion=f"{fake.street_name()} #{rng.randint(10, 99)}-{rng.randint(10, 99)}, {ciudad}",
+            telefono=f"+57 {rng.randint(300, 321)} {rng.randint(100, 999)} {rng.randint(1000, 9999)}"
         )
     
-    def generar_productos(self, cantidad: int = None) -> list[DetalleProducto]:
-        """Genera una lista de productos aleatorios"""
+    def lineas_factura(self, cantidad: int = None, fake: Optional["Faker"] = None) -> tuple[LineaFactura, ...]:
+        """Genera las lineas de productos aleatorios con su subtotal"""
+        _, rng = self._fuentes(fake)
         if cantidad is None:
-            cantidad = random.randint(3, 8)
+            cantidad = rng.randint(3, 8)
         
-        productos = []
-        categorias_usadas = random.sample(list(self.productos.keys()), min(cantidad, len(self.productos)))
+        # Con pesos iguales se consume el azar como random.sample y random.choice,
+        # asi que las facturas deterministas no cambian respecto al muestreo uniforme
+        catalogo = self.catalogo
+        if catalogo.categorias_uniformes:
+            categorias_usadas = rng.sample(range(len(catalogo.categorias)), min(cantidad, len(catalogo.categorias)))
+        else:
+            categorias_usadas = list(catalogo.muestrear_categorias(rng.random, cantidad))
         
-        for categoria in categorias_usadas:
-            producto_nombre = random.choice(self.productos[categoria])
-            
-            # Precios realistas segun categoria
-            precios = {
-                "Dulces": (800, 3000),
-                "Carnes": (15000, 35000),
-                "Frutas": (2000, 8000),
-                "Bebidas": (1500, 5000),
-                "Lacteos": (3000, 12000),
-                "Granos": (2000, 8000),
-                "Aseo": (5000, 15000),
-                "Panaderia": (1000, 4000)
-            }
-            
-            precio_min, precio_max = precios.get(categoria, (1000, 10000))
+        productos = []
+        for c in categorias_usadas:
+            if catalogo.productos_uniformes[c]:
+                i = catalogo.inicio[c] + rng.randrange(catalogo.conteo[c])
+            else:
+                i = catalogo.producto(c, rng.random)
+            cantidad_producto = rng.randint(1, 20)
+            precio_unitario = float(rng.randint(catalogo.precio_min[i], catalogo.precio_max[i]))
             
-            productos.append(DetalleProducto(
-                producto=producto_nombre,
-                categoria=categoria,
-                cantidad=random.randint(1, 20),
-                precio_unitario=random.randint(precio_min, precio_max)
+            productos.append(LineaFactura(
+                producto=catalogo.productos[i],
+                categoria=catalogo.categorias[c],
+                cantidad=cantidad_producto,
+                precio_unitario=precio_unitario,
+                subtotal=cantidad_producto * precio_unitario
             ))
         
-        return productos
+        return tuple(productos)
+    
+    def generar_empresa(self, fake: Optional["Faker"] = None) -> Empresa:
+        """Genera datos de una empresa colombiana"""
+        return Empresa.model_validate(self.empresa_interna(fake), from_attributes=True)
+    
+    def generar_cliente(self, fake: Optional["Faker"] = None) -> Cliente:
+        """Genera datos de un cliente colombiano"""
+        return Cliente.model_validate(self.cliente_interno(fake), from_attributes=True)
     
-    def generar_factura(self, numero_factura: str) -> Factura:
-        """Genera una factura completa con datos aleatorios"""
-        empresa = self.generar_empresa()
-        cliente = self.generar_cliente()
-        productos = self.generar_productos()
+    def generar_productos(self, cantidad: int = None, fake: Optional["Faker"] = None) -> list[DetalleProducto]:
+        """Genera una lista de productos aleatorios"""
+        return [
+            DetalleProducto.model_validate(linea, from_attributes=True)
+            for linea in self.lineas_factura(cantidad, fake)
+        ]
+    
+    @cached_property
+    def fake(self) -> "Faker":
+        """Faker compartido, creado en el primer uso para no pagarlo al importar"""
+        return crear_faker()
+    
+    def calentar(self) -> None:
+        """
+        Prepara el generador antes de recibir trafico
+        
+        Genera y serializa una factura de prueba, lo que importa faker y su
+        locale y crea las instancias que se construyen en el primer uso.
+        """
+        self.generar_factura_interna("CALENTAMIENTO").a_json()
+    
+    def _fuentes(self, fake: Optional["Faker"]):
+        """Devuelve la instancia de Faker y el generador aleatorio a utilizar
+
+        Sin una instancia explicita se usan el Faker compartido y el modulo
+        ``random``; con una instancia propia (por ejemplo sembrada) todo el
+        azar sale de su ``random`` para que la salida sea reproducible.
+        """
+        if fake is None:
+            return self.fake, random
+        return fake, fake.random
+    
+    @property
+    def determinista(self) -> bool:
+        """Indica si el generador produce siempre la misma factura para un numero"""
+        return self.semilla is not None
+    
+    def _fake_determinista(self, numero_factura: str, semilla: int) -> "Faker":
+        """
+        Devuelve el Faker del hilo actual sembrado para la factura indicada
+        
+        Cada hilo tiene su propia instancia, asi que sembrarla no interfiere con
+        las facturas que se generan de forma concurrente en otros hilos.
+        """
+        fake = getattr(self._local, "fake", None)
+        if fake is None:
+            fake = crear_faker()
+            self._local.fake = fake
+        fake.seed_instance(semilla_factura(numero_factura, semilla))
+        return fake
+    
+    def generar_factura_interna(
+        self,
+        numero_factura: str,
+        semilla: Optional[int] = None,
+        cronometro: Optional["Cronometro"] = None
+    ) -> FacturaInterna:
+        """
+        Genera una factura completa con datos aleatorios en su forma interna
+        
+        Si se indica ``semilla`` (o el generador tiene una semilla global) la
+        factura es determinista para el numero dado, incluida la fecha de emision.
+        Con ``cronometro`` se marca el final de cada etapa de la generacion.
+        """
+        if semilla is None:
+            semilla = self.semilla
+        
+        fake = None
+        fecha_emision = date.today()
+        if semilla is not None:
+            fake = self._fake_determinista(numero_factura, semilla)
+        
+        if cronometro:
+            cronometro.marcar("semilla")
+        empresa = self.empresa_interna(fake)
+        if cronometro:
+            cronometro.marcar("empresa")
+        cliente = self.cliente_interno(fake)
+        if cronometro:
+            cronometro.marcar("cliente")
+        productos = self.lineas_factura(fake=fake)
+        if cronometro:
+            cronometro.marcar("productos")
         
         # Calcular totales
         subtotal = sum(p.subtotal for p in productos)
-        impuesto = round(subtotal * 0.19, 2)  # IVA del 19%
+        impuesto = round(subtotal * TASA_IVA, 2)  # IVA del 19%
         total = subtotal + impuesto
         
-        return Factura(
+        if fake is not None:
+            fecha_emision = FECHA_BASE_DETERMINISTA + timedelta(
+                days=fake.random.randrange(DIAS_FECHA_DETERMINISTA)
+            )
+        
+        return FacturaInterna(
             numero_factura=numero_factura,
-            fecha_emision=date.today(),
+            fecha_emision=fecha_emision,
             empresa=empresa,
             cliente=cliente,
             detalle=productos,
@@ -147,3 +307,91 @@ class GeneradorFacturas:
             impuesto=impuesto,
             total=total
         )
+    
+    def iterar_lineas(self, cantidad: int, rng: Optional[random.Random] = None) -> Iterator[LineaFactura]:
+        """
+        Genera perezosamente ``cantidad`` lineas de producto para facturas grandes
+
+        A diferencia de ``lineas_factura`` las categorias pueden repetirse, asi
+        que no hay limite de lineas; cada linea se produce al pedirla.
+        """
+        r = (rng or random.Random()).random
+        catalogo = self.catalogo
+        for _ in range(cantidad):
+            c = catalogo.categoria(r)
+            unidades = 1 + int(r() * 20)
+            azar_precio = r()
+            i = catalogo.producto(c, r)
+            precio = float(catalogo.precio_min[i] + int(azar_precio * catalogo.rango_precio[i]))
+            yield LineaFactura(catalogo.productos[i], catalogo.categorias[c], unidades, precio, unidades * precio)
+    
+    def factura_grande(
+        self,
+        numero_factura: str,
+        lineas: int,
+        semilla: Optional[int] = None
+    ) -> tuple[FacturaInterna, Iterator[LineaFactura]]:
+        """
+        Encabezado de una factura grande y el iterador perezoso de sus lineas
+        
+        El encabezado es una ``FacturaInterna`` sin detalle ni totales; los
+        totales se calculan al recorrer las lineas. Las lineas usan su propio
+        generador aleatorio (derivado de la semilla en modo determinista), de
+        modo que pueden consumirse desde cualquier hilo.
+        """
+        if semilla is None:
+            semilla = self.semilla
+        fake = self._fake_determinista(numero_factura, semilla) if semilla is not None else None
+        empresa = self.empresa_interna(fake)
+        cliente = self.cliente_interno(fake)
+        if fake is not None:
+            fecha_emision = FECHA_BASE_DETERMINISTA + timedelta(days=fake.random.randrange(DIAS_FECHA_DETERMINISTA))
+            rng = random.Random(fake.random.getrandbits(64))
+        else:
+            fecha_emision = date.today()
+            rng = random.Random()
+        encabezado = FacturaInterna(numero_factura, fecha_emision, empresa, cliente, (), 0.0, 0.0, 0.0)
+        return encabezado, self.iterar_lineas(lineas, rng)
+    
+    def generar_factura(
+        self,
+        numero_factura: str,
+        semilla: Optional[int] = None,
+        cronometro: Optional["Cronometro"] = None
+    ) -> Factura:
+        """Genera una factura completa como modelo ``Factura`` de la API"""
+        factura = self.generar_factura_interna(numero_factura, semilla, cronometro).a_modelo()
+        if cronometro:
+            cronometro.marcar("validacion")
+        return factura
+    
+    def generar_lote(
+        self,
+        cantidad: int,
+        prefijo: str = "FAC-",
+        inicio: int = 1,
+        semilla: Optional[int] = None
+    ) -> Iterator[Factura]:
+        """
+        Genera perezosamente un lote de facturas con numeros consecutivos
+        
+        Las facturas se producen una a una, de modo que el consumo de memoria
+        no depende del tamaño del lote. Con ``semilla`` (o la semilla global del
+        generador) cada factura es identica a la que se obtiene individualmente
+        con ``generar_factura`` para el mismo numero.
+        """
+        return self.generar_facturas(numeros_factura(prefijo, inicio, cantidad), semilla)
+    
+    def generar_facturas(self, numeros: Iterable[str], semilla: Optional[int] = None) -> Iterator[Factura]:
+        """Genera perezosamente las facturas de una secuencia de numeros"""
+        for factura in self.generar_facturas_internas(numeros, semilla):
+            yield factura.a_modelo()
+    
+    def generar_facturas_internas(
+        self,
+        numeros: Iterable[str],
+        semilla: Optional[int] = None
+    ) -> Iterator[FacturaInterna]:
+        """Como ``generar_facturas`` pero sin convertir a modelos Pydantic (para lotes)"""
+        for numero in numeros:
+            yield self.generar_factura_interna(numero, semilla)
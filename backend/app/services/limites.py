@@ -0,0 +1,142 @@
+import asyncio
+import math
+import threading
+import time
+from collections import OrderedDict
+from functools import partial
+from typing import Awaitable, Callable, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class LimiteExcedido(Exception):
+    """El cliente agoto sus fichas del limitador de tasa"""
+
+    def __init__(self, reintentar_en: int):
+        super().__init__("Limite de peticiones excedido, reintente mas tarde")
+        self.reintentar_en = reintentar_en
+
+
+class VueloUnico:
+    """
+    Agrupa las peticiones concurrentes de la misma clave en una sola ejecucion
+
+    La primera peticion de una clave lanza la funcion como tarea del bucle de
+    eventos; las que llegan mientras sigue en vuelo esperan esa misma tarea y
+    reciben su resultado (o su excepcion). La tarea se espera con
+    ``asyncio.shield``: si un cliente se desconecta, las demas peticiones no
+    pierden la generacion. Al terminar, la clave queda libre y la siguiente
+    peticion vuelve a ejecutar. Solo se usa desde el bucle de eventos, asi que
+    no necesita lock.
+    """
+
+    def __init__(self):
+        self._en_vuelo: dict[Hashable, asyncio.Future] = {}
+        self.ejecutadas = 0
+        self.coalescidas = 0
+
+    async def ejecutar(self, clave: Hashable, funcion: Callable[[], Awaitable[T]]) -> T:
+        """Devuelve el resultado de ``funcion``, compartido con las peticiones en vuelo de ``clave``"""
+        tarea = self._en_vuelo.get(clave)
+        if tarea is None:
+            tarea = asyncio.ensure_future(funcion())
+            self._en_vuelo[clave] = tarea
+            tarea.add_done_callback(partial(self._terminar, clave))
+            self.ejecutadas += 1
+        else:
+            self.coalescidas += 1
+        return await asyncio.shield(tarea)
+
+    def en_vuelo(self, clave: Hashable) -> bool:
+        """Indica si hay una ejecucion en curso de ``clave`` a la que se uniria una peticion"""
+        return clave in self._en_vuelo
+
+    def _terminar(self, clave: Hashable, tarea: asyncio.Future) -> None:
+        if self._en_vuelo.get(clave) is tarea:
+            del self._en_vuelo[clave]
+        # Marca la excepcion como recuperada aunque todos los clientes se hayan ido
+        if not tarea.cancelled():
+            tarea.exception()
+
+    def estadisticas(self) -> dict:
+        """Devuelve las ejecuciones, las peticiones agrupadas y las claves en vuelo"""
+        return {
+            "en_vuelo": len(self._en_vuelo),
+            "ejecutadas": self.ejecutadas,
+            "coalescidas": self.coalescidas,
+        }
+
+
+class LimitadorTasa:
+    """
+    Limitador de tasa por cliente con cubetas de fichas (token bucket)
+
+    Cada cliente tiene una cubeta de ``rafaga`` fichas que se rellena a
+    ``tasa`` fichas por segundo; cada peticion admitida gasta una. Con
+    ``tasa=0`` el limitador esta desactivado. Se recuerdan como maximo
+    ``max_clientes`` cubetas (LRU): olvidar un cliente inactivo equivale a
+    devolverle la cubeta llena, que es lo que tendria tras esperar.
+    """
+
+    def __init__(
+        self,
+        tasa: float = 0,
+        rafaga: float = 20,
+        max_clientes: int = 10000,
+        reloj: Callable[[], float] = time.monotonic
+    ):
+        self.tasa = tasa
+        self.rafaga = rafaga
+        self.max_clientes = max_clientes
+        self._reloj = reloj
+        self._cubetas: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.admitidas = 0
+        self.rechazadas = 0
+
+    @property
+    def habilitado(self) -> bool:
+        return self.tasa > 0
+
+    def consumir(self, cliente: str, fichas: float = 1) -> float:
+        """Gasta ``fichas`` del cliente; devuelve 0 si se admite o los segundos hasta poder hacerlo"""
+        ahora = self._reloj()
+        with self._lock:
+            cubeta = self._cubetas.get(cliente)
+            if cubeta is None:
+                disponibles = self.rafaga
+            else:
+                disponibles, ultima = cubeta
+                disponibles = min(self.rafaga, disponibles + (ahora - ultima) * self.tasa)
+                self._cubetas.move_to_end(cliente)
+            if disponibles >= fichas:
+                disponibles -= fichas
+                espera = 0.0
+                self.admitidas += 1
+            else:
+                espera = (fichas - disponibles) / self.tasa
+                self.rechazadas += 1
+            self._cubetas[cliente] = (disponibles, ahora)
+            if len(self._cubetas) > self.max_clientes:
+                self._cubetas.popitem(last=False)
+            return espera
+
+    def comprobar(self, cliente: str) -> None:
+        """Gasta una ficha del cliente o lanza ``LimiteExcedido`` con los segundos de espera"""
+        if not self.habilitado:
+            return
+        espera = self.consumir(cliente)
+        if espera:
+            raise LimiteExcedido(max(1, math.ceil(espera)))
+
+    def estadisticas(self) -> dict:
+        """Devuelve la configuracion y los contadores del limitador"""
+        with self._lock:
+            return {
+                "habilitado": self.habilitado,
+                "tasa": self.tasa,
+                "rafaga": self.rafaga,
+                "clientes": len(self._cubetas),
+                "admitidas": self.admitidas,
+                "rechazadas": self.rechazadas,
+            }
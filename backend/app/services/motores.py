@@ -0,0 +1,25 @@
+from typing import Optional
+from services.catalogo import Catalogo
+from services.generador import GeneradorFacturas
+from services.rapido import GeneradorFacturasRapido
+
+# Motores de generacion disponibles, seleccionables por nombre
+MOTORES = {
+    "faker": GeneradorFacturas,
+    "rapido": GeneradorFacturasRapido,
+}
+
+
+def crear_generador(
+    motor: str = "faker",
+    semilla: Optional[int] = None,
+    catalogo: Optional[Catalogo] = None
+) -> GeneradorFacturas:
+    """Crea el generador de facturas del motor indicado (con el catalogo integrado si no se da otro)"""
+    try:
+        clase = MOTORES[motor]
+    except KeyError:
+        raise ValueError(
+            f"Motor de generacion desconocido: {motor} (opciones: {', '.join(MOTORES)})"
+        ) from None
+    return clase(semilla=semilla, catalogo=catalogo)
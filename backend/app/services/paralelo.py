@@ -0,0 +1,114 @@
+import multiprocessing
+import os
+import random
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice
+from typing import Iterable, Iterator, Optional
+from services.catalogo import Catalogo
+from services.generador import GeneradorFacturas, numeros_factura
+
+# Generador propio de cada proceso trabajador (con su propia instancia de Faker)
+_generador_trabajador: Optional[GeneradorFacturas] = None
+
+
+def _inicializar_trabajador(motor: str, semilla: Optional[int], catalogo: Optional[Catalogo]) -> None:
+    """Crea el generador del proceso y le da un flujo aleatorio independiente"""
+    from services.motores import crear_generador
+
+    global _generador_trabajador
+    random.seed()
+    _generador_trabajador = crear_generador(motor, semilla, catalogo)
+    _generador_trabajador.fake.seed_instance(int.from_bytes(os.urandom(8), "big"))
+
+
+def _generar_bloque(numeros: list[str], semilla: Optional[int]) -> list[bytes]:
+    """Genera y serializa un bloque de facturas en el proceso trabajador"""
+    return [
+        _generador_trabajador.generar_factura_interna(numero, semilla).a_json()
+        for numero in numeros
+    ]
+
+
+class GeneracionParalela:
+    """
+    Genera rangos de facturas repartidos en un pool de procesos
+
+    El rango se divide en bloques de ``facturas_por_bloque`` numeros que se
+    reparten entre los procesos; cada trabajador tiene su propio generador y
+    flujo aleatorio. Los resultados se devuelven en orden y como maximo hay
+    ``bloques_en_vuelo`` bloques pendientes, lo que acota la memoria. Con una
+    semilla la salida es identica a la de la generacion en un solo proceso,
+    porque cada factura solo depende de su numero y de la semilla. El
+    ``catalogo`` (si no es el integrado) se envia a cada trabajador al arrancar.
+    """
+
+    def __init__(
+        self,
+        procesos: Optional[int] = None,
+        motor: str = "faker",
+        semilla: Optional[int] = None,
+        catalogo: Optional[Catalogo] = None,
+        facturas_por_bloque: int = 256,
+        bloques_en_vuelo: Optional[int] = None
+    ):
+        self.procesos = procesos or os.cpu_count() or 1
+        self.motor = motor
+        self.semilla = semilla
+        self.catalogo = catalogo
+        self.facturas_por_bloque = facturas_por_bloque
+        self.bloques_en_vuelo = bloques_en_vuelo or 2 * self.procesos
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _obtener_executor(self) -> ProcessPoolExecutor:
+        """Arranca el pool en el primer uso; los trabajadores se reutilizan entre lotes"""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.procesos,
+                    # spawn evita heredar locks de los hilos del servidor al hacer fork
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_inicializar_trabajador,
+                    initargs=(self.motor, self.semilla, self.catalogo),
+                )
+            return self._executor
+
+    def generar(
+        self,
+        cantidad: int,
+        prefijo: str = "FAC-",
+        inicio: int = 1,
+        semilla: Optional[int] = None
+    ) -> Iterator[bytes]:
+        """Devuelve en orden las facturas serializadas del rango solicitado"""
+        return self.generar_numeros(numeros_factura(prefijo, inicio, cantidad), semilla)
+
+    def generar_numeros(self, numeros: Iterable[str], semilla: Optional[int] = None) -> Iterator[bytes]:
+        """Devuelve en orden las facturas serializadas de una secuencia de numeros"""
+        executor = self._obtener_executor()
+        numeros = iter(numeros)
+        pendientes: deque[Future] = deque()
+        agotados = False
+        try:
+            while True:
+                while not agotados and len(pendientes) < self.bloques_en_vuelo:
+                    bloque = list(islice(numeros, self.facturas_por_bloque))
+                    if not bloque:
+                        agotados = True
+                        break
+                    pendientes.append(executor.submit(_generar_bloque, bloque, semilla))
+                if not pendientes:
+                    return
+                yield from pendientes.popleft().result()
+        finally:
+            for futuro in pendientes:
+                futuro.cancel()
+
+    def cerrar(self) -> None:
+        """Detiene los procesos trabajadores"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(cancel_futures=True)
+                self._executor = None
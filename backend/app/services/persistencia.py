@@ -0,0 +1,353 @@
+import base64
+import json
+import logging
+import sqlite3
+import threading
+from datetime import date
+from pathlib import Path
+from typing import Optional, Sequence
+from models.interno import FacturaInterna
+
+logger = logging.getLogger(__name__)
+
+# Segundos maximos entre reintentos del escritor tras un error de SQLite
+ESPERA_MAXIMA_REINTENTO = 5.0
+
+# Volcados fallidos seguidos tras los que ``cerrar`` deja de reintentar
+REINTENTOS_AL_CERRAR = 3
+
+# Numeros por consulta en ``obtener_varios`` (por debajo del limite de parametros de SQLite)
+NUMEROS_POR_CONSULTA = 500
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS facturas (
+    numero_factura TEXT PRIMARY KEY,
+    cliente TEXT NOT NULL,
+    ciudad TEXT NOT NULL,
+    empresa TEXT NOT NULL,
+    fecha_emision TEXT NOT NULL,
+    subtotal REAL NOT NULL,
+    impuesto REAL NOT NULL,
+    total REAL NOT NULL,
+    contenido BLOB NOT NULL
+);
+-- Los listados se ordenan por (fecha_emision, numero_factura): cada indice
+-- termina en esas columnas para filtrar y paginar sin ordenar en memoria
+CREATE INDEX IF NOT EXISTS idx_facturas_fecha ON facturas (fecha_emision, numero_factura);
+CREATE INDEX IF NOT EXISTS idx_facturas_cliente ON facturas (cliente, fecha_emision, numero_factura);
+CREATE INDEX IF NOT EXISTS idx_facturas_ciudad ON facturas (ciudad, fecha_emision, numero_factura);
+"""
+
+
+def ciudad_de(direccion: str) -> str:
+    """Ciudad de una direccion generada (``calle #NN-NN, Ciudad``)"""
+    return direccion.rpartition(", ")[2]
+
+
+def codificar_cursor(fecha_emision: str, numero_factura: str) -> str:
+    return base64.urlsafe_b64encode(json.dumps([fecha_emision, numero_factura]).encode()).decode()
+
+
+def decodificar_cursor(cursor: str) -> tuple[str, str]:
+    """Devuelve la clave (fecha, numero) del cursor o lanza ``ValueError`` si no es valido"""
+    try:
+        fecha_emision, numero_factura = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except Exception as e:
+        raise ValueError("Cursor de paginacion invalido") from e
+    if not isinstance(fecha_emision, str) or not isinstance(numero_factura, str):
+        raise ValueError("Cursor de paginacion invalido")
+    return fecha_emision, numero_factura
+
+
+class AlmacenSaturado(Exception):
+    """Hay demasiadas facturas pendientes de escribir en el almacen"""
+
+    def __init__(self, reintentar_en: int):
+        super().__init__("Almacen de facturas saturado, reintente mas tarde")
+        self.reintentar_en = reintentar_en
+
+
+class AlmacenFacturas:
+    """
+    Almacen SQLite de facturas emitidas, con escrituras agrupadas
+
+    ``guardar`` no escribe en la base de datos: deja la factura en un
+    diccionario de pendientes que un hilo escritor vuelca cada ``intervalo``
+    segundos (o al reunir ``lote`` facturas) en una sola transaccion. Una
+    factura solo sale de pendientes despues del ``commit``, de modo que
+    siempre es visible en uno de los dos sitios y cada numero conserva la
+    primera factura guardada. Los listados leen solo la base de datos, asi que
+    pueden tardar hasta ``intervalo`` en mostrar una factura nueva.
+
+    Si SQLite falla, el escritor registra el error, reabre la conexion y
+    reintenta con esperas crecientes sin perder las pendientes; si el hilo
+    termina por otro error, el siguiente ``guardar`` lo vuelve a arrancar.
+    Como mucho se acumulan ``max_pendientes`` facturas: por encima
+    ``guardar`` lanza ``AlmacenSaturado`` en lugar de crecer sin limite.
+    """
+
+    def __init__(
+        self,
+        ruta: Path,
+        lote: int = 500,
+        intervalo: float = 0.05,
+        max_pendientes: int = 50_000,
+        reintentar_en: int = 1
+    ):
+        self.ruta = Path(ruta)
+        self.lote = lote
+        self.intervalo = intervalo
+        self.max_pendientes = max_pendientes
+        self.reintentar_en = reintentar_en
+        self._pendientes: dict[str, tuple] = {}
+        self._lock = threading.Lock()
+        self._despertar = threading.Event()
+        self._parar = threading.Event()
+        self._escritor: Optional[threading.Thread] = None
+        self._local = threading.local()
+        self.escritas = 0
+        self.transacciones = 0
+        self.errores = 0
+        self.rechazadas = 0
+
+        self.ruta.parent.mkdir(parents=True, exist_ok=True)
+        conexion = sqlite3.connect(self.ruta)
+        try:
+            # WAL: las lecturas no esperan a la transaccion del escritor
+            conexion.execute("PRAGMA journal_mode=WAL")
+            conexion.executescript(_ESQUEMA)
+        finally:
+            conexion.close()
+
+    def _conexion(self) -> sqlite3.Connection:
+        """Conexion de lectura propia de cada hilo"""
+        conexion = getattr(self._local, "conexion", None)
+        if conexion is None:
+            conexion = self._local.conexion = sqlite3.connect(self.ruta)
+        return conexion
+
+    def _leer(self, numero_factura: str) -> Optional[bytes]:
+        fila = self._conexion().execute(
+            "SELECT contenido FROM facturas WHERE numero_factura = ?", (numero_factura,)
+        ).fetchone()
+        return fila[0] if fila else None
+
+    def obtener(self, numero_factura: str) -> Optional[bytes]:
+        """Devuelve el JSON guardado de la factura o None si no existe"""
+        pendiente = self._pendientes.get(numero_factura)
+        if pendiente is not None:
+            return pendiente[-1]
+        return self._leer(numero_factura)
+
+    def obtener_varios(self, numeros: Sequence[str]) -> dict[str, bytes]:
+        """Devuelve el JSON guardado de cada numero que existe, con una consulta por grupo"""
+        encontradas = {}
+        faltan = []
+        for numero in numeros:
+            pendiente = self._pendientes.get(numero)
+            if pendiente is not None:
+                encontradas[numero] = pendiente[-1]
+            else:
+                faltan.append(numero)
+        for i in range(0, len(faltan), NUMEROS_POR_CONSULTA):
+            grupo = faltan[i:i + NUMEROS_POR_CONSULTA]
+            encontradas.update(self._conexion().execute(
+                "SELECT numero_factura, contenido FROM facturas"
+                f" WHERE numero_factura IN ({', '.join('?' * len(grupo))})",
+                grupo
+            ).fetchall())
+        return encontradas
+
+    def guardar(self, factura: FacturaInterna, contenido: bytes) -> bytes:
+        """
+        Guarda la factura serializada si su numero no existia
+
+        Devuelve el contenido que queda asociado al numero: el recibido o el
+        de una factura guardada antes con el mismo numero.
+        """
+        numero = factura.numero_factura
+        with self._lock:
+            existente = self.obtener(numero)
+            if existente is not None:
+                return existente
+            if len(self._pendientes) >= self.max_pendientes:
+                self.rechazadas += 1
+                self._despertar.set()
+                raise AlmacenSaturado(self.reintentar_en)
+            self._pendientes[numero] = (
+                numero,
+                factura.cliente.nombre,
+                ciudad_de(factura.cliente.direccion),
+                factura.empresa.nombre,
+                factura.fecha_emision.isoformat(),
+                factura.subtotal,
+                factura.impuesto,
+                factura.total,
+                contenido,
+            )
+            if self._escritor is None:
+                self._escritor = threading.Thread(target=self._escribir, name="almacen-facturas", daemon=True)
+                self._escritor.start()
+            if len(self._pendientes) >= self.lote:
+                self._despertar.set()
+        return contenido
+
+    def _escribir(self) -> None:
+        conexion = None
+        fallos = 0
+        try:
+            while True:
+                self._despertar.wait(self.intervalo)
+                self._despertar.clear()
+                try:
+                    if conexion is None:
+                        conexion = sqlite3.connect(self.ruta)
+                        conexion.execute("PRAGMA synchronous=NORMAL")
+                    self._volcar(conexion)
+                except sqlite3.Error:
+                    fallos += 1
+                    self.errores += 1
+                    logger.exception(
+                        "Error al escribir %d facturas pendientes en %s (intento %d)",
+                        len(self._pendientes), self.ruta, fallos
+                    )
+                    if conexion is not None:
+                        conexion.close()
+                        conexion = None
+                    if self._parar.is_set() and fallos >= REINTENTOS_AL_CERRAR:
+                        return
+                    self._parar.wait(min(self.intervalo * 2 ** fallos, ESPERA_MAXIMA_REINTENTO))
+                    continue
+                fallos = 0
+                if self._parar.is_set() and not self._pendientes:
+                    return
+        finally:
+            if conexion is not None:
+                conexion.close()
+            # Si el hilo muere por un error inesperado, el siguiente guardar arranca otro
+            with self._lock:
+                if self._escritor is threading.current_thread():
+                    self._escritor = None
+
+    def _volcar(self, conexion: sqlite3.Connection) -> None:
+        while True:
+            with self._lock:
+                filas = list(self._pendientes.values())[:self.lote]
+            if not filas:
+                return
+            with conexion:
+                conexion.executemany("INSERT OR IGNORE INTO facturas VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", filas)
+            with self._lock:
+                for fila in filas:
+                    self._pendientes.pop(fila[0], None)
+            self.escritas += len(filas)
+            self.transacciones += 1
+
+    def listar(
+        self,
+        cliente: Optional[str] = None,
+        ciudad: Optional[str] = None,
+        desde: Optional[date] = None,
+        hasta: Optional[date] = None,
+        limite: int = 50,
+        despues: Optional[str] = None
+    ) -> tuple[list[bytes], Optional[str]]:
+        """
+        Facturas guardadas que cumplen los filtros, ordenadas por fecha y numero
+
+        La paginacion es por clave (keyset): ``despues`` es el cursor devuelto
+        por la pagina anterior y cada pagina cuesta lo mismo sin importar su
+        posicion. Devuelve los JSON de la pagina y el cursor de la siguiente.
+        """
+        condiciones, parametros = [], []
+        if cliente is not None:
+            condiciones.append("cliente = ?")
+            parametros.append(cliente)
+        if ciudad is not None:
+            condiciones.append("ciudad = ?")
+            parametros.append(ciudad)
+        if desde is not None:
+            condiciones.append("fecha_emision >= ?")
+            parametros.append(desde.isoformat())
+        if hasta is not None:
+            condiciones.append("fecha_emision <= ?")
+            parametros.append(hasta.isoformat())
+        if despues is not None:
+            condiciones.append("(fecha_emision, numero_factura) > (?, ?)")
+            parametros.extend(decodificar_cursor(despues))
+
+        consulta = "SELECT fecha_emision, numero_factura, contenido FROM facturas"
+        if condiciones:
+            consulta += " WHERE " + " AND ".join(condiciones)
+        consulta += " ORDER BY fecha_emision, numero_factura LIMIT ?"
+        filas = self._conexion().execute(consulta, (*parametros, limite + 1)).fetchall()
+
+        siguiente = None
+        if len(filas) > limite:
+            filas = filas[:limite]
+            siguiente = codificar_cursor(filas[-1][0], filas[-1][1])
+        return [fila[2] for fila in filas], siguiente
+
+    def columnas_agregacion(
+        self,
+        agrupar_por: str,
+        desde: Optional[date] = None,
+        hasta: Optional[date] = None
+    ) -> tuple[list, list, Optional[list]]:
+        """
+        Claves de grupo e importes de las facturas guardadas, como columnas
+
+        Para ``categoria`` se devuelve una fila por linea: SQLite recorre el
+        detalle de cada JSON guardado (``json_each``) y el impuesto, que se
+        calcula sobre la factura, se devuelve como ``None``.
+        """
+        condiciones, parametros = [], []
+        if desde is not None:
+            condiciones.append("fecha_emision >= ?")
+            parametros.append(desde.isoformat())
+        if hasta is not None:
+            condiciones.append("fecha_emision <= ?")
+            parametros.append(hasta.isoformat())
+        filtro = (" WHERE " + " AND ".join(condiciones)) if condiciones else ""
+
+        if agrupar_por == "categoria":
+            consulta = (
+                "SELECT json_extract(l.value, '$.categoria'),"
+                " json_extract(l.value, '$.cantidad') * json_extract(l.value, '$.precio_unitario')"
+                " FROM facturas, json_each(CAST(facturas.contenido AS TEXT), '$.detalle') AS l" + filtro
+            )
+        else:
+            clave = {
+                "ciudad": "ciudad",
+                "empresa": "empresa",
+                "fecha": "fecha_emision",
+                "mes": "substr(fecha_emision, 1, 7)",
+            }[agrupar_por]
+            consulta = f"SELECT {clave}, subtotal, impuesto FROM facturas" + filtro
+        filas = self._conexion().execute(consulta, parametros).fetchall()
+        columnas = list(zip(*filas, strict=True)) if filas else [(), (), ()]
+        impuesto = None if agrupar_por == "categoria" else list(columnas[2])
+        return list(columnas[0]), list(columnas[1]), impuesto
+
+    def estadisticas(self) -> dict:
+        """Devuelve los contadores del almacen"""
+        return {
+            "ruta": str(self.ruta),
+            "pendientes": len(self._pendientes),
+            "escritas": self.escritas,
+            "transacciones": self.transacciones,
+            "errores": self.errores,
+            "rechazadas": self.rechazadas,
+        }
+
+    def cerrar(self) -> None:
+        """Vuelca las facturas pendientes y detiene el hilo escritor"""
+        with self._lock:
+            escritor = self._escritor
+            self._escritor = None
+        if escritor is None:
+            return
+        self._parar.set()
+        self._despertar.set()
+        escritor.join()
+        self._parar.clear()
@@ -0,0 +1,182 @@
+from datetime import date, timedelta
+from functools import cached_property
+from typing import TYPE_CHECKING, Callable, Optional
+import random
+import threading
+from models.interno import ClienteInterno, EmpresaInterna, FacturaInterna, LineaFactura
+from services.catalogo import Catalogo
+from services.generador import (
+    DIAS_FECHA_DETERMINISTA,
+    FECHA_BASE_DETERMINISTA,
+    TASA_IVA,
+    TIPOS_NEGOCIO,
+    GeneradorFacturas,
+    crear_faker,
+    semilla_factura,
+)
+
+if TYPE_CHECKING:
+    from faker import Faker
+    from services.metricas import Cronometro
+
+# Numero de valores que se precalculan con Faker para cada pool
+TAMANO_POOL = 4096
+
+# Semilla fija de los pools: todos los procesos comparten los mismos valores
+SEMILLA_POOLS = 20250101
+
+
+def construir_pools(tamano_pool: int = TAMANO_POOL) -> tuple[tuple[str, ...], tuple[str, ...], tuple[str, ...]]:
+    """Precalcula con Faker los pools de calles, apellidos y correos"""
+    fake = crear_faker()
+    fake.seed_instance(SEMILLA_POOLS)
+    calles = tuple(fake.street_name() for _ in range(tamano_pool))
+    apellidos = tuple(fake.last_name() for _ in range(tamano_pool))
+    emails = tuple(fake.email() for _ in range(tamano_pool))
+    return calles, apellidos, emails
+
+
+class GeneradorFacturasRapido(GeneradorFacturas):
+    """
+    Generador de facturas que no invoca Faker en cada llamada
+
+    En el primer uso (o en ``calentar``) precalcula con Faker pools de nombres
+    de calles, apellidos y correos; despues cada factura se construye
+    indexando esos pools con un unico generador aleatorio. Mantiene la interfaz de ``GeneradorFacturas`` y
+    una distribucion comparable de los datos.
+    """
+
+    def __init__(
+        self,
+        semilla: Optional[int] = None,
+        catalogo: Optional[Catalogo] = None,
+        tamano_pool: int = TAMANO_POOL
+    ):
+        super().__init__(semilla, catalogo)
+        self.tamano_pool = tamano_pool
+        self._rng_local = threading.local()
+
+    @cached_property
+    def _pools(self) -> tuple[tuple[str, ...], tuple[str, ...], tuple[str, ...]]:
+        return construir_pools(self.tamano_pool)
+
+    @cached_property
+    def calles(self) -> tuple[str, ...]:
+        return self._pools[0]
+
+    @cached_property
+    def apellidos(self) -> tuple[str, ...]:
+        return self._pools[1]
+
+    @cached_property
+    def emails(self) -> tuple[str, ...]:
+        return self._pools[2]
+
+    def _rng(self, numero_factura: Optional[str] = None, semilla: Optional[int] = None) -> random.Random:
+        """Devuelve el generador aleatorio del hilo, sembrado si la factura es determinista"""
+        rng = getattr(self._rng_local, "rng", None)
+        if rng is None:
+            rng = random.Random()
+            self._rng_local.rng = rng
+        if semilla is not None:
+            rng.seed(semilla_factura(numero_factura, semilla))
+        return rng
+
+    def _direccion(self, r: Callable[[], float]) -> str:
+        calles = self.calles
+        ciudades = self.ciudades
+        return (
+            f"{calles[int(r() * len(calles))]} #{10 + int(r() * 90)}-{10 + int(r() * 90)}, "
+            f"{ciudades[int(r() * len(ciudades))]}"
+        )
+
+    @staticmethod
+    def _telefono(r: Callable[[], float]) -> str:
+        return f"+57 {300 + int(r() * 22)} {100 + int(r() * 900)} {1000 + int(r() * 9000)}"
+
+    def _empresa(self, r: Callable[[], float]) -> EmpresaInterna:
+        return EmpresaInterna(
+            self.empresas[int(r() * len(self.empresas))],
+            self._direccion(r),
+            self._telefono(r),
+            self.emails[int(r() * len(self.emails))]
+        )
+
+    def _cliente(self, r: Callable[[], float]) -> ClienteInterno:
+        tipo_negocio = TIPOS_NEGOCIO[int(r() * len(TIPOS_NEGOCIO))]
+        apellido = self.apellidos[int(r() * len(self.apellidos))]
+        return ClienteInterno(f"{tipo_negocio} {apellido}", self._direccion(r), self._telefono(r))
+
+    def _lineas(self, r: Callable[[], float], cantidad: Optional[int] = None) -> tuple[tuple[LineaFactura, ...], float]:
+        """Devuelve las lineas de producto y su subtotal acumulado"""
+        if cantidad is None:
+            cantidad = 3 + int(r() * 6)
+
+        catalogo = self.catalogo
+        detalle = []
+        subtotal = 0.0
+        for c in catalogo.muestrear_categorias(r, cantidad):
+            unidades = 1 + int(r() * 20)
+            azar_precio = r()
+            i = catalogo.producto(c, r)
+            precio = float(catalogo.precio_min[i] + int(azar_precio * catalogo.rango_precio[i]))
+            subtotal_linea = unidades * precio
+            subtotal += subtotal_linea
+            detalle.append(LineaFactura(
+                catalogo.productos[i], catalogo.categorias[c], unidades, precio, subtotal_linea
+            ))
+        return tuple(detalle), subtotal
+
+    def empresa_interna(self, fake: Optional["Faker"] = None) -> EmpresaInterna:
+        """Genera datos de una empresa colombiana a partir de los pools"""
+        rng = fake.random if fake is not None else self._rng()
+        return self._empresa(rng.random)
+
+    def cliente_interno(self, fake: Optional["Faker"] = None) -> ClienteInterno:
+        """Genera datos de un cliente colombiano a partir de los pools"""
+        rng = fake.random if fake is not None else self._rng()
+        return self._cliente(rng.random)
+
+    def lineas_factura(self, cantidad: int = None, fake: Optional["Faker"] = None) -> tuple[LineaFactura, ...]:
+        """Genera las lineas de productos aleatorios a partir del catalogo precalculado"""
+        rng = fake.random if fake is not None else self._rng()
+        detalle, _ = self._lineas(rng.random, cantidad)
+        return detalle
+
+    def generar_factura_interna(
+        self,
+        numero_factura: str,
+        semilla: Optional[int] = None,
+        cronometro: Optional["Cronometro"] = None
+    ) -> FacturaInterna:
+        """
+        Genera una factura en su forma interna, sin crear modelos Pydantic
+
+        Es la ruta rapida del motor: solo indexa los pools con un generador aleatorio.
+        """
+        if semilla is None:
+            semilla = self.semilla
+        r = self._rng(numero_factura, semilla).random
+        if cronometro:
+            cronometro.marcar("semilla")
+
+        empresa = self._empresa(r)
+        if cronometro:
+            cronometro.marcar("empresa")
+        cliente = self._cliente(r)
+        if cronometro:
+            cronometro.marcar("cliente")
+        detalle, subtotal = self._lineas(r)
+        if cronometro:
+            cronometro.marcar("productos")
+        impuesto = round(subtotal * TASA_IVA, 2)  # IVA del 19%
+
+        if semilla is not None:
+            fecha_emision = FECHA_BASE_DETERMINISTA + timedelta(days=int(r() * DIAS_FECHA_DETERMINISTA))
+        else:
+            fecha_emision = date.today()
+
+        return FacturaInterna(
+            numero_factura, fecha_emision, empresa, cliente, detalle,
+            subtotal, impuesto, subtotal + impuesto
+        )
@@ -0,0 +1,119 @@
+import logging
+import threading
+from collections import deque
+from typing import TYPE_CHECKING, Optional
+from pydantic_core import to_json
+
+if TYPE_CHECKING:
+    from services.generador import GeneradorFacturas
+
+logger = logging.getLogger(__name__)
+
+# Segundos de espera del hilo de recarga tras un error al pregenerar
+ESPERA_TRAS_ERROR = 1.0
+
+# Numero provisional con el que se pregeneran las facturas; se sustituye al servirlas
+_NUMERO_PROVISIONAL = "__NUMERO_FACTURA__"
+
+
+class ReservaFacturas:
+    """
+    Reserva circular de facturas pregeneradas y ya serializadas
+
+    Un hilo de recarga genera facturas con un numero provisional y guarda el
+    JSON partido alrededor de ese numero. ``tomar`` saca la siguiente factura
+    y compone los bytes con el numero pedido, sin generar ni serializar nada
+    en la peticion. Solo tiene sentido fuera del modo determinista: la
+    factura servida no depende del numero.
+
+    ``recarga_por_segundo`` limita el ritmo del hilo de recarga (0 sin
+    limite) para que no compita con las peticiones por el GIL. Un error al
+    pregenerar se registra y el hilo sigue recargando tras una pausa.
+    """
+
+    def __init__(self, generador: "GeneradorFacturas", tamano: int = 1024, recarga_por_segundo: float = 0):
+        self.generador = generador
+        self.tamano = tamano
+        self.recarga_por_segundo = recarga_por_segundo
+        self._facturas: deque[tuple[bytes, bytes]] = deque()
+        self._hay_hueco = threading.Event()
+        self._parar = threading.Event()
+        self._hilo: Optional[threading.Thread] = None
+        self.servidas = 0
+        self.agotada = 0
+        self.generadas = 0
+        self.errores = 0
+
+    @property
+    def habilitada(self) -> bool:
+        return self.tamano > 0
+
+    def __len__(self) -> int:
+        return len(self._facturas)
+
+    def iniciar(self) -> None:
+        """Arranca el hilo de recarga"""
+        if not self.habilitada or self._hilo is not None:
+            return
+        self._parar.clear()
+        self._hilo = threading.Thread(target=self._recargar, name="reserva-facturas", daemon=True)
+        self._hilo.start()
+
+    def detener(self) -> None:
+        """Detiene el hilo de recarga (las facturas ya generadas se conservan)"""
+        if self._hilo is None:
+            return
+        self._parar.set()
+        self._hay_hueco.set()
+        self._hilo.join()
+        self._hilo = None
+
+    def _pregenerar(self) -> tuple[bytes, bytes]:
+        contenido = self.generador.generar_factura_interna(_NUMERO_PROVISIONAL).a_json()
+        prefijo, provisional, sufijo = contenido.partition(to_json(_NUMERO_PROVISIONAL))
+        if not provisional:
+            raise ValueError("La factura serializada no contiene el numero provisional")
+        return prefijo, sufijo
+
+    def _recargar(self) -> None:
+        pausa = 1 / self.recarga_por_segundo if self.recarga_por_segundo > 0 else 0
+        while not self._parar.is_set():
+            if len(self._facturas) >= self.tamano:
+                self._hay_hueco.clear()
+                # Se vuelve a comprobar tras limpiar el evento para no perder un aviso
+                if len(self._facturas) >= self.tamano:
+                    self._hay_hueco.wait()
+                continue
+            try:
+                self._facturas.append(self._pregenerar())
+            except Exception:
+                self.errores += 1
+                logger.exception("Error al pregenerar una factura de la reserva")
+                self._parar.wait(ESPERA_TRAS_ERROR)
+                continue
+            self.generadas += 1
+            if pausa:
+                self._parar.wait(pausa)
+
+    def tomar(self, numero_factura: str) -> Optional[bytes]:
+        """Devuelve una factura pregenerada con ``numero_factura`` o None si la reserva esta vacia"""
+        try:
+            prefijo, sufijo = self._facturas.popleft()
+        except IndexError:
+            self.agotada += 1
+            return None
+        self._hay_hueco.set()
+        self.servidas += 1
+        return prefijo + to_json(numero_factura) + sufijo
+
+    def estadisticas(self) -> dict:
+        """Devuelve la configuracion y los contadores de la reserva"""
+        return {
+            "tamano": self.tamano,
+            "disponibles": len(self._facturas),
+            "recarga_por_segundo": self.recarga_por_segundo,
+            "servidas": self.servidas,
+            "agotada": self.agotada,
+            "generadas": self.generadas,
+            "errores": self.errores,
+        }
@@ -0,0 +1,93 @@
+from collections import defaultdict
+import numpy as np
+import pytest
+from services.agregacion import Agregador, agregar_columnas, agregar_lotes
+from services.columnar import GeneradorColumnar
+from services.generador import DIAS_FECHA_DETERMINISTA, GeneradorFacturas, TASA_IVA
+from services.persistencia import AlmacenFacturas, ciudad_de
+
+
+@pytest.fixture(scope="module")
+def columnar():
+    return GeneradorColumnar.desde_generador(GeneradorFacturas())
+
+
+class TestAgregacion:
+    """Tests para la agregacion vectorizada de facturas"""
+
+    def test_percentiles_por_grupo(self):
+        """Test que los percentiles de cada grupo se calculan por rango mas cercano"""
+        agregador = Agregador(["a", "b"])
+        valores = np.arange(1, 101, dtype=np.float64)
+        codigos = np.array([0, 1] * 50)
+        agregador.agregar(codigos, valores, np.zeros(100))
+        a, b = agregador.resultado()
+        assert a["filas"] == b["filas"] == 50
+        assert a["subtotal"] == float(valores[codigos == 0].sum())
+        assert a["percentiles_total"]["p50"] == 49.0
+        assert b["percentiles_total"]["p99"] == 100.0
+
+    @pytest.mark.parametrize("agrupar_por", ["ciudad", "empresa", "fecha", "mes"])
+    def test_grupos_de_facturas(self, columnar, agrupar_por):
+        """Test que los grupos de facturas suman el total de los bloques"""
+        lotes = list(columnar.generar_bloques(5_000, facturas_por_bloque=2_000, semilla=3))
+        grupos, facturas, lineas = agregar_lotes(lotes, agrupar_por, DIAS_FECHA_DETERMINISTA)
+        assert facturas == 5_000
+        assert sum(g["filas"] for g in grupos) == 5_000
+        total = sum(float(lote.total.sum()) for lote in lotes)
+        assert sum(g["total"] for g in grupos) == pytest.approx(total)
+
+    def test_grupos_por_categoria(self, columnar):
+        """Test que la categoria agrupa lineas con su propio subtotal"""
+        lotes = list(columnar.generar_bloques(2_000, semilla=4))
+        grupos, _, lineas = agregar_lotes(lotes, "categoria", DIAS_FECHA_DETERMINISTA)
+        assert sum(g["filas"] for g in grupos) == lineas
+        subtotal = sum(float(lote.subtotal_linea.sum()) for lote in lotes)
+        assert sum(g["subtotal"] for g in grupos) == pytest.approx(subtotal)
+
+    def test_columnas_del_almacen(self, tmp_path):
+        """Test que la agregacion desde el almacen coincide con recorrer las facturas"""
+        almacen = AlmacenFacturas(tmp_path / "facturas.db")
+        generador = GeneradorFacturas(semilla=11)
+        facturas = [generador.generar_factura_interna(f"FAC-AG-{i:03d}") for i in range(40)]
+        for factura in facturas:
+            almacen.guardar(factura, factura.a_json())
+        almacen.cerrar()
+
+        por_ciudad = defaultdict(float)
+        por_categoria = defaultdict(float)
+        for factura in facturas:
+            por_ciudad[ciudad_de(factura.cliente.direccion)] += factura.total
+            for linea in factura.detalle:
+                por_categoria[linea.categoria] += linea.subtotal
+
+        grupos = agregar_columnas(*almacen.columnas_agregacion("ciudad"))
+        assert {g["clave"]: g["total"] for g in grupos} == pytest.approx(dict(por_ciudad))
+        grupos = agregar_columnas(*almacen.columnas_agregacion("categoria"))
+        assert {g["clave"]: g["subtotal"] for g in grupos} == pytest.approx(dict(por_categoria))
+        assert grupos[0]["impuesto"] == pytest.approx(grupos[0]["subtotal"] * TASA_IVA, abs=1)
+
+
+class TestAgregacionAPI:
+    """Tests para el endpoint de agregados"""
+
+    def test_agregados_generados(self, client):
+        """Test que el endpoint agrupa facturas generadas de forma reproducible"""
+        solicitud = {"agrupar_por": "ciudad", "cantidad": 2_000, "semilla": 9}
+        response = client.post("/api/facturas/agregados", json=solicitud)
+        assert response.status_code == 200
+        datos = response.json()
+        assert datos["facturas"] == datos["filas"] == 2_000
+        assert {"clave", "filas", "subtotal", "impuesto", "total", "percentiles_total"} <= set(datos["grupos"][0])
+        repetida = client.post("/api/facturas/agregados", json=solicitud).json()
+        assert repetida["grupos"] == datos["grupos"]
+
+    def test_agrupacion_invalida(self, client):
+        """Test que se rechaza un campo de agrupacion desconocido"""
+        response = client.post("/api/facturas/agregados", json={"agrupar_por": "producto"})
+        assert response.status_code == 422
+
+    def test_almacen_deshabilitado(self, client):
+        """Test que agregar desde el almacen requiere FACTURAS_DB"""
+        response = client.post("/api/facturas/agregados", json={"agrupar_por": "mes", "origen": "almacen"})
+        assert response.status_code == 404
@@ -1,4 +1,5 @@
 import pytest
+import json
 from fastapi.testclient import TestClient
 
 
@@ -221,3 +222,155 @@ class TestGeneradorFacturas:
         assert factura.impuesto > 0
         assert factura.total > 0
         assert len(factura.detalle) > 0
+
+
+class TestLoteFacturas:
+    """Tests para el endpoint de generacion masiva"""
+    
+    def test_lote_ndjson(self, client):
+        """Test que el lote devuelve una factura por linea con numeros consecutivos"""
+        response = client.post("/api/facturas/lote", json={"cantidad": 150, "prefijo": "LOTE-"})
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        
+        lineas = response.text.strip().split("\n")
+        assert len(lineas) == 150
+        
+        facturas = [json.loads(linea) for linea in lineas]
+        assert facturas[0]["numero_factura"] == "LOTE-000001"
+        assert facturas[-1]["numero_factura"] == "LOTE-000150"
+        for factura in facturas:
+            assert len(factura["detalle"]) > 0
+    
+    def test_lote_con_semilla_reproducible(self, client):
+        """Test que la misma semilla produce el mismo lote"""
+        solicitud = {"cantidad": 5, "inicio": 10, "semilla": 42}
+        response1 = client.post("/api/facturas/lote", json=solicitud)
+        response2 = client.post("/api/facturas/lote", json=solicitud)
+        
+        assert response1.text == response2.text
+        assert json.loads(response1.text.split("\n")[0])["numero_factura"] == "FAC-000010"
+    
+    def test_lote_cantidad_invalida(self, client):
+        """Test que valida la cantidad solicitada"""
+        response = client.post("/api/facturas/lote", json={"cantidad": 0})
+        assert response.status_code == 422
+    
+    def test_lote_con_numeros_explicitos(self, client):
+        """Test que el lote acepta una lista explicita de numeros"""
+        numeros = ["A-1", "B-7", "A-1"]
+        response = client.post("/api/facturas/lote", json={"numeros": numeros, "semilla": 3})
+        
+        facturas = [json.loads(linea) for linea in response.text.strip().split("\n")]
+        assert [f["numero_factura"] for f in facturas] == numeros
+        assert facturas[0] == facturas[2]
+    
+    def test_lote_requiere_cantidad_o_numeros(self, client):
+        """Test que se exige exactamente una forma de definir el lote"""
+        assert client.post("/api/facturas/lote", json={}).status_code == 422
+        response = client.post("/api/facturas/lote", json={"cantidad": 2, "numeros": ["A"]})
+        assert response.status_code == 422
+
+
+class TestSerializacion:
+    """Tests de la ruta rapida de serializacion de facturas"""
+    
+    def test_bytes_identicos_a_fastapi(self, client, monkeypatch):
+        """Test que la respuesta es identica a la codificacion por defecto de FastAPI"""
+        import main
+        from fastapi.encoders import jsonable_encoder
+        from services.generador import GeneradorFacturas
+        
+        interna = GeneradorFacturas(semilla=11).generar_factura_interna("FAC-SER-001")
+        generador = GeneradorFacturas()
+        monkeypatch.setattr(generador, "generar_factura_interna", lambda numero, semilla=None, cronometro=None: interna)
+        monkeypatch.setattr(main, "generador", generador)
+        esperado = json.dumps(
+            jsonable_encoder(interna.a_modelo()),
+            ensure_ascii=False,
+            allow_nan=False,
+            separators=(",", ":")
+        ).encode()
+        
+        response = client.get("/api/factura/FAC-SER-001")
+        assert response.content == esperado
+        assert response.headers["content-type"] == "application/json"
+
+
+class TestSaturacion:
+    """Tests de la respuesta 429 cuando el ejecutor de generacion esta saturado"""
+    
+    @pytest.fixture
+    def ejecutor_lleno(self, monkeypatch):
+        import main
+        from services.ejecutor import EjecutorAcotado
+        
+        ejecutor = EjecutorAcotado(hilos=1, max_pendientes=1, reintentar_en=3)
+        ejecutor.reservar()
+        monkeypatch.setattr(main, "ejecutor", ejecutor)
+        return ejecutor
+    
+    def test_factura_saturada(self, client, ejecutor_lleno):
+        """Test que una factura rechazada responde 429 con Retry-After"""
+        response = client.get("/api/factura/FAC-001")
+        assert response.status_code == 429
+        assert response.headers["retry-after"] == "3"
+    
+    def test_lote_saturado(self, client, ejecutor_lleno):
+        """Test que un lote rechazado responde 429 antes de empezar el stream"""
+        response = client.post("/api/facturas/lote", json={"cantidad": 2})
+        assert response.status_code == 429
+        
+        ejecutor_lleno.liberar()
+        response = client.post("/api/facturas/lote", json={"cantidad": 2})
+        assert response.status_code == 200
+        assert client.get("/api/ejecutor/estadisticas").json()["rechazados"] == 1
+
+
+class TestModoDeterminista:
+    """Tests del endpoint de factura con el generador en modo determinista"""
+    
+    def test_factura_determinista_cacheable(self, client, monkeypatch):
+        """Test que en modo determinista la respuesta es estable y cacheable"""
+        import main
+        from services.cache import CacheFacturas
+        from services.generador import GeneradorFacturas
+        
+        monkeypatch.setattr(main, "generador", GeneradorFacturas(semilla=2025))
+        monkeypatch.setattr(main, "cache_facturas", CacheFacturas(max_entradas=0))
+        response1 = client.get("/api/factura/FAC-DET-001")
+        response2 = client.get("/api/factura/FAC-DET-001")
+        
+        assert response1.json() == response2.json()
+        assert "immutable" in response1.headers["cache-control"]
+    
+    def test_cache_y_etag(self, client, monkeypatch):
+        """Test que la segunda consulta sale de la cache y el ETag produce 304"""
+        import main
+        from services.cache import CacheFacturas
+        from services.generador import GeneradorFacturas
+        
+        monkeypatch.setattr(main, "generador", GeneradorFacturas(semilla=2025))
+        monkeypatch.setattr(main, "cache_facturas", CacheFacturas(max_entradas=10))
+        response1 = client.get("/api/factura/FAC-DET-002")
+        response2 = client.get("/api/factura/FAC-DET-002")
+        
+        assert response1.status_code == 200
+        assert response1.content == response2.content
+        etag = response1.headers["etag"]
+        assert response2.headers["etag"] == etag
+        
+        response3 = client.get("/api/factura/FAC-DET-002", headers={"If-None-Match": etag})
+        assert response3.status_code == 304
+        assert response3.content == b""
+        
+        estadisticas = client.get("/api/cache/estadisticas").json()
+        assert estadisticas["habilitada"] is True
+        assert estadisticas["aciertos"] == 2
+        assert estadisticas["fallos"] == 1
+    
+    def test_factura_aleatoria_sin_cache_control(self, client):
+        """Test que en modo aleatorio no se anuncia la respuesta como cacheable"""
+        response = client.get("/api/factura/FAC-ALE-001")
+        assert "cache-control" not in response.headers
+        assert "etag" not in response.headers
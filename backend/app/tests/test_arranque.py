@@ -0,0 +1,88 @@
+import subprocess
+import sys
+import threading
+from pathlib import Path
+import pytest
+from services.arranque import Calentamiento
+from services.generador import GeneradorFacturas
+from services.rapido import GeneradorFacturasRapido
+
+APP_DIR = Path(__file__).parent.parent
+
+
+class TestArranque:
+    """Tests para la carga perezosa, el calentamiento y la disponibilidad"""
+
+    def test_importar_main_no_carga_dependencias_pesadas(self):
+        """Test que importar la aplicacion no importa faker ni numpy"""
+        codigo = (
+            "import sys, main; "
+            "print(sorted(m for m in ('faker', 'numpy', 'pyarrow') if m in sys.modules))"
+        )
+        salida = subprocess.run(
+            [sys.executable, "-c", codigo], cwd=APP_DIR, capture_output=True, text=True, check=True
+        ).stdout
+        assert salida.strip() == "[]"
+
+    def test_generador_perezoso(self):
+        """Test que Faker y los pools del motor rapido se crean en el primer uso"""
+        generador = GeneradorFacturas()
+        assert "fake" not in vars(generador)
+        generador.calentar()
+        assert "fake" in vars(generador)
+
+        rapido = GeneradorFacturasRapido(tamano_pool=16)
+        assert "_pools" not in vars(rapido)
+        assert len(rapido.generar_factura("FAC-A-001").detalle) >= 1
+        assert len(rapido.calles) == 16
+
+    def test_calentamiento_sincrono(self):
+        """Test que en modo sincrono las tareas terminan dentro de iniciar"""
+        ejecutadas = []
+        calentamiento = Calentamiento([("tarea", lambda: ejecutadas.append(1))])
+        calentamiento.iniciar()
+        assert calentamiento.listo
+        assert ejecutadas == [1]
+        assert "tarea" in calentamiento.estado()["segundos"]
+
+    def test_calentamiento_en_segundo_plano(self):
+        """Test que en segundo plano el servicio no esta listo hasta terminar las tareas"""
+        continuar = threading.Event()
+        calentamiento = Calentamiento([("tarea", continuar.wait)], modo="segundo_plano")
+        calentamiento.iniciar()
+        assert not calentamiento.listo
+        continuar.set()
+        assert calentamiento.esperar(5)
+
+    def test_calentamiento_con_error(self):
+        """Test que un error en una tarea se registra y el servicio queda listo"""
+        def fallar():
+            raise RuntimeError("sin datos")
+        calentamiento = Calentamiento([("falla", fallar)])
+        calentamiento.iniciar()
+        assert calentamiento.listo
+        assert calentamiento.estado()["errores"] == {"falla": "sin datos"}
+
+    def test_modo_desconocido(self):
+        """Test que se rechaza un modo de calentamiento desconocido"""
+        with pytest.raises(ValueError):
+            Calentamiento([], modo="rapido")
+
+    def test_ready_separado_de_health(self, client, monkeypatch):
+        """Test que /ready responde 503 mientras calienta y /health siempre 200"""
+        import main
+        continuar = threading.Event()
+        calentamiento = Calentamiento([("generador", continuar.wait)], modo="segundo_plano")
+        monkeypatch.setattr(main, "calentamiento", calentamiento)
+        calentamiento.iniciar()
+
+        response = client.get("/ready")
+        assert response.status_code == 503
+        assert response.json()["status"] == "calentando"
+        assert client.get("/health").status_code == 200
+
+        continuar.set()
+        calentamiento.esperar(5)
+        response = client.get("/ready")
+        assert response.status_code == 200
+        assert response.json()["listo"] is True
@@ -0,0 +1,61 @@
+from services.cache import CacheFacturas, etag_coincide
+
+
+class TestCacheFacturas:
+    """Tests para la cache LRU de respuestas serializadas"""
+    
+    def test_acierto_y_fallo(self):
+        """Test de los contadores de aciertos y fallos"""
+        cache = CacheFacturas(max_entradas=2)
+        assert cache.obtener("A") is None
+        
+        entrada = cache.guardar("A", b'{"a":1}')
+        assert cache.obtener("A") == entrada
+        assert entrada.etag == CacheFacturas.calcular_etag(b'{"a":1}')
+        
+        estadisticas = cache.estadisticas()
+        assert estadisticas["aciertos"] == 1
+        assert estadisticas["fallos"] == 1
+        assert estadisticas["tasa_aciertos"] == 0.5
+    
+    def test_expulsion_lru(self):
+        """Test que se expulsa la entrada menos usada recientemente"""
+        cache = CacheFacturas(max_entradas=2)
+        cache.guardar("A", b"a")
+        cache.guardar("B", b"b")
+        cache.obtener("A")
+        cache.guardar("C", b"c")
+        
+        assert cache.obtener("B") is None
+        assert cache.obtener("A") is not None
+        assert cache.obtener("C") is not None
+        assert cache.estadisticas()["expulsiones"] == 1
+    
+    def test_ttl(self, monkeypatch):
+        """Test que las entradas caducan tras el TTL"""
+        import services.cache as modulo
+        
+        ahora = [100.0]
+        monkeypatch.setattr(modulo.time, "monotonic", lambda: ahora[0])
+        cache = CacheFacturas(max_entradas=5, ttl=10)
+        cache.guardar("A", b"a")
+        
+        ahora[0] = 109.0
+        assert cache.obtener("A") is not None
+        ahora[0] = 111.0
+        assert cache.obtener("A") is None
+    
+    def test_cache_deshabilitada(self):
+        """Test que una cache de tamaño cero no almacena nada"""
+        cache = CacheFacturas(max_entradas=0)
+        cache.guardar("A", b"a")
+        assert not cache.habilitada
+        assert cache.obtener("A") is None
+    
+    def test_etag_coincide(self):
+        """Test de la comparacion de la cabecera If-None-Match"""
+        assert etag_coincide('"abc"', '"abc"')
+        assert etag_coincide('W/"abc", "xyz"', '"abc"')
+        assert etag_coincide("*", '"abc"')
+        assert not etag_coincide('"xyz"', '"abc"')
+        assert not etag_coincide(None, '"abc"')
@@ -0,0 +1,246 @@
+import json
+import random
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from services.catalogo import Catalogo, tabla_alias
+from services.columnar import GeneradorColumnar
+from services.generador import PRECIO_POR_DEFECTO, GeneradorFacturas
+from services.motores import crear_generador
+
+# Catalogo de prueba: las bebidas pesan 6 veces mas que el aseo
+DATOS_CATALOGO = {
+    "categorias": [
+        {
+            "nombre": "Bebidas", "peso": 6, "precio": [1500, 5000],
+            "productos": ["Agua Cristal", {"nombre": "Coca-Cola", "peso": 3, "precio": [3000, 3200]}],
+        },
+        {"nombre": "Dulces", "peso": 3, "precio": [800, 3000], "productos": ["Bon Bon Bum", "Chocoramo"]},
+        {"nombre": "Aseo", "productos": ["Jabon Fab"]},
+    ]
+}
+
+
+def _catalogo() -> Catalogo:
+    return Catalogo.desde_datos(DATOS_CATALOGO, PRECIO_POR_DEFECTO)
+
+
+class TestTablaAlias:
+    """Tests para las tablas del metodo alias"""
+
+    def test_pesos_iguales(self):
+        """Test que con pesos iguales no hay alias y el muestreo es uniforme"""
+        assert tabla_alias([2.0, 2.0, 2.0]) == ((1.0, 1.0, 1.0), (0, 1, 2))
+
+    def test_respeta_los_pesos(self):
+        """Test que la frecuencia de cada casilla es proporcional a su peso"""
+        pesos = [1.0, 2.0, 7.0]
+        probabilidad, alias = tabla_alias(pesos)
+        rng = random.Random(1)
+        conteo = Counter()
+        for _ in range(100000):
+            x = rng.random() * len(pesos)
+            i = int(x)
+            conteo[i if x - i < probabilidad[i] else alias[i]] += 1
+
+        for i, peso in enumerate(pesos):
+            assert conteo[i] / 100000 == pytest.approx(peso / sum(pesos), abs=0.01)
+
+    def test_pesos_invalidos(self):
+        """Test que se rechazan pesos nulos o negativos"""
+        with pytest.raises(ValueError):
+            tabla_alias([1.0, 0.0])
+        with pytest.raises(ValueError):
+            tabla_alias([])
+
+
+class TestCatalogo:
+    """Tests para el catalogo precompilado de productos"""
+
+    def test_arrays_planos(self):
+        """Test de los arrays planos y los rangos de productos por categoria"""
+        catalogo = _catalogo()
+
+        assert catalogo.categorias == ("Bebidas", "Dulces", "Aseo")
+        assert catalogo.productos == ("Agua Cristal", "Coca-Cola", "Bon Bon Bum", "Chocoramo", "Jabon Fab")
+        assert catalogo.categoria_producto == (0, 0, 1, 1, 2)
+        assert catalogo.inicio == (0, 2, 4)
+        assert catalogo.conteo == (2, 2, 1)
+        assert catalogo.precio_min[1] == 3000 and catalogo.precio_max[1] == 3200
+        assert (catalogo.precio_min[4], catalogo.precio_max[4]) == PRECIO_POR_DEFECTO
+        assert not catalogo.categorias_uniformes
+        assert catalogo.productos_uniformes == (False, True, True)
+
+    def test_catalogo_por_defecto_uniforme(self):
+        """Test que el catalogo integrado tiene pesos iguales y los productos del generador"""
+        generador = GeneradorFacturas()
+
+        assert generador.catalogo.categorias_uniformes
+        assert all(generador.catalogo.productos_uniformes)
+        assert generador.catalogo.como_diccionario() == generador.productos
+
+    def test_muestreo_uniforme_como_fisher_yates(self):
+        """Test que con pesos iguales se obtiene la secuencia de un Fisher-Yates parcial"""
+        catalogo = GeneradorFacturas().catalogo
+        n = len(catalogo.categorias)
+        for semilla in range(50):
+            rng = random.Random(semilla)
+            esperadas = list(range(n))
+            for i in range(5):
+                j = i + int(rng.random() * (n - i))
+                esperadas[i], esperadas[j] = esperadas[j], esperadas[i]
+
+            assert list(catalogo.muestrear_categorias(random.Random(semilla).random, 5)) == esperadas[:5]
+
+    def test_categorias_distintas_segun_peso(self):
+        """Test que las categorias elegidas son distintas y la primera sigue los pesos"""
+        catalogo = _catalogo()
+        rng = random.Random(3)
+        primeras = Counter()
+        for _ in range(20000):
+            elegidas = list(catalogo.muestrear_categorias(rng.random, 2))
+            assert len(set(elegidas)) == 2
+            primeras[elegidas[0]] += 1
+
+        assert primeras[0] / 20000 == pytest.approx(0.6, abs=0.02)
+        assert primeras[1] / 20000 == pytest.approx(0.3, abs=0.02)
+
+    def test_pesos_concentrados(self):
+        """Test que con un peso dominante se completan igualmente todas las categorias"""
+        catalogo = Catalogo(
+            [("A", 1e9), ("B", 1.0), ("C", 1.0)],
+            [("a", 0, 1.0, 1, 2), ("b", 1, 1.0, 1, 2), ("c", 2, 1.0, 1, 2)]
+        )
+
+        assert sorted(catalogo.muestrear_categorias(random.Random(1).random, 5)) == [0, 1, 2]
+
+    def test_productos_segun_peso(self):
+        """Test que dentro de una categoria los productos siguen sus pesos"""
+        catalogo = _catalogo()
+        rng = random.Random(4)
+        conteo = Counter(catalogo.producto(0, rng.random) for _ in range(40000))
+
+        assert set(conteo) == {0, 1}
+        assert conteo[1] / 40000 == pytest.approx(0.75, abs=0.01)
+
+    def test_cargar_archivo(self, tmp_path):
+        """Test que el catalogo se carga desde un archivo JSON"""
+        ruta = tmp_path / "catalogo.json"
+        ruta.write_text(json.dumps(DATOS_CATALOGO), encoding="utf-8")
+        catalogo = Catalogo.cargar(ruta, PRECIO_POR_DEFECTO)
+
+        assert catalogo.productos == _catalogo().productos
+        assert catalogo.pesos_categoria == (6.0, 3.0, 1.0)
+
+    @pytest.mark.parametrize("datos", [
+        {},
+        {"categorias": []},
+        {"categorias": [{"nombre": "Vacia", "productos": []}]},
+        {"categorias": [{"nombre": "A", "productos": ["x"]}, {"nombre": "A", "productos": ["y"]}]},
+        {"categorias": [{"nombre": "A", "peso": -1, "productos": ["x"]}]},
+        {"categorias": [{"nombre": "A", "precio": [10, 5], "productos": ["x"]}]},
+    ])
+    def test_formato_invalido(self, datos):
+        """Test que un catalogo mal formado se rechaza con ValueError"""
+        with pytest.raises(ValueError):
+            Catalogo.desde_datos(datos, PRECIO_POR_DEFECTO)
+
+
+class TestGeneracionConCatalogo:
+    """Tests para la generacion de facturas con un catalogo propio"""
+
+    @pytest.mark.parametrize("motor", ["faker", "rapido"])
+    def test_facturas_del_catalogo(self, motor):
+        """Test que las lineas salen del catalogo con sus precios y pesos"""
+        catalogo = _catalogo()
+        generador = crear_generador(motor, catalogo=catalogo)
+        categorias = Counter()
+
+        assert generador.productos == catalogo.como_diccionario()
+        for n in range(300):
+            factura = generador.generar_factura_interna(f"FAC-{n}")
+            nombres = [linea.categoria for linea in factura.detalle]
+            assert len(factura.detalle) == 3
+            assert len(set(nombres)) == 3
+            for linea in factura.detalle:
+                i = catalogo.productos.index(linea.producto)
+                assert catalogo.categorias[catalogo.categoria_producto[i]] == linea.categoria
+                assert catalogo.precio_min[i] <= linea.precio_unitario <= catalogo.precio_max[i]
+            categorias.update(nombres[:1])
+
+        # La categoria mas pesada aparece primero con mas frecuencia
+        assert categorias.most_common(1)[0][0] == "Bebidas"
+
+    @pytest.mark.parametrize("motor", ["faker", "rapido"])
+    def test_determinista_con_catalogo(self, motor):
+        """Test que con catalogo propio la factura sigue dependiendo solo del numero"""
+        factura1 = crear_generador(motor, semilla=3, catalogo=_catalogo()).generar_factura("FAC-1")
+        factura2 = crear_generador(motor, semilla=3, catalogo=_catalogo()).generar_factura("FAC-1")
+
+        assert factura1 == factura2
+
+    def test_lineas_de_factura_grande(self):
+        """Test que las lineas de las facturas grandes siguen los pesos de las categorias"""
+        _, lineas = crear_generador("rapido", semilla=1, catalogo=_catalogo()).factura_grande("FAC-G", 20000)
+        conteo = Counter(linea.categoria for linea in lineas)
+
+        assert conteo["Bebidas"] / 20000 == pytest.approx(0.6, abs=0.02)
+        assert conteo["Aseo"] / 20000 == pytest.approx(0.1, abs=0.02)
+
+    def test_columnar_con_pesos(self):
+        """Test que el generador columnar respeta pesos, categorias distintas y precios por producto"""
+        catalogo = Catalogo(
+            [(f"C{c}", 1.0 + c) for c in range(10)],
+            [(f"P{c}-{p}", c, 1.0 + p, 100 * c, 100 * c + p) for c in range(10) for p in range(4)]
+        )
+        lote = GeneradorColumnar(catalogo).generar(5000, np.random.default_rng(5))
+
+        for i in range(100):
+            categorias = lote.categoria[lote.desplazamientos[i]:lote.desplazamientos[i + 1]]
+            assert len(np.unique(categorias)) == len(categorias)
+        assert np.array_equal(np.asarray(catalogo.categoria_producto)[lote.producto], lote.categoria)
+        assert np.all(lote.precio_unitario >= np.asarray(catalogo.precio_min)[lote.producto])
+        assert np.all(lote.precio_unitario <= np.asarray(catalogo.precio_max)[lote.producto])
+
+        # Las categorias y los productos mas pesados aparecen mas
+        por_categoria = np.bincount(lote.categoria, minlength=10)
+        assert por_categoria[9] > por_categoria[0]
+        posicion = lote.producto - np.asarray(catalogo.inicio)[lote.categoria]
+        assert np.bincount(posicion, minlength=4)[3] / len(posicion) == pytest.approx(0.4, abs=0.02)
+
+    def test_columnar_muchas_categorias(self):
+        """Test que con un catalogo grande las categorias salen de la tabla alias y respetan los pesos"""
+        catalogo = Catalogo(
+            [(f"C{c}", 4.0 if c < 10 else 1.0) for c in range(200)],
+            [(f"P{c}", c, 1.0, 100, 200) for c in range(200)]
+        )
+        lote = GeneradorColumnar(catalogo).generar(20000, np.random.default_rng(6))
+
+        for i in range(500):
+            categorias = lote.categoria[lote.desplazamientos[i]:lote.desplazamientos[i + 1]]
+            assert len(np.unique(categorias)) == len(categorias)
+        primeras = lote.categoria[lote.desplazamientos[:-1]]
+        # Las 10 primeras categorias pesan 40 de 230
+        assert np.mean(primeras < 10) == pytest.approx(40 / 230, abs=0.02)
+
+    def test_columnar_pesos_concentrados(self):
+        """Test que con un peso dominante se completan las categorias por el metodo exacto"""
+        catalogo = Catalogo(
+            [("A", 1e9)] + [(f"C{c}", 1.0) for c in range(1, 30)],
+            [(f"P{c}", c, 1.0, 1, 2) for c in range(30)]
+        )
+        lote = GeneradorColumnar(catalogo).generar(2000, np.random.default_rng(7))
+
+        for i in range(2000):
+            categorias = lote.categoria[lote.desplazamientos[i]:lote.desplazamientos[i + 1]]
+            assert len(np.unique(categorias)) == len(categorias)
+            assert 0 in categorias
+
+    def test_columnar_menos_categorias_que_lineas(self):
+        """Test que con menos categorias que lineas minimas cada factura las usa todas"""
+        catalogo = Catalogo([("A", 1.0), ("B", 2.0)], [("a", 0, 1.0, 1, 2), ("b", 1, 1.0, 1, 2)])
+        lote = GeneradorColumnar(catalogo).generar(100, np.random.default_rng(8))
+
+        assert np.all(lote.lineas_por_factura == 2)
@@ -0,0 +1,68 @@
+import numpy as np
+
+from services.columnar import GeneradorColumnar
+from services.generador import GeneradorFacturas, PRECIOS_CATEGORIA
+
+
+def _generador_columnar():
+    return GeneradorColumnar(GeneradorFacturas().productos)
+
+
+class TestGeneradorColumnar:
+    """Tests para el generador vectorizado de lineas de factura"""
+    
+    def test_estructura_del_lote(self):
+        """Test de las dimensiones y tipos de las columnas"""
+        lote = _generador_columnar().generar(1000, np.random.default_rng(1))
+        
+        assert lote.num_facturas == 1000
+        assert lote.desplazamientos[0] == 0
+        assert lote.desplazamientos[-1] == lote.num_lineas
+        assert lote.lineas_por_factura.min() >= 3
+        assert lote.lineas_por_factura.max() <= 8
+        for columna in (lote.categoria, lote.producto, lote.cantidad, lote.precio_unitario):
+            assert len(columna) == lote.num_lineas
+    
+    def test_categorias_distintas_por_factura(self):
+        """Test que cada factura usa categorias distintas"""
+        lote = _generador_columnar().generar(500, np.random.default_rng(2))
+        
+        for i in range(lote.num_facturas):
+            categorias = lote.categoria[lote.desplazamientos[i]:lote.desplazamientos[i + 1]]
+            assert len(np.unique(categorias)) == len(categorias)
+    
+    def test_rangos_de_precio_y_producto(self):
+        """Test que precios, cantidades y productos respetan el catalogo"""
+        generador = GeneradorFacturas()
+        lote = GeneradorColumnar(generador.productos).generar(2000, np.random.default_rng(3))
+        
+        for c, nombre in enumerate(lote.categorias):
+            mascara = lote.categoria == c
+            precio_min, precio_max = PRECIOS_CATEGORIA[nombre]
+            assert lote.precio_unitario[mascara].min() >= precio_min
+            assert lote.precio_unitario[mascara].max() <= precio_max
+            productos = {lote.productos[p] for p in np.unique(lote.producto[mascara])}
+            assert productos <= set(generador.productos[nombre])
+        assert lote.cantidad.min() >= 1
+        assert lote.cantidad.max() <= 20
+    
+    def test_totales_con_iva(self):
+        """Test que los totales por factura aplican el IVA del 19%"""
+        lote = _generador_columnar().generar(300, np.random.default_rng(4))
+        
+        factura = lote.factura_de_linea()
+        subtotal = np.bincount(factura, weights=lote.cantidad * lote.precio_unitario)
+        np.testing.assert_array_equal(lote.subtotal, subtotal)
+        np.testing.assert_allclose(lote.impuesto, lote.subtotal * 0.19, atol=0.005)
+        np.testing.assert_allclose(lote.total, lote.subtotal + lote.impuesto)
+    
+    def test_bloques_reproducibles(self):
+        """Test que la generacion por bloques respeta el total y la semilla"""
+        generador = _generador_columnar()
+        bloques1 = list(generador.generar_bloques(250, facturas_por_bloque=100, semilla=7))
+        bloques2 = list(generador.generar_bloques(250, facturas_por_bloque=100, semilla=7))
+        
+        assert [b.num_facturas for b in bloques1] == [100, 100, 50]
+        for b1, b2 in zip(bloques1, bloques2, strict=True):
+            np.testing.assert_array_equal(b1.total, b2.total)
+            np.testing.assert_array_equal(b1.producto, b2.producto)
@@ -0,0 +1,136 @@
+import asyncio
+import pytest
+from services.ejecutor import EjecutorAcotado, EjecutorSaturado
+
+
+class TestEjecutorAcotado:
+    """Tests para el ejecutor dedicado con limite de trabajos pendientes"""
+    
+    def test_ejecutar_fuera_del_bucle(self):
+        """Test que el trabajo corre en un hilo del pool y devuelve su resultado"""
+        import threading
+        
+        ejecutor = EjecutorAcotado(hilos=2, max_pendientes=4)
+        nombre = asyncio.run(ejecutor.ejecutar(lambda: threading.current_thread().name))
+        
+        assert nombre.startswith("generacion")
+        assert ejecutor.estadisticas()["completados"] == 1
+        assert ejecutor.estadisticas()["pendientes"] == 0
+        ejecutor.cerrar()
+    
+    def test_rechaza_al_saturarse(self):
+        """Test que sin huecos libres se rechaza sin encolar"""
+        ejecutor = EjecutorAcotado(hilos=1, max_pendientes=2, reintentar_en=5)
+        ejecutor.reservar()
+        ejecutor.reservar()
+        
+        with pytest.raises(EjecutorSaturado) as error:
+            ejecutor.reservar()
+        assert error.value.reintentar_en == 5
+        assert ejecutor.estadisticas()["rechazados"] == 1
+        
+        ejecutor.liberar()
+        ejecutor.reservar()
+    
+    def test_sin_limite(self):
+        """Test que con max_pendientes=0 no se rechaza ningun trabajo"""
+        ejecutor = EjecutorAcotado(hilos=1, max_pendientes=0)
+        for _ in range(100):
+            ejecutor.reservar()
+        assert ejecutor.estadisticas()["rechazados"] == 0
+    
+    def test_iterar_libera_el_hueco(self):
+        """Test que iterar consume el iterador en orden y libera el hueco al terminar"""
+        ejecutor = EjecutorAcotado(hilos=2, max_pendientes=1)
+        
+        async def consumir():
+            ejecutor.reservar()
+            return [elemento async for elemento in ejecutor.iterar(iter(range(5)))]
+        
+        assert asyncio.run(consumir()) == [0, 1, 2, 3, 4]
+        assert ejecutor.estadisticas()["pendientes"] == 0
+        ejecutor.cerrar()
+    
+    def test_cancelar_no_libera_hasta_terminar(self):
+        """Test que cancelar la espera no libera el hueco mientras el hilo sigue trabajando"""
+        import threading
+        
+        ejecutor = EjecutorAcotado(hilos=1, max_pendientes=1)
+        seguir = threading.Event()
+        
+        async def cancelar():
+            tarea = asyncio.ensure_future(ejecutor.ejecutar(seguir.wait))
+            await asyncio.sleep(0.05)
+            tarea.cancel()
+            await asyncio.gather(tarea, return_exceptions=True)
+            with pytest.raises(EjecutorSaturado):
+                ejecutor.reservar()
+        
+        asyncio.run(cancelar())
+        seguir.set()
+        ejecutor.cerrar()
+        assert ejecutor.estadisticas()["pendientes"] == 0
+    
+    def test_cerrar_flujo_sin_iterar(self):
+        """Test que cerrar un flujo que no llego a iterarse libera el hueco una sola vez"""
+        ejecutor = EjecutorAcotado(hilos=1, max_pendientes=1)
+        ejecutor.reservar()
+        flujo = ejecutor.iterar(iter(range(5)))
+        flujo.cerrar()
+        flujo.cerrar()
+        
+        assert ejecutor.estadisticas()["pendientes"] == 0
+        assert ejecutor.estadisticas()["completados"] == 1
+
+
+def _desconectar_antes_del_stream(app, metodo: str, ruta: str, cuerpo: bytes = b"") -> None:
+    """Llama a la aplicacion ASGI con un cliente que se desconecta antes de recibir el cuerpo"""
+    ruta, _, consulta = ruta.partition("?")
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": metodo, "scheme": "http", "path": ruta, "raw_path": ruta.encode(),
+        "query_string": consulta.encode(), "root_path": "",
+        "headers": [(b"host", b"test"), (b"content-type", b"application/json")],
+        "client": ("127.0.0.1", 1234), "server": ("test", 80),
+    }
+    mensajes = [
+        {"type": "http.request", "body": cuerpo, "more_body": False},
+        {"type": "http.disconnect"},
+    ]
+    
+    async def recibir():
+        return mensajes.pop(0) if mensajes else {"type": "http.disconnect"}
+    
+    async def enviar(mensaje):
+        # El cliente ya no esta: el envio no avanza hasta que se cancela
+        await asyncio.sleep(1)
+    
+    asyncio.run(app(scope, recibir, enviar))
+
+
+class TestEjecutorAPI:
+    """Tests de los huecos del ejecutor en los endpoints en streaming"""
+    
+    def test_lote_desconectado_libera_el_hueco(self, monkeypatch):
+        """Test que los clientes que se van antes de empezar el stream no dejan huecos ocupados"""
+        import main
+        
+        monkeypatch.setattr(main, "ejecutor", EjecutorAcotado(hilos=1, max_pendientes=2))
+        for _ in range(5):
+            _desconectar_antes_del_stream(main.app, "POST", "/api/facturas/lote", b'{"cantidad": 3}')
+        
+        assert main.ejecutor.estadisticas()["pendientes"] == 0
+        assert main.ejecutor.estadisticas()["completados"] == 5
+        main.ejecutor.cerrar()
+    
+    def test_factura_grande_desconectada_libera_el_hueco(self, monkeypatch):
+        """Test que una factura grande abandonada antes del stream no deja el hueco ocupado"""
+        import main
+        
+        monkeypatch.setattr(main, "ejecutor", EjecutorAcotado(hilos=1, max_pendientes=2))
+        for _ in range(5):
+            _desconectar_antes_del_stream(main.app, "GET", "/api/factura/FAC-G/grande?lineas=50")
+        
+        assert main.ejecutor.estadisticas()["pendientes"] == 0
+        assert main.ejecutor.estadisticas()["completados"] == 5
+        main.ejecutor.cerrar()
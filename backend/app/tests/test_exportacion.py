@@ -0,0 +1,114 @@
+import csv
+
+import pytest
+
+from services.columnar import GeneradorColumnar
+from services.exportacion import exportar_facturas
+from services.generador import GeneradorFacturas
+
+
+@pytest.fixture(scope="module")
+def columnar():
+    """Generador columnar con encabezados y pools pequeños"""
+    generador = GeneradorFacturas()
+    return GeneradorColumnar(
+        generador.productos, generador.empresas, generador.ciudades, ["Gomez", "Perez", "Rojas"]
+    )
+
+
+def _leer_csv(directorio):
+    filas = []
+    for ruta in sorted(directorio.glob("part-*.csv")):
+        with open(ruta, newline="", encoding="utf-8") as archivo:
+            filas.extend(csv.DictReader(archivo))
+    return filas
+
+
+class TestExportacion:
+    """Tests para la exportacion de facturas a archivos particionados"""
+    
+    def test_exportar_csv_particionado(self, tmp_path, columnar):
+        """Test que el CSV se parte en archivos y conserva facturas y lineas"""
+        resultado = exportar_facturas(
+            tmp_path, 2500, columnar, formato="csv", prefijo="EXP-",
+            facturas_por_grupo=1000, grupos_por_archivo=2
+        )
+        
+        assert resultado["facturas"] == 2500
+        assert resultado["archivos"]["encabezados"] == [
+            "encabezados/part-00000.csv", "encabezados/part-00001.csv"
+        ]
+        
+        encabezados = _leer_csv(tmp_path / "encabezados")
+        lineas = _leer_csv(tmp_path / "lineas")
+        assert len(encabezados) == 2500
+        assert len(lineas) == resultado["lineas"]
+        assert encabezados[0]["numero_factura"] == "EXP-000001"
+        assert encabezados[-1]["numero_factura"] == "EXP-002500"
+        
+        primera = encabezados[0]
+        detalle = [linea for linea in lineas if linea["numero_factura"] == primera["numero_factura"]]
+        assert len(detalle) == int(primera["num_lineas"])
+        assert [int(linea["linea"]) for linea in detalle] == list(range(1, len(detalle) + 1))
+        assert sum(int(linea["subtotal"]) for linea in detalle) == float(primera["subtotal"])
+    
+    def test_exportar_parquet(self, tmp_path, columnar):
+        """Test que el Parquet escribe un grupo de filas por bloque"""
+        pq = pytest.importorskip("pyarrow.parquet")
+        
+        resultado = exportar_facturas(
+            tmp_path, 3000, columnar, formato="parquet", semilla=1, facturas_por_grupo=1000
+        )
+        
+        archivo = pq.ParquetFile(tmp_path / "encabezados" / "part-00000.parquet")
+        assert archivo.metadata.num_row_groups == 3
+        assert pq.read_table(tmp_path / "lineas").num_rows == resultado["lineas"]
+    
+    def test_error_al_escribir(self, tmp_path, columnar, monkeypatch):
+        """Test que si falla la escritura con la cola llena el error llega sin bloquear al productor"""
+        import threading
+        import time
+        from services import exportacion
+        
+        def fallar(self, columnas):
+            # Da tiempo al productor a llenar la cola y quedar esperando el fin
+            time.sleep(0.3)
+            raise OSError("disco lleno")
+        
+        monkeypatch.setattr(exportacion._EscritorParticiones, "escribir", fallar)
+        errores = []
+        
+        def exportar():
+            try:
+                exportar_facturas(tmp_path, 30, columnar, formato="csv", facturas_por_grupo=10)
+            except OSError as e:
+                errores.append(e)
+        
+        hilo = threading.Thread(target=exportar, daemon=True)
+        hilo.start()
+        hilo.join(timeout=5)
+        
+        assert not hilo.is_alive()
+        assert str(errores[0]) == "disco lleno"
+    
+    def test_formato_invalido(self, tmp_path, columnar):
+        """Test que se rechazan formatos desconocidos"""
+        with pytest.raises(ValueError):
+            exportar_facturas(tmp_path, 10, columnar, formato="xlsx")
+    
+    def test_endpoint_exportar(self, client, tmp_path, monkeypatch, columnar):
+        """Test del endpoint de exportacion"""
+        import main
+        
+        monkeypatch.setattr(main, "EXPORTACION_DIR", tmp_path)
+        monkeypatch.setattr(main, "generador_columnar", lambda: columnar)
+        response = client.post(
+            "/api/facturas/exportar",
+            json={"cantidad": 1500, "formato": "csv", "facturas_por_grupo": 1000}
+        )
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data["facturas"] == 1500
+        assert len(data["archivos"]["lineas"]) == 1
+        assert len(_leer_csv(tmp_path / data["destino"].split("/")[-1] / "encabezados")) == 1500
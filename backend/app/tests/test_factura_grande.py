@@ -0,0 +1,63 @@
+import json
+import pytest
+from models.factura import Factura
+from services.factura_grande import json_factura_grande, ndjson_factura_grande
+from services.generador import GeneradorFacturas, TASA_IVA
+from services.motores import crear_generador
+
+
+class TestFacturaGrande:
+    """Tests para las facturas grandes generadas y serializadas en streaming"""
+
+    @pytest.mark.parametrize("motor", ["faker", "rapido"])
+    def test_json_valido_con_totales(self, motor):
+        """Test que el JSON por fragmentos es una Factura con los totales de sus lineas"""
+        encabezado, lineas = crear_generador(motor).factura_grande("FAC-G-001", 2500)
+        contenido = b"".join(json_factura_grande(encabezado, lineas, por_fragmento=300))
+
+        factura = Factura.model_validate_json(contenido)
+        assert len(factura.detalle) == 2500
+        subtotal = sum(linea.cantidad * linea.precio_unitario for linea in factura.detalle)
+        assert factura.subtotal == subtotal
+        assert factura.impuesto == round(subtotal * TASA_IVA, 2)
+        assert factura.total == factura.subtotal + factura.impuesto
+        # Con mas lineas que productos las categorias se repiten
+        assert len({linea.categoria for linea in factura.detalle}) < 2500
+
+    def test_determinista(self):
+        """Test que con semilla la factura grande es reproducible"""
+        generador = GeneradorFacturas(semilla=7)
+        contenidos = [
+            b"".join(json_factura_grande(*generador.factura_grande("FAC-G-003", 500)))
+            for _ in range(2)
+        ]
+        assert contenidos[0] == contenidos[1]
+
+    def test_ndjson(self):
+        """Test que el NDJSON tiene encabezado, una linea por producto y totales"""
+        encabezado, lineas = GeneradorFacturas().factura_grande("FAC-G-004", 1200)
+        filas = [json.loads(f) for f in b"".join(ndjson_factura_grande(encabezado, lineas, 500)).splitlines()]
+
+        assert filas[0]["numero_factura"] == "FAC-G-004"
+        assert "detalle" not in filas[0]
+        assert len(filas) == 1202
+        assert filas[-1]["lineas"] == 1200
+        assert filas[-1]["subtotal"] == sum(f["cantidad"] * f["precio_unitario"] for f in filas[1:-1])
+
+    def test_endpoint(self, client):
+        """Test que el endpoint devuelve la factura grande en ambos formatos"""
+        response = client.get("/api/factura/FAC-G-005/grande?lineas=3000")
+        assert response.status_code == 200
+        assert len(Factura.model_validate_json(response.content).detalle) == 3000
+
+        response = client.get("/api/factura/FAC-G-005/grande?lineas=10&formato=ndjson")
+        assert response.headers["content-type"] == "application/x-ndjson"
+        assert len(response.content.splitlines()) == 12
+
+    def test_endpoint_limite_lineas(self, client):
+        """Test que se rechazan facturas con demasiadas lineas"""
+        import main
+        response = client.get(f"/api/factura/FAC-G-006/grande?lineas={main.MAX_LINEAS_FACTURA_GRANDE + 1}")
+        assert response.status_code == 422
+        # El esquema Factura exige al menos una linea
+        assert client.get("/api/factura/FAC-G-006/grande?lineas=0").status_code == 422
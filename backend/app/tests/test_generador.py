@@ -0,0 +1,148 @@
+import threading
+
+import pytest
+
+from services.generador import GeneradorFacturas, semilla_factura
+
+
+class TestGeneradorDeterminista:
+    """Tests para el modo determinista del generador"""
+    
+    def test_semilla_factura_estable(self):
+        """Test que la semilla derivada solo depende del numero y la semilla global"""
+        assert semilla_factura("FAC-001", 7) == semilla_factura("FAC-001", 7)
+        assert semilla_factura("FAC-001", 7) != semilla_factura("FAC-002", 7)
+        assert semilla_factura("FAC-001", 7) != semilla_factura("FAC-001", 8)
+    
+    def test_misma_factura_para_mismo_numero(self):
+        """Test que el mismo numero produce siempre la misma factura"""
+        generador = GeneradorFacturas(semilla=123)
+        factura1 = generador.generar_factura("FAC-2025-001")
+        generador.generar_factura("FAC-2025-002")
+        factura2 = generador.generar_factura("FAC-2025-001")
+        
+        assert generador.determinista
+        assert factura1 == factura2
+    
+    def test_independiente_de_la_instancia(self):
+        """Test que dos generadores con la misma semilla coinciden"""
+        factura1 = GeneradorFacturas(semilla=5).generar_factura("FAC-100")
+        factura2 = GeneradorFacturas(semilla=5).generar_factura("FAC-100")
+        factura3 = GeneradorFacturas(semilla=6).generar_factura("FAC-100")
+        
+        assert factura1 == factura2
+        assert factura1 != factura3
+    
+    def test_semilla_explicita_en_modo_aleatorio(self):
+        """Test que una semilla por llamada funciona aunque el generador sea aleatorio"""
+        generador = GeneradorFacturas()
+        assert not generador.determinista
+        assert generador.generar_factura("FAC-1", semilla=9) == generador.generar_factura("FAC-1", semilla=9)
+    
+    def test_lote_coincide_con_facturas_individuales(self):
+        """Test que el lote con semilla coincide con la generacion individual"""
+        generador = GeneradorFacturas(semilla=11)
+        lote = list(generador.generar_lote(3, prefijo="X-", inicio=5))
+        
+        assert [f.numero_factura for f in lote] == ["X-000005", "X-000006", "X-000007"]
+        assert lote[1] == generador.generar_factura("X-000006")
+    
+    def test_concurrencia(self):
+        """Test que la generacion concurrente sigue siendo determinista"""
+        generador = GeneradorFacturas(semilla=3)
+        esperadas = {n: generador.generar_factura(f"FAC-{n}") for n in range(20)}
+        errores = []
+        
+        def trabajador():
+            for n in range(20):
+                if generador.generar_factura(f"FAC-{n}") != esperadas[n]:
+                    errores.append(n)
+        
+        hilos = [threading.Thread(target=trabajador) for _ in range(4)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        
+        assert errores == []
+
+
+class TestGeneradorRapido:
+    """Tests para el motor rapido basado en pools precalculados"""
+    
+    def test_factura_valida(self):
+        """Test que el motor rapido produce facturas validas con totales correctos"""
+        from services.generador import PRECIOS_CATEGORIA
+        from services.rapido import GeneradorFacturasRapido
+        
+        generador = GeneradorFacturasRapido(tamano_pool=64)
+        for n in range(200):
+            factura = generador.generar_factura(f"FAC-{n}")
+            categorias = [linea.categoria for linea in factura.detalle]
+            
+            assert 3 <= len(factura.detalle) <= 8
+            assert len(set(categorias)) == len(categorias)
+            for linea in factura.detalle:
+                precio_min, precio_max = PRECIOS_CATEGORIA[linea.categoria]
+                assert precio_min <= linea.precio_unitario <= precio_max
+                assert 1 <= linea.cantidad <= 20
+                assert linea.producto in generador.productos[linea.categoria]
+            assert factura.subtotal == sum(linea.subtotal for linea in factura.detalle)
+            assert factura.impuesto == round(factura.subtotal * 0.19, 2)
+            assert factura.cliente.nombre.split(" ", 1)[1] in generador.apellidos
+    
+    def test_interfaz_compatible(self):
+        """Test que el motor rapido conserva la interfaz del generador original"""
+        from services.rapido import GeneradorFacturasRapido
+        
+        generador = GeneradorFacturasRapido(tamano_pool=16)
+        assert len(generador.generar_productos(cantidad=5)) == 5
+        assert generador.generar_empresa().email in generador.emails
+        assert len(generador.generar_cliente().nombre) > 0
+    
+    def test_determinista(self):
+        """Test que el motor rapido tambien es determinista por numero"""
+        from services.rapido import GeneradorFacturasRapido
+        
+        factura1 = GeneradorFacturasRapido(semilla=1, tamano_pool=32).generar_factura("FAC-9")
+        factura2 = GeneradorFacturasRapido(semilla=1, tamano_pool=32).generar_factura("FAC-9")
+        assert factura1 == factura2
+    
+    def test_crear_generador(self):
+        """Test de la seleccion del motor por nombre"""
+        from services.motores import crear_generador
+        from services.rapido import GeneradorFacturasRapido
+        
+        assert isinstance(crear_generador("rapido"), GeneradorFacturasRapido)
+        assert not isinstance(crear_generador("faker"), GeneradorFacturasRapido)
+        with pytest.raises(ValueError):
+            crear_generador("inexistente")
+
+
+class TestFacturaInterna:
+    """Tests para la representacion interna de las facturas"""
+    
+    @pytest.mark.parametrize("motor", ["faker", "rapido"])
+    def test_json_identico_al_modelo(self, motor):
+        """Test que la factura interna serializa igual que el modelo Factura"""
+        from services.motores import crear_generador
+        
+        generador = crear_generador(motor, semilla=5)
+        for i in range(20):
+            interna = generador.generar_factura_interna(f"FAC-{i:03d}")
+            assert interna.a_json() == interna.a_modelo().model_dump_json().encode()
+            assert generador.generar_factura(f"FAC-{i:03d}") == interna.a_modelo()
+    
+    def test_subtotales_precalculados(self):
+        """Test que cada linea trae su subtotal y la factura la suma de ellos"""
+        factura = GeneradorFacturas().generar_factura_interna("FAC-001")
+        for linea in factura.detalle:
+            assert linea.subtotal == linea.cantidad * linea.precio_unitario
+        assert factura.subtotal == sum(linea.subtotal for linea in factura.detalle)
+        assert factura.a_json().count(b'"subtotal"') == 1
+    
+    def test_sin_diccionario_por_instancia(self):
+        """Test que las clases internas usan __slots__"""
+        factura = GeneradorFacturas().generar_factura_interna("FAC-001")
+        assert not hasattr(factura, "__dict__")
+        assert not hasattr(factura.detalle[0], "__dict__")
@@ -0,0 +1,246 @@
+import asyncio
+import threading
+import time
+
+import httpx
+import pytest
+
+from services.limites import LimitadorTasa, LimiteExcedido, VueloUnico
+
+
+class Reloj:
+    """Reloj manual para el limitador"""
+
+    def __init__(self):
+        self.ahora = 100.0
+
+    def __call__(self) -> float:
+        return self.ahora
+
+
+class TestVueloUnico:
+    """Tests para la agrupacion de peticiones concurrentes de la misma clave"""
+
+    def test_agrupa_peticiones_concurrentes(self):
+        """Test que las peticiones en vuelo de una clave comparten una ejecucion"""
+        vuelo = VueloUnico()
+        llamadas = []
+
+        async def generar(clave):
+            llamadas.append(clave)
+            await asyncio.sleep(0.05)
+            return f"factura {clave}"
+
+        async def principal():
+            return await asyncio.gather(
+                *(vuelo.ejecutar("FAC-1", lambda: generar("FAC-1")) for _ in range(5)),
+                vuelo.ejecutar("FAC-2", lambda: generar("FAC-2")),
+            )
+
+        resultados = asyncio.run(principal())
+
+        assert resultados == ["factura FAC-1"] * 5 + ["factura FAC-2"]
+        assert llamadas == ["FAC-1", "FAC-2"]
+        assert vuelo.estadisticas() == {"en_vuelo": 0, "ejecutadas": 2, "coalescidas": 4}
+        assert not vuelo.en_vuelo("FAC-1")
+
+    def test_clave_libre_al_terminar(self):
+        """Test que una peticion posterior vuelve a ejecutar"""
+        vuelo = VueloUnico()
+        contador = iter(range(10))
+
+        async def generar():
+            return next(contador)
+
+        async def principal():
+            return [await vuelo.ejecutar("FAC-1", generar) for _ in range(3)]
+
+        assert asyncio.run(principal()) == [0, 1, 2]
+        assert vuelo.coalescidas == 0
+
+    def test_excepcion_compartida(self):
+        """Test que el error de la ejecucion llega a todas las peticiones agrupadas"""
+        vuelo = VueloUnico()
+
+        async def fallar():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("sin capacidad")
+
+        async def principal():
+            return await asyncio.gather(
+                *(vuelo.ejecutar("FAC-1", fallar) for _ in range(3)), return_exceptions=True
+            )
+
+        errores = asyncio.run(principal())
+
+        assert all(isinstance(e, RuntimeError) for e in errores)
+        assert vuelo.estadisticas()["en_vuelo"] == 0
+
+    def test_cancelar_una_peticion_no_cancela_las_demas(self):
+        """Test que si un cliente se va, los demas reciben el resultado"""
+        vuelo = VueloUnico()
+
+        async def generar():
+            await asyncio.sleep(0.05)
+            return "factura"
+
+        async def principal():
+            primera = asyncio.ensure_future(vuelo.ejecutar("FAC-1", generar))
+            segunda = asyncio.ensure_future(vuelo.ejecutar("FAC-1", generar))
+            await asyncio.sleep(0.01)
+            primera.cancel()
+            return await segunda, primera.cancelled()
+
+        assert asyncio.run(principal()) == ("factura", True)
+
+
+class TestLimitadorTasa:
+    """Tests para el limitador de tasa por cliente"""
+
+    def test_rafaga_y_recarga(self):
+        """Test que se admite la rafaga y despues una peticion por cada ficha recargada"""
+        reloj = Reloj()
+        limitador = LimitadorTasa(tasa=2, rafaga=3, reloj=reloj)
+
+        assert [limitador.consumir("a") for _ in range(3)] == [0, 0, 0]
+        assert limitador.consumir("a") == pytest.approx(0.5)
+
+        reloj.ahora += 0.5
+        assert limitador.consumir("a") == 0
+        assert limitador.consumir("a") > 0
+
+        # La cubeta no acumula mas fichas que la rafaga
+        reloj.ahora += 60
+        assert [limitador.consumir("a") for _ in range(4)][-1] > 0
+        assert limitador.admitidas == 7
+        assert limitador.rechazadas == 3
+
+    def test_cubetas_por_cliente(self):
+        """Test que cada cliente tiene su propia cubeta"""
+        limitador = LimitadorTasa(tasa=1, rafaga=1, reloj=Reloj())
+
+        assert limitador.consumir("a") == 0
+        assert limitador.consumir("a") > 0
+        assert limitador.consumir("b") == 0
+
+    def test_clientes_acotados(self):
+        """Test que solo se recuerdan los clientes mas recientes"""
+        limitador = LimitadorTasa(tasa=1, rafaga=1, max_clientes=2, reloj=Reloj())
+        for cliente in ("a", "b", "c"):
+            limitador.consumir(cliente)
+
+        assert limitador.estadisticas()["clientes"] == 2
+        # "a" se olvido: vuelve con la cubeta llena
+        assert limitador.consumir("a") == 0
+
+    def test_comprobar(self):
+        """Test que comprobar lanza LimiteExcedido con los segundos redondeados hacia arriba"""
+        limitador = LimitadorTasa(tasa=0.4, rafaga=1, reloj=Reloj())
+        limitador.comprobar("a")
+
+        with pytest.raises(LimiteExcedido) as error:
+            limitador.comprobar("a")
+        assert error.value.reintentar_en == 3
+
+    def test_desactivado(self):
+        """Test que con tasa 0 no se limita ni se guardan cubetas"""
+        limitador = LimitadorTasa(tasa=0, rafaga=1)
+        for _ in range(100):
+            limitador.comprobar("a")
+
+        assert limitador.estadisticas()["clientes"] == 0
+
+
+class TestLimitesAPI:
+    """Tests de la agrupacion y la limitacion en el endpoint de facturas"""
+
+    def test_peticiones_concurrentes_generan_una_vez(self, monkeypatch):
+        """Test que varias peticiones simultaneas de un numero comparten la generacion"""
+        import main
+
+        generar = main._factura_json
+        llamadas = []
+        lock = threading.Lock()
+
+        def lenta(numero_factura):
+            with lock:
+                llamadas.append(numero_factura)
+            time.sleep(0.1)
+            return generar(numero_factura)
+
+        monkeypatch.setattr(main, "_factura_json", lenta)
+        monkeypatch.setattr(main, "vuelo_unico", VueloUnico())
+
+        async def principal():
+            transporte = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transporte, base_url="http://test") as cliente:
+                return await asyncio.gather(*(cliente.get("/api/factura/FAC-VUELO-1") for _ in range(4)))
+
+        respuestas = asyncio.run(principal())
+
+        assert [r.status_code for r in respuestas] == [200] * 4
+        assert len({r.content for r in respuestas}) == 1
+        assert llamadas == ["FAC-VUELO-1"]
+        assert main.vuelo_unico.estadisticas()["coalescidas"] == 3
+
+    def test_peticiones_agrupadas_no_gastan_fichas(self, monkeypatch):
+        """Test que con rafaga=1 las peticiones simultaneas de un numero responden todas 200"""
+        import main
+        
+        generar = main._factura_json
+        
+        def lenta(numero_factura):
+            time.sleep(0.1)
+            return generar(numero_factura)
+        
+        monkeypatch.setattr(main, "_factura_json", lenta)
+        monkeypatch.setattr(main, "vuelo_unico", VueloUnico())
+        monkeypatch.setattr(main, "limitador", LimitadorTasa(tasa=0.1, rafaga=1, reloj=Reloj()))
+        
+        async def principal():
+            transporte = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transporte, base_url="http://test") as cliente:
+                return await asyncio.gather(*(cliente.get("/api/factura/FAC-VUELO-2") for _ in range(4)))
+        
+        respuestas = asyncio.run(principal())
+        
+        assert [r.status_code for r in respuestas] == [200] * 4
+        assert main.limitador.estadisticas()["admitidas"] == 1
+        assert main.limitador.estadisticas()["rechazadas"] == 0
+    
+    def test_cliente_limitado(self, client, monkeypatch):
+        """Test que un cliente que supera su tasa recibe 429 con Retry-After"""
+        import main
+
+        monkeypatch.setattr(main, "limitador", LimitadorTasa(tasa=0.5, rafaga=2, reloj=Reloj()))
+
+        assert client.get("/api/factura/FAC-1").status_code == 200
+        assert client.post("/api/facturas/lote", json={"cantidad": 1}).status_code == 200
+        response = client.get("/api/factura/FAC-2")
+        assert response.status_code == 429
+        assert response.headers["retry-after"] == "2"
+
+        estadisticas = client.get("/api/limites/estadisticas").json()
+        assert estadisticas["limitador"]["rechazadas"] == 1
+
+    def test_metricas(self, client):
+        """Test que los contadores se exponen en /metrics"""
+        contenido = client.get("/metrics").content
+
+        for metrica in (
+            b"backend_peticiones_coalescidas_total",
+            b"backend_peticiones_limitadas_total",
+            b"backend_generaciones_en_vuelo",
+        ):
+            assert metrica in contenido
+
+    def test_cliente_por_cabecera(self, client, monkeypatch):
+        """Test que con LIMITE_CABECERA_CLIENTE el cliente es la ultima direccion de la cabecera"""
+        import main
+
+        monkeypatch.setattr(main, "limitador", LimitadorTasa(tasa=1, rafaga=1, reloj=Reloj()))
+        monkeypatch.setattr(main, "LIMITE_CABECERA_CLIENTE", "X-Forwarded-For")
+
+        assert client.get("/api/factura/FAC-1", headers={"X-Forwarded-For": "1.1.1.1, 10.0.0.1"}).status_code == 200
+        assert client.get("/api/factura/FAC-1", headers={"X-Forwarded-For": "10.0.0.2"}).status_code == 200
+        assert client.get("/api/factura/FAC-1", headers={"X-Forwarded-For": "2.2.2.2, 10.0.0.1"}).status_code == 429
@@ -0,0 +1,48 @@
+from services import metricas
+
+
+def valor(nombre: str, etiquetas: dict) -> float:
+    return metricas.REGISTRO.get_sample_value(nombre, etiquetas) or 0.0
+
+
+class TestMetricas:
+    """Tests para las metricas Prometheus del backend"""
+    
+    def test_muestreo_etapas(self):
+        """Test que solo una de cada N peticiones recibe cronometro"""
+        muestreo = metricas.MuestreoEtapas(cada=4)
+        cronometros = [muestreo.cronometro() for _ in range(8)]
+        assert sum(c is not None for c in cronometros) == 2
+        assert metricas.MuestreoEtapas(cada=0).cronometro() is None
+    
+    def test_cronometro_publica_etapas(self):
+        """Test que el cronometro publica cada etapa en el histograma"""
+        antes = valor("backend_etapa_segundos_count", {"etapa": "prueba"})
+        cronometro = metricas.Cronometro()
+        cronometro.marcar("prueba")
+        cronometro.publicar()
+        assert valor("backend_etapa_segundos_count", {"etapa": "prueba"}) == antes + 1
+    
+    def test_metricas_por_ruta_y_etapa(self, client, monkeypatch):
+        """Test que /metrics expone la latencia por plantilla de ruta y las etapas"""
+        import main
+        
+        monkeypatch.setattr(main, "muestreo_etapas", metricas.MuestreoEtapas(cada=1))
+        etiquetas = {"metodo": "GET", "ruta": "/api/factura/{numero_factura}", "estado": "200"}
+        antes = valor("backend_peticiones_total", etiquetas)
+        client.get("/api/factura/FAC-M-001")
+        client.get("/api/factura/FAC-M-002")
+        
+        assert valor("backend_peticiones_total", etiquetas) == antes + 2
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        for etapa in ("empresa", "cliente", "productos", "serializacion"):
+            assert f'backend_etapa_segundos_count{{etapa="{etapa}"}}' in response.text
+        assert 'ruta="/api/factura/{numero_factura}"' in response.text
+    
+    def test_ruta_desconocida(self, client):
+        """Test que las rutas sin plantilla comparten una sola etiqueta"""
+        client.get("/no-existe/123")
+        etiquetas = {"metodo": "GET", "ruta": metricas.RUTA_DESCONOCIDA, "estado": "404"}
+        assert valor("backend_peticiones_total", etiquetas) >= 1
@@ -0,0 +1,46 @@
+import json
+
+import pytest
+
+from services.generador import GeneradorFacturas
+from services.paralelo import GeneracionParalela
+
+
+@pytest.fixture(scope="module")
+def paralela():
+    """Pool de dos procesos compartido por los tests del modulo"""
+    generacion = GeneracionParalela(procesos=2, facturas_por_bloque=7, bloques_en_vuelo=3)
+    yield generacion
+    generacion.cerrar()
+
+
+@pytest.mark.slow
+class TestGeneracionParalela:
+    """Tests para la generacion en un pool de procesos"""
+    
+    def test_identica_a_un_solo_proceso(self, paralela):
+        """Test que con semilla la salida coincide con la generacion secuencial"""
+        generador = GeneradorFacturas()
+        esperadas = [
+            factura.model_dump_json().encode()
+            for factura in generador.generar_lote(50, prefijo="P-", inicio=3, semilla=21)
+        ]
+        
+        assert list(paralela.generar(50, prefijo="P-", inicio=3, semilla=21)) == esperadas
+    
+    def test_orden_sin_semilla(self, paralela):
+        """Test que sin semilla las facturas llegan en orden y son validas"""
+        numeros = [json.loads(f)["numero_factura"] for f in paralela.generar(30, prefijo="Q-")]
+        assert numeros == [f"Q-{n:06d}" for n in range(1, 31)]
+    
+    def test_endpoint_lote_paralelo(self, client, monkeypatch, paralela):
+        """Test del lote paralelo a traves del endpoint"""
+        import main
+        
+        monkeypatch.setattr(main, "generacion_paralela", paralela)
+        solicitud = {"cantidad": 40, "semilla": 8}
+        secuencial = client.post("/api/facturas/lote", json=solicitud)
+        en_paralelo = client.post("/api/facturas/lote", json={**solicitud, "paralelo": True})
+        
+        assert en_paralelo.status_code == 200
+        assert en_paralelo.text == secuencial.text
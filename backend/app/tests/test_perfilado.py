@@ -0,0 +1,85 @@
+import re
+from fastapi.testclient import TestClient
+from services.perfilado import AlmacenPerfiles, MiddlewarePerfilado, Perfilado
+
+LINEA_PLEGADA = re.compile(r"^\S.* \d+$")
+
+
+def cliente_perfilado(tmp_path, **opciones):
+    from main import app
+    perfilado = Perfilado(AlmacenPerfiles(tmp_path), intervalo=0.0002, **opciones)
+    return TestClient(MiddlewarePerfilado(app, perfilado)), perfilado
+
+
+class TestPerfilado:
+    """Tests para el perfilado por peticion"""
+
+    def test_token_perfila_la_peticion(self, tmp_path):
+        """Test que una peticion con el token guarda un perfil en formato plegado"""
+        client, perfilado = cliente_perfilado(tmp_path, token="secreto")
+        response = client.post(
+            "/api/facturas/lote",
+            json={"cantidad": 200},
+            headers={"X-Perfil-Token": "secreto"}
+        )
+        assert response.status_code == 200
+        nombre = response.headers["X-Perfil"]
+        contenido = perfilado.almacen.leer(nombre)
+        assert contenido
+        assert all(LINEA_PLEGADA.match(linea) for linea in contenido.splitlines())
+        # Los hilos del ejecutor quedan dentro del perfil
+        assert "generar_factura_interna" in contenido
+
+    def test_token_en_parametro(self, tmp_path):
+        """Test que el token tambien se acepta como parametro de consulta"""
+        client, perfilado = cliente_perfilado(tmp_path, token="secreto")
+        response = client.get("/api/factura/FAC-P-001?perfil=secreto")
+        assert perfilado.almacen.leer(response.headers["X-Perfil"]) is not None
+
+    def test_sin_token_no_perfila(self, tmp_path):
+        """Test que sin token valido ni muestreo no se guarda nada"""
+        client, perfilado = cliente_perfilado(tmp_path, token="secreto")
+        response = client.get("/api/factura/FAC-P-002", headers={"X-Perfil-Token": "otro"})
+        assert "X-Perfil" not in response.headers
+        assert perfilado.almacen.listar() == []
+
+    def test_muestreo(self, tmp_path):
+        """Test que el muestreo guarda perfiles sin devolver la cabecera"""
+        client, perfilado = cliente_perfilado(tmp_path, muestreo=1.0)
+        response = client.post("/api/facturas/lote", json={"cantidad": 200})
+        assert "X-Perfil" not in response.headers
+        assert len(perfilado.almacen.listar()) == 1
+
+    def test_almacen_rota(self, tmp_path):
+        """Test que el almacen conserva solo los ultimos perfiles"""
+        almacen = AlmacenPerfiles(tmp_path, max_archivos=2)
+        nombres = [almacen.nuevo_nombre(f"/ruta/{i}") for i in range(3)]
+        for nombre in nombres:
+            almacen.guardar(nombre, "a;b 1\n")
+
+        assert [p["nombre"] for p in almacen.listar()] == [nombres[2], nombres[1]]
+        assert not (tmp_path / nombres[0]).exists()
+
+    def test_almacen_rechaza_rutas(self, tmp_path):
+        """Test que no se pueden leer archivos fuera del almacen"""
+        almacen = AlmacenPerfiles(tmp_path / "perfiles")
+        (tmp_path / "secreto.folded").write_text("x 1\n")
+        assert almacen.leer("../secreto.folded") is None
+
+    def test_endpoints_de_consulta(self, client, monkeypatch, tmp_path):
+        """Test que los perfiles se consultan solo con el token"""
+        import main
+
+        response = client.get("/api/perfiles")
+        assert response.status_code == 404
+
+        perfilado = Perfilado(AlmacenPerfiles(tmp_path), token="secreto")
+        perfilado.almacen.guardar("prueba.folded", "a;b 3\n")
+        monkeypatch.setattr(main, "perfilado", perfilado)
+
+        assert client.get("/api/perfiles").status_code == 403
+        cabeceras = {"Authorization": "Bearer secreto"}
+        assert client.get("/api/perfiles", headers=cabeceras).json() == [{"nombre": "prueba.folded", "bytes": 6}]
+        response = client.get("/api/perfiles/prueba.folded", headers=cabeceras)
+        assert response.text == "a;b 3\n"
+        assert client.get("/api/perfiles/otro.folded", headers=cabeceras).status_code == 404
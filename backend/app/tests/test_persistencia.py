@@ -0,0 +1,226 @@
+import sqlite3
+import time
+from datetime import date
+import pytest
+from services.generador import GeneradorFacturas
+from services.persistencia import AlmacenFacturas, AlmacenSaturado, ciudad_de, decodificar_cursor
+
+
+@pytest.fixture
+def almacen(tmp_path):
+    almacen = AlmacenFacturas(tmp_path / "facturas.db", intervalo=0.01)
+    yield almacen
+    almacen.cerrar()
+
+
+def guardar(almacen: AlmacenFacturas, generador: GeneradorFacturas, numero: str) -> bytes:
+    factura = generador.generar_factura_interna(numero)
+    return almacen.guardar(factura, factura.a_json())
+
+
+class TestAlmacenFacturas:
+    """Tests para el almacen SQLite de facturas"""
+
+    def test_primera_factura_queda_fija(self, almacen):
+        """Test que un numero guardado conserva siempre la primera factura"""
+        generador = GeneradorFacturas()
+        primera = guardar(almacen, generador, "FAC-A-001")
+        assert guardar(almacen, generador, "FAC-A-001") == primera
+        assert almacen.obtener("FAC-A-001") == primera
+
+        almacen.cerrar()
+        assert almacen.estadisticas()["pendientes"] == 0
+        assert almacen.obtener("FAC-A-001") == primera
+        assert guardar(almacen, generador, "FAC-A-001") == primera
+
+    def test_escrituras_agrupadas(self, almacen):
+        """Test que las facturas se escriben en pocas transacciones"""
+        generador = GeneradorFacturas()
+        for i in range(50):
+            guardar(almacen, generador, f"FAC-L-{i:03d}")
+        almacen.cerrar()
+        estadisticas = almacen.estadisticas()
+        assert estadisticas["escritas"] == 50
+        assert estadisticas["transacciones"] < 50
+
+    def test_persiste_entre_instancias(self, tmp_path):
+        """Test que las facturas sobreviven a un reinicio"""
+        ruta = tmp_path / "facturas.db"
+        almacen = AlmacenFacturas(ruta)
+        contenido = guardar(almacen, GeneradorFacturas(), "FAC-P-001")
+        almacen.cerrar()
+        assert AlmacenFacturas(ruta).obtener("FAC-P-001") == contenido
+
+    def test_listar_con_paginacion(self, almacen):
+        """Test que la paginacion por clave recorre todas las facturas sin repetir"""
+        generador = GeneradorFacturas()
+        for i in range(25):
+            guardar(almacen, generador, f"FAC-K-{i:03d}")
+        almacen.cerrar()
+
+        vistas, cursor = [], None
+        while True:
+            pagina, cursor = almacen.listar(limite=10, despues=cursor)
+            vistas.extend(pagina)
+            if cursor is None:
+                break
+        assert len(vistas) == 25
+        assert len(set(vistas)) == 25
+
+    def test_filtros(self, almacen):
+        """Test que los filtros por cliente, ciudad y fecha usan los campos de la factura"""
+        generador = GeneradorFacturas(semilla=7)
+        facturas = [generador.generar_factura_interna(f"FAC-F-{i:03d}") for i in range(30)]
+        for factura in facturas:
+            almacen.guardar(factura, factura.a_json())
+        almacen.cerrar()
+
+        ciudad = ciudad_de(facturas[0].cliente.direccion)
+        pagina, _ = almacen.listar(ciudad=ciudad, limite=100)
+        assert len(pagina) == sum(ciudad_de(f.cliente.direccion) == ciudad for f in facturas)
+
+        pagina, _ = almacen.listar(cliente=facturas[0].cliente.nombre, limite=100)
+        assert facturas[0].a_json() in pagina
+
+        fecha = facturas[0].fecha_emision
+        pagina, _ = almacen.listar(desde=fecha, hasta=fecha, limite=100)
+        assert len(pagina) == sum(f.fecha_emision == fecha for f in facturas)
+        assert almacen.listar(hasta=date(2000, 1, 1))[0] == []
+
+    def test_obtener_varios(self, almacen):
+        """Test que se leen varias facturas pendientes y escritas de una vez"""
+        generador = GeneradorFacturas()
+        escrita = guardar(almacen, generador, "FAC-V-001")
+        almacen.cerrar()
+        pendiente = guardar(almacen, generador, "FAC-V-002")
+
+        assert almacen.obtener_varios(["FAC-V-001", "FAC-V-002", "FAC-V-003"]) == {
+            "FAC-V-001": escrita,
+            "FAC-V-002": pendiente,
+        }
+
+    def test_reintenta_tras_error(self, almacen, monkeypatch):
+        """Test que un error de SQLite se registra y el volcado se reintenta sin perder facturas"""
+        volcar = AlmacenFacturas._volcar
+        fallos = []
+
+        def fallar_una_vez(self, conexion):
+            if not fallos:
+                fallos.append(1)
+                raise sqlite3.OperationalError("database is locked")
+            volcar(self, conexion)
+
+        monkeypatch.setattr(AlmacenFacturas, "_volcar", fallar_una_vez)
+        contenido = guardar(almacen, GeneradorFacturas(), "FAC-E-001")
+        almacen.cerrar()
+
+        assert almacen.estadisticas()["errores"] == 1
+        assert almacen.estadisticas()["pendientes"] == 0
+        assert almacen._leer("FAC-E-001") == contenido
+
+    @pytest.mark.filterwarnings("ignore::pytest.PytestUnhandledThreadExceptionWarning")
+    def test_reinicia_el_escritor(self, almacen, monkeypatch):
+        """Test que si el hilo escritor muere, el siguiente guardar arranca otro"""
+        volcar = AlmacenFacturas._volcar
+
+        def romper(self, conexion):
+            raise RuntimeError("fallo inesperado")
+
+        monkeypatch.setattr(AlmacenFacturas, "_volcar", romper)
+        generador = GeneradorFacturas()
+        guardar(almacen, generador, "FAC-R-001")
+        for _ in range(100):
+            if almacen._escritor is None:
+                break
+            time.sleep(0.01)
+        assert almacen._escritor is None
+
+        monkeypatch.setattr(AlmacenFacturas, "_volcar", volcar)
+        guardar(almacen, generador, "FAC-R-002")
+        almacen.cerrar()
+        assert almacen._leer("FAC-R-001") is not None
+        assert almacen._leer("FAC-R-002") is not None
+
+    def test_pendientes_acotadas(self, tmp_path):
+        """Test que al llegar a max_pendientes se rechaza en lugar de acumular"""
+        almacen = AlmacenFacturas(tmp_path / "facturas.db", intervalo=60, max_pendientes=2)
+        generador = GeneradorFacturas()
+        guardar(almacen, generador, "FAC-M-001")
+        guardar(almacen, generador, "FAC-M-002")
+
+        with pytest.raises(AlmacenSaturado):
+            guardar(almacen, generador, "FAC-M-003")
+        # Una factura ya pendiente se sigue sirviendo
+        assert guardar(almacen, generador, "FAC-M-001") == almacen.obtener("FAC-M-001")
+        assert almacen.estadisticas()["rechazadas"] == 1
+        almacen.cerrar()
+        guardar(almacen, generador, "FAC-M-003")
+        almacen.cerrar()
+
+    def test_cursor_invalido(self):
+        """Test que un cursor mal formado se rechaza"""
+        with pytest.raises(ValueError):
+            decodificar_cursor("no-es-un-cursor")
+
+
+class TestAlmacenAPI:
+    """Tests para los endpoints del almacen de facturas"""
+
+    def test_factura_estable(self, client, monkeypatch, tmp_path):
+        """Test que con almacen el mismo numero devuelve siempre la misma factura"""
+        import main
+        from services.cache import CacheFacturas
+
+        almacen = AlmacenFacturas(tmp_path / "facturas.db", intervalo=0.01)
+        monkeypatch.setattr(main, "almacen_facturas", almacen)
+        monkeypatch.setattr(main, "cache_facturas", CacheFacturas(max_entradas=0))
+        primera = client.get("/api/factura/FAC-API-001")
+        segunda = client.get("/api/factura/FAC-API-001")
+        assert primera.content == segunda.content
+        assert "ETag" in primera.headers
+
+        almacen.cerrar()
+        response = client.get("/api/facturas", params={"limite": 1})
+        assert response.status_code == 200
+        datos = response.json()
+        assert [f["numero_factura"] for f in datos["facturas"]] == ["FAC-API-001"]
+        assert datos["siguiente"] is None
+
+        assert client.get("/api/facturas", params={"despues": "x"}).status_code == 400
+
+    def test_lote_desde_almacen(self, client, monkeypatch, tmp_path):
+        """Test que el lote devuelve las facturas guardadas y guarda las que genera"""
+        import main
+
+        almacen = AlmacenFacturas(tmp_path / "facturas.db", intervalo=0.01)
+        monkeypatch.setattr(main, "almacen_facturas", almacen)
+        guardada = client.get("/api/factura/FAC-LA-001").content
+        numeros = ["FAC-LA-001", "FAC-LA-002", "FAC-LA-001"]
+
+        primero = client.post("/api/facturas/lote", json={"numeros": numeros, "semilla": 7})
+        lineas = primero.content.splitlines()
+        assert lineas[0] == lineas[2] == guardada
+        assert almacen.obtener("FAC-LA-002") == lineas[1]
+
+        almacen.cerrar()
+        segundo = client.post("/api/facturas/lote", json={"numeros": numeros, "paralelo": True})
+        assert segundo.content == primero.content
+        almacen.cerrar()
+
+    def test_almacen_saturado(self, client, monkeypatch, tmp_path):
+        """Test que con el almacen saturado se responde 503 con Retry-After"""
+        import main
+        from services.cache import CacheFacturas
+
+        almacen = AlmacenFacturas(tmp_path / "facturas.db", max_pendientes=0, reintentar_en=2)
+        monkeypatch.setattr(main, "almacen_facturas", almacen)
+        monkeypatch.setattr(main, "cache_facturas", CacheFacturas(max_entradas=0))
+        response = client.get("/api/factura/FAC-S-001")
+
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "2"
+
+    def test_almacen_deshabilitado(self, client):
+        """Test que sin FACTURAS_DB el listado no esta disponible"""
+        assert client.get("/api/facturas").status_code == 404
+        assert client.get("/api/almacen/estadisticas").json() == {"habilitado": False}
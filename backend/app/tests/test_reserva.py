@@ -0,0 +1,98 @@
+import json
+import time
+from models.factura import Factura
+from services.generador import GeneradorFacturas
+from services.reserva import ReservaFacturas
+
+
+def esperar(condicion, segundos: float = 5.0) -> None:
+    limite = time.monotonic() + segundos
+    while not condicion():
+        assert time.monotonic() < limite, "la condicion no se cumplio a tiempo"
+        time.sleep(0.005)
+
+
+class TestReservaFacturas:
+    """Tests para la reserva de facturas pregeneradas"""
+
+    def test_recarga_hasta_el_tamano(self):
+        """Test que el hilo de recarga llena la reserva y se detiene al llegar al tamaño"""
+        reserva = ReservaFacturas(GeneradorFacturas(), tamano=5)
+        reserva.iniciar()
+        try:
+            esperar(lambda: len(reserva) == 5)
+            time.sleep(0.05)
+            assert reserva.generadas == 5
+        finally:
+            reserva.detener()
+
+    def test_tomar_estampa_el_numero(self):
+        """Test que la factura servida es valida y lleva el numero pedido"""
+        reserva = ReservaFacturas(GeneradorFacturas(), tamano=2)
+        reserva.iniciar()
+        try:
+            esperar(lambda: len(reserva) == 2)
+            contenido = reserva.tomar('FAC-"R"-001')
+            factura = Factura.model_validate_json(contenido)
+            assert factura.numero_factura == 'FAC-"R"-001'
+            assert json.loads(contenido)["numero_factura"] == 'FAC-"R"-001'
+            # Tras servir una factura la reserva se vuelve a llenar
+            esperar(lambda: len(reserva) == 2)
+            assert reserva.servidas == 1
+        finally:
+            reserva.detener()
+
+    def test_sigue_recargando_tras_un_error(self, monkeypatch):
+        """Test que un error al pregenerar no detiene el hilo de recarga"""
+        from services import reserva as modulo
+
+        monkeypatch.setattr(modulo, "ESPERA_TRAS_ERROR", 0.01)
+        generador = GeneradorFacturas()
+        generar = generador.generar_factura_interna
+        fallos = []
+
+        def fallar_dos_veces(numero_factura):
+            if len(fallos) < 2:
+                fallos.append(numero_factura)
+                raise RuntimeError("fallo al generar")
+            return generar(numero_factura)
+
+        monkeypatch.setattr(generador, "generar_factura_interna", fallar_dos_veces)
+        reserva = ReservaFacturas(generador, tamano=3)
+        reserva.iniciar()
+        try:
+            esperar(lambda: len(reserva) == 3)
+            assert reserva.estadisticas()["errores"] == 2
+        finally:
+            reserva.detener()
+
+    def test_reserva_vacia(self):
+        """Test que una reserva vacia devuelve None y cuenta el vaciado"""
+        reserva = ReservaFacturas(GeneradorFacturas(), tamano=3)
+        assert reserva.tomar("FAC-001") is None
+        assert reserva.estadisticas()["agotada"] == 1
+
+    def test_endpoint_usa_la_reserva(self, client, monkeypatch):
+        """Test que el endpoint sirve la factura desde la reserva y la expone en metricas"""
+        import main
+
+        reserva = ReservaFacturas(main.generador, tamano=1)
+        monkeypatch.setattr(main, "reserva_facturas", reserva)
+        reserva.iniciar()
+        try:
+            esperar(lambda: len(reserva) == 1)
+            response = client.get("/api/factura/FAC-RES-001")
+            assert response.status_code == 200
+            assert response.json()["numero_factura"] == "FAC-RES-001"
+            assert reserva.servidas == 1
+
+            estadisticas = client.get("/api/reserva/estadisticas").json()
+            assert estadisticas["habilitada"] is True
+            assert estadisticas["servidas"] == 1
+        finally:
+            reserva.detener()
+
+    def test_reserva_desactivada(self, client):
+        """Test que por defecto la reserva esta desactivada"""
+        response = client.get("/api/reserva/estadisticas")
+        assert response.json()["habilitada"] is False
@@ -0,0 +1,116 @@
+"""
+Benchmark del arranque en frio del backend y del frontend
+
+Lanza el servicio en un proceso nuevo (uvicorn o flask, sin recarga) y mide
+el tiempo desde que arranca el proceso hasta la primera respuesta correcta de
+``--ruta`` y hasta que ``/ready`` responde 200, con cada modo de
+``CALENTAMIENTO``. Se repite ``--repeticiones`` veces por modo y se informan
+la mediana, el minimo y el maximo. El primer arranque tras instalar
+dependencias incluye la compilacion de los ``.pyc``; conviene descartarlo.
+
+Uso:
+    python benchmarks/bench_arranque.py --servicio backend --repeticiones 5
+    python benchmarks/bench_arranque.py --servicio backend --ruta /health --env MOTOR_GENERADOR=rapido
+    python benchmarks/bench_arranque.py --servicio frontend --modos sincrono,no
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+from comun import BACKEND_DIR, FRONTEND_DIR
+
+RUTA_POR_DEFECTO = {
+    "backend": "/api/factura/FAC-000001",
+    "frontend": "/health",
+}
+
+
+def puerto_libre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def comando(servicio: str, puerto: int) -> list[str]:
+    if servicio == "backend":
+        return [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1",
+                "--port", str(puerto), "--log-level", "warning"]
+    return [sys.executable, "-m", "flask", "--app", "main", "run", "--host", "127.0.0.1",
+            "--port", str(puerto)]
+
+
+def responde(url: str) -> bool:
+    try:
+        with urllib.request.urlopen(url, timeout=2) as respuesta:
+            respuesta.read()
+            return respuesta.status == 200
+    except (urllib.error.URLError, ConnectionError, TimeoutError):
+        return False
+
+
+def esperar(url: str, inicio: float, limite: float, proceso: subprocess.Popen) -> float:
+    """Segundos desde ``inicio`` hasta la primera respuesta 200 de ``url``"""
+    while not responde(url):
+        if proceso.poll() is not None:
+            raise RuntimeError(f"El servicio termino con codigo {proceso.returncode}")
+        if time.perf_counter() - inicio > limite:
+            raise TimeoutError(f"{url} no respondio en {limite} s")
+        time.sleep(0.005)
+    return time.perf_counter() - inicio
+
+
+def medir_arranque(servicio: str, modo: str, ruta: str, entorno: dict, limite: float) -> tuple[float, float]:
+    """Arranca el servicio una vez y devuelve (primera respuesta, listo) en segundos"""
+    puerto = puerto_libre()
+    base = f"http://127.0.0.1:{puerto}"
+    env = {**os.environ, **entorno, "CALENTAMIENTO": modo}
+    directorio = BACKEND_DIR if servicio == "backend" else FRONTEND_DIR
+    inicio = time.perf_counter()
+    proceso = subprocess.Popen(
+        comando(servicio, puerto), cwd=directorio, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        primera = esperar(base + ruta, inicio, limite, proceso)
+        listo = esperar(base + "/ready", inicio, limite, proceso)
+    finally:
+        proceso.terminate()
+        proceso.wait()
+    return primera, listo
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--servicio", choices=("backend", "frontend"), default="backend")
+    parser.add_argument("--modos", default="sincrono,segundo_plano,no")
+    parser.add_argument("--ruta", default=None, help="Ruta de la primera respuesta (por defecto segun el servicio)")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--limite", type=float, default=60.0, help="Segundos maximos por arranque")
+    parser.add_argument("--env", action="append", default=[], metavar="VAR=VALOR",
+                        help="Variables de entorno del servicio (repetible)")
+    args = parser.parse_args()
+
+    ruta = args.ruta or RUTA_POR_DEFECTO[args.servicio]
+    entorno = dict(variable.split("=", 1) for variable in args.env)
+    print(f"{args.servicio}: primera respuesta de {ruta} y /ready desde el arranque del proceso")
+    for modo in args.modos.split(","):
+        primeras, listos = [], []
+        for _ in range(args.repeticiones):
+            primera, listo = medir_arranque(args.servicio, modo, ruta, entorno, args.limite)
+            primeras.append(primera * 1000)
+            listos.append(listo * 1000)
+        print(
+            f"{modo:<14} primera respuesta p50 {statistics.median(primeras):7.0f} ms"
+            f" (min {min(primeras):.0f}, max {max(primeras):.0f})"
+            f"   listo p50 {statistics.median(listos):7.0f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
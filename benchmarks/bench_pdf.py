@@ -0,0 +1,91 @@
+"""
+Benchmark del renderizado de PDF del frontend
+
+Compara la latencia del comportamiento anterior (estilos y elementos fijos
+construidos en cada peticion, streams codificados en ASCII85) con la del
+renderizador compartido.
+
+Uso:
+    python benchmarks/bench_pdf.py --iteraciones 300
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "frontend" / "app"))
+
+from reportlab import rl_config  # noqa: E402
+
+from pdf_factura import RenderizadorFacturaPDF  # noqa: E402
+
+from comun import percentil  # noqa: E402
+
+FACTURA = {
+    "numero_factura": "FAC-2025-001",
+    "fecha_emision": "2025-08-15",
+    "empresa": {
+        "nombre": "Distribuidora La Esperanza S.A.S",
+        "direccion": "Calle 12 #45-67, Cali",
+        "telefono": "+57 311 567 8901",
+        "email": "contacto@laesperanza.com"
+    },
+    "cliente": {
+        "nombre": "Supermercado Los Andes",
+        "direccion": "Carrera 50 #23-90, Medellin",
+        "telefono": "+57 312 908 4567"
+    },
+    "detalle": [
+        {"producto": "Chocolatina Jet", "categoria": "Dulces", "cantidad": 12, "precio_unitario": 1200.0},
+        {"producto": "Lomo de res", "categoria": "Carnes", "cantidad": 5, "precio_unitario": 24000.0},
+        {"producto": "Gaseosa Colombiana", "categoria": "Bebidas", "cantidad": 10, "precio_unitario": 2800.0},
+        {"producto": "Arroz Diana", "categoria": "Granos", "cantidad": 3, "precio_unitario": 4100.0},
+        {"producto": "Pandebono", "categoria": "Panaderia", "cantidad": 8, "precio_unitario": 1500.0}
+    ],
+    "subtotal": 179300.0,
+    "impuesto": 34067.0,
+    "total": 213367.0
+}
+
+
+def medir(nombre: str, renderizar, iteraciones: int) -> dict:
+    for _ in range(10):  # calentamiento
+        renderizar(FACTURA)
+    latencias = []
+    for _ in range(iteraciones):
+        t0 = time.perf_counter()
+        renderizar(FACTURA)
+        latencias.append((time.perf_counter() - t0) * 1000)
+    resultado = {
+        "nombre": nombre,
+        "p50_ms": percentil(latencias, 50),
+        "p99_ms": percentil(latencias, 99),
+        "media_ms": statistics.fmean(latencias),
+    }
+    print(f"{nombre:<28} p50 {resultado['p50_ms']:7.3f} ms   p99 {resultado['p99_ms']:7.3f} ms")
+    return resultado
+
+
+def renderizar_antes(factura: dict) -> bytes:
+    """Reproduce el renderizado anterior: todo se construye en cada peticion"""
+    rl_config.useA85 = 1
+    try:
+        return RenderizadorFacturaPDF().renderizar(factura)
+    finally:
+        rl_config.useA85 = 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iteraciones", type=int, default=300)
+    args = parser.parse_args()
+
+    compartido = RenderizadorFacturaPDF()
+    antes = medir("estilos por peticion", renderizar_antes, args.iteraciones)
+    despues = medir("renderizador compartido", compartido.renderizar, args.iteraciones)
+    print(f"mejora p50: {antes['p50_ms'] / despues['p50_ms']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
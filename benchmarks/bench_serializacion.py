@@ -0,0 +1,126 @@
+"""
+Benchmark de la serializacion de las respuestas de factura del backend
+
+Compara la ruta anterior (devolver el modelo ``Factura`` y dejar que FastAPI
+lo valide de nuevo contra ``response_model``, lo pase a ``dict`` y lo codifique
+con ``json.dumps``) con la ruta rapida (bytes de ``model_dump_json`` en una
+``Response``). Mide el coste de serializar una factura y las peticiones por
+segundo de un endpoint con cada ruta, llamando a la aplicacion ASGI en el mismo
+proceso (sin red) y sirviendo facturas ya generadas para aislar la
+serializacion.
+
+Uso:
+    python benchmarks/bench_serializacion.py --peticiones 2000
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend" / "app"))
+
+from fastapi import FastAPI, Response  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+from fastapi.utils import create_model_field  # noqa: E402
+
+from models.factura import Factura  # noqa: E402
+from services.motores import crear_generador  # noqa: E402
+
+
+CAMPO_RESPUESTA = create_model_field(name="Response_factura", type_=Factura, mode="serialization")
+
+
+async def serializar_antes(factura: Factura) -> bytes:
+    """Reproduce la serializacion de FastAPI para ``response_model=Factura``"""
+    contenido = await serialize_response(field=CAMPO_RESPUESTA, response_content=factura)
+    return JSONResponse(contenido).body
+
+
+async def serializar_despues(factura: Factura) -> bytes:
+    return factura.model_dump_json().encode()
+
+
+def crear_app(facturas: list[Factura]) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/antes/{indice}", response_model=Factura)
+    async def antes(indice: int):
+        return facturas[indice % len(facturas)]
+
+    @app.get("/despues/{indice}", response_model=Factura)
+    async def despues(indice: int):
+        return Response(facturas[indice % len(facturas)].model_dump_json().encode(), media_type="application/json")
+
+    return app
+
+
+async def medir_serializacion(nombre: str, serializar, facturas: list[Factura], repeticiones: int) -> float:
+    t0 = time.perf_counter()
+    for i in range(repeticiones):
+        await serializar(facturas[i % len(facturas)])
+    microsegundos = (time.perf_counter() - t0) / repeticiones * 1e6
+    print(f"{nombre:<22} {microsegundos:9.1f} us/factura")
+    return microsegundos
+
+
+async def llamar(app: FastAPI, ruta: str) -> bytes:
+    """Hace un GET directamente sobre la aplicacion ASGI y devuelve el cuerpo"""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": ruta, "raw_path": ruta.encode(), "root_path": "",
+        "query_string": b"", "headers": [], "client": ("127.0.0.1", 1), "server": ("127.0.0.1", 80),
+    }
+    cuerpo = []
+
+    async def recibir():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def enviar(mensaje):
+        if mensaje["type"] == "http.response.body":
+            cuerpo.append(mensaje.get("body", b""))
+
+    await app(scope, recibir, enviar)
+    return b"".join(cuerpo)
+
+
+async def medir_peticiones(nombre: str, app: FastAPI, ruta: str, peticiones: int) -> float:
+    for i in range(50):  # calentamiento
+        await llamar(app, f"{ruta}/{i}")
+    t0 = time.perf_counter()
+    for i in range(peticiones):
+        await llamar(app, f"{ruta}/{i}")
+    por_segundo = peticiones / (time.perf_counter() - t0)
+    print(f"{nombre:<22} {por_segundo:9.0f} peticiones/s")
+    return por_segundo
+
+
+async def comparar(facturas: list[Factura], peticiones: int) -> None:
+    for factura in facturas:
+        assert await serializar_antes(factura) == await serializar_despues(factura), "salida distinta"
+
+    antes = await medir_serializacion("serializacion antes", serializar_antes, facturas, peticiones)
+    despues = await medir_serializacion("serializacion despues", serializar_despues, facturas, peticiones)
+    print(f"mejora serializacion: {antes / despues:.1f}x")
+
+    app = crear_app(facturas)
+    assert await llamar(app, "/antes/0") == await llamar(app, "/despues/0"), "respuesta distinta"
+    rps_antes = await medir_peticiones("endpoint antes", app, "/antes", peticiones)
+    rps_despues = await medir_peticiones("endpoint despues", app, "/despues", peticiones)
+    print(f"mejora peticiones/s: {rps_despues / rps_antes:.2f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--peticiones", type=int, default=2000)
+    parser.add_argument("--motor", default="faker")
+    args = parser.parse_args()
+
+    generador = crear_generador(args.motor, semilla=1)
+    facturas = [generador.generar_factura(f"FAC-{i:06d}") for i in range(256)]
+    asyncio.run(comparar(facturas, args.peticiones))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Utilidades compartidas por los benchmarks: percentiles, resumenes de
+latencia y carga de las aplicaciones del backend y del frontend en el mismo
+proceso (ambas tienen un modulo ``main``).
+"""
+import importlib.util
+import statistics
+import sys
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+BACKEND_DIR = RAIZ / "backend" / "app"
+FRONTEND_DIR = RAIZ / "frontend" / "app"
+
+
+def percentil(valores: list[float], p: float) -> float:
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+
+def resumir(latencias: list[float], segundos: float) -> dict:
+    """Resume latencias en segundos: operaciones por segundo y percentiles en ms"""
+    milisegundos = [latencia * 1000 for latencia in latencias]
+    return {
+        "operaciones": len(latencias),
+        "ops_por_segundo": len(latencias) / segundos if segundos else 0.0,
+        "media_ms": statistics.fmean(milisegundos),
+        "p50_ms": percentil(milisegundos, 50),
+        "p95_ms": percentil(milisegundos, 95),
+        "p99_ms": percentil(milisegundos, 99),
+    }
+
+
+def agregar_rutas() -> None:
+    """Permite importar los paquetes del backend y los modulos del frontend"""
+    for directorio in (BACKEND_DIR, FRONTEND_DIR):
+        if str(directorio) not in sys.path:
+            sys.path.append(str(directorio))
+
+
+def cargar_main(directorio: Path, nombre: str):
+    """Importa el ``main.py`` de una aplicacion con un nombre de modulo propio"""
+    agregar_rutas()
+    if nombre in sys.modules:
+        return sys.modules[nombre]
+    spec = importlib.util.spec_from_file_location(nombre, directorio / "main.py")
+    modulo = importlib.util.module_from_spec(spec)
+    sys.modules[nombre] = modulo
+    spec.loader.exec_module(modulo)
+    return modulo
@@ -0,0 +1,255 @@
+"""
+Suite de benchmarks del backend y del frontend
+
+Ejecuta en local y sin red:
+
+- micro-benchmarks de ``GeneradorFacturas.generar_factura`` (motores faker y
+  rapido, este tambien con un catalogo sintetico de miles de productos con
+  pesos), ``generar_productos`` y la serializacion de facturas;
+- pruebas de carga de ``/api/factura/{n}`` (backend) y
+  ``/api/generar-pdf/{n}`` (frontend, que llama al backend en el mismo
+  proceso) con la concurrencia indicada.
+
+Cada prueba informa operaciones por segundo y latencias p50/p95/p99. Los
+resultados se guardan como JSON y, si existe una linea base, se comparan con
+ella: la salida termina con codigo 1 si alguna prueba pierde mas de
+``--tolerancia`` de rendimiento o empeora su p99 en la misma proporcion (y en
+mas de ``--ruido-ms``). Las cifras dependen de la maquina; la linea base debe
+generarse en el mismo equipo con ``--guardar-base``.
+
+Uso:
+    python benchmarks/suite.py --guardar-base
+    python benchmarks/suite.py --concurrencia 16 --peticiones 1000
+    python benchmarks/suite.py --solo micro --base benchmarks/base.json
+"""
+import argparse
+import io
+import itertools
+import json
+import os
+import platform
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Callable
+
+import requests
+from requests.adapters import BaseAdapter
+
+from comun import BACKEND_DIR, FRONTEND_DIR, agregar_rutas, cargar_main, resumir
+
+agregar_rutas()
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from services.catalogo import Catalogo  # noqa: E402
+from services.generador import GeneradorFacturas  # noqa: E402
+from services.rapido import GeneradorFacturasRapido  # noqa: E402
+
+DIRECTORIO = Path(__file__).resolve().parent
+BASE_POR_DEFECTO = DIRECTORIO / "base.json"
+RESULTADOS_DIR = DIRECTORIO / "resultados"
+
+# Variables de entorno que cambian el comportamiento medido
+VARIABLES_RELEVANTES = (
+    "FACTURAS_SEMILLA", "MOTOR_GENERADOR", "CACHE_FACTURAS_MAX", "HILOS_GENERACION",
+    "MAX_PENDIENTES_GENERACION", "PDF_PROCESOS", "CATALOGO_RUTA", "LIMITE_PETICIONES_POR_SEGUNDO",
+)
+
+
+def medir_micro(funcion: Callable[[], object], iteraciones: int) -> dict:
+    """Mide la latencia de cada llamada de ``funcion`` tras un calentamiento"""
+    for _ in range(min(100, iteraciones)):
+        funcion()
+    latencias = []
+    t0 = time.perf_counter()
+    for _ in range(iteraciones):
+        inicio = time.perf_counter()
+        funcion()
+        latencias.append(time.perf_counter() - inicio)
+    return resumir(latencias, time.perf_counter() - t0)
+
+
+def catalogo_sintetico(categorias: int = 200, productos_por_categoria: int = 50) -> Catalogo:
+    """Catalogo grande con pesos desiguales por categoria y por producto"""
+    return Catalogo(
+        [(f"Categoria {c}", 1 + c % 7) for c in range(categorias)],
+        [
+            (f"Producto {c}-{p}", c, 1 + (p % 5) ** 2, 1000, 50000)
+            for c in range(categorias)
+            for p in range(productos_por_categoria)
+        ]
+    )
+
+
+def micro_benchmarks(iteraciones: int) -> dict:
+    faker = GeneradorFacturas()
+    rapido = GeneradorFacturasRapido()
+    rapido_catalogo = GeneradorFacturasRapido(catalogo=catalogo_sintetico())
+    numeros = (f"FAC-{n:06d}" for n in itertools.count())
+    factura = faker.generar_factura("FAC-000001")
+    interna = faker.generar_factura_interna("FAC-000001")
+
+    pruebas = {
+        "generar_factura[faker]": lambda: faker.generar_factura(next(numeros)),
+        "generar_factura[rapido]": lambda: rapido.generar_factura(next(numeros)),
+        "generar_factura[rapido,catalogo_10000]": lambda: rapido_catalogo.generar_factura(next(numeros)),
+        "generar_productos[faker]": faker.generar_productos,
+        "serializar[model_dump_json]": factura.model_dump_json,
+        "serializar[interna]": interna.a_json,
+    }
+    return {nombre: medir_micro(funcion, iteraciones) for nombre, funcion in pruebas.items()}
+
+
+class AdaptadorASGI(BaseAdapter):
+    """Adaptador de ``requests`` que envia las peticiones a una app ASGI en el mismo proceso"""
+
+    def __init__(self, cliente: TestClient):
+        super().__init__()
+        self.cliente = cliente
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        respuesta = self.cliente.request(
+            request.method, request.url, content=request.body, headers=dict(request.headers)
+        )
+        resultado = requests.Response()
+        resultado.status_code = respuesta.status_code
+        resultado.headers.update(respuesta.headers)
+        resultado.raw = io.BytesIO(respuesta.content)
+        resultado.url = request.url
+        resultado.request = request
+        resultado.encoding = "utf-8"
+        return resultado
+
+    def close(self):
+        pass
+
+
+def medir_carga(peticion: Callable[[int], int], peticiones: int, concurrencia: int) -> dict:
+    """Lanza ``peticiones`` llamadas con ``concurrencia`` hilos y resume sus latencias"""
+    def una(indice: int) -> tuple[float, bool]:
+        inicio = time.perf_counter()
+        estado = peticion(indice)
+        return time.perf_counter() - inicio, estado < 400
+
+    with ThreadPoolExecutor(concurrencia) as executor:
+        list(executor.map(una, range(min(concurrencia * 4, peticiones))))  # calentamiento
+        t0 = time.perf_counter()
+        resultados = list(executor.map(una, range(peticiones)))
+        segundos = time.perf_counter() - t0
+
+    resumen = resumir([latencia for latencia, _ in resultados], segundos)
+    resumen["concurrencia"] = concurrencia
+    resumen["errores"] = sum(1 for _, correcta in resultados if not correcta)
+    return resumen
+
+
+def pruebas_carga(peticiones: int, concurrencia: int, peticiones_pdf: int) -> dict:
+    backend = cargar_main(BACKEND_DIR, "backend_main")
+    frontend = cargar_main(FRONTEND_DIR, "frontend_main")
+    resultados = {}
+
+    with TestClient(backend.app) as cliente_backend:
+        # El frontend llama al backend a traves de la app ASGI, sin red
+        frontend.backend.sesion.mount(frontend.backend.url_base, AdaptadorASGI(cliente_backend))
+        clientes_frontend = threading.local()
+
+        def factura(indice: int) -> int:
+            return cliente_backend.get(f"/api/factura/FAC-{indice:06d}").status_code
+
+        def pdf(indice: int) -> int:
+            if not hasattr(clientes_frontend, "cliente"):
+                clientes_frontend.cliente = frontend.app.test_client()
+            return clientes_frontend.cliente.get(f"/api/generar-pdf/FAC-{indice:06d}").status_code
+
+        resultados["GET /api/factura/{n}"] = medir_carga(factura, peticiones, concurrencia)
+        resultados["GET /api/generar-pdf/{n}"] = medir_carga(pdf, peticiones_pdf, concurrencia)
+    return resultados
+
+
+def comparar(resultados: dict, base: dict, tolerancia: float, ruido_ms: float) -> list[str]:
+    """Imprime la comparacion con la linea base y devuelve las pruebas con regresion"""
+    regresiones = []
+    print(f"\n{'prueba':<30} {'ops/s base':>12} {'ops/s':>12} {'cambio':>8} {'p99 base':>10} {'p99':>10}")
+    for nombre, actual in resultados.items():
+        anterior = base.get(nombre)
+        if anterior is None:
+            print(f"{nombre:<30} {'-':>12} {actual['ops_por_segundo']:12.1f}   (sin linea base)")
+            continue
+        cambio = actual["ops_por_segundo"] / anterior["ops_por_segundo"] - 1
+        regresion = (
+            cambio < -tolerancia
+            # Las diferencias de p99 por debajo de ``ruido_ms`` no se consideran
+            or actual["p99_ms"] > max(anterior["p99_ms"] * (1 + tolerancia), anterior["p99_ms"] + ruido_ms)
+        )
+        if regresion:
+            regresiones.append(nombre)
+        print(
+            f"{nombre:<30} {anterior['ops_por_segundo']:12.1f} {actual['ops_por_segundo']:12.1f} "
+            f"{cambio:+8.1%} {anterior['p99_ms']:10.3f} {actual['p99_ms']:10.3f}"
+            + ("  REGRESION" if regresion else "")
+        )
+    return regresiones
+
+
+def imprimir(resultados: dict) -> None:
+    print(f"{'prueba':<30} {'ops/s':>12} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10}")
+    for nombre, r in resultados.items():
+        print(
+            f"{nombre:<30} {r['ops_por_segundo']:12.1f} {r['p50_ms']:10.3f} "
+            f"{r['p95_ms']:10.3f} {r['p99_ms']:10.3f}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--solo", choices=("micro", "carga"), help="Ejecuta solo un grupo de pruebas")
+    parser.add_argument("--iteraciones", type=int, default=2000, help="Llamadas por micro-benchmark")
+    parser.add_argument("--peticiones", type=int, default=1000, help="Peticiones de la carga de facturas")
+    parser.add_argument("--peticiones-pdf", type=int, default=300, help="Peticiones de la carga de PDF")
+    parser.add_argument("--concurrencia", type=int, default=8)
+    parser.add_argument("--salida", type=Path, help="Archivo JSON de resultados")
+    parser.add_argument("--base", type=Path, default=BASE_POR_DEFECTO, help="Linea base con la que comparar")
+    parser.add_argument("--guardar-base", action="store_true", help="Guarda los resultados como linea base")
+    parser.add_argument("--tolerancia", type=float, default=0.15, help="Regresion admitida (0.15 = 15%%)")
+    parser.add_argument("--ruido-ms", type=float, default=0.05, help="Aumento de p99 que se ignora siempre")
+    args = parser.parse_args()
+
+    resultados = {}
+    if args.solo in (None, "micro"):
+        resultados.update(micro_benchmarks(args.iteraciones))
+    if args.solo in (None, "carga"):
+        resultados.update(pruebas_carga(args.peticiones, args.concurrencia, args.peticiones_pdf))
+    imprimir(resultados)
+
+    documento = {
+        "metadatos": {
+            "fecha": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "cpus": os.cpu_count(),
+            "entorno": {v: os.environ[v] for v in VARIABLES_RELEVANTES if v in os.environ},
+        },
+        "resultados": resultados,
+    }
+    salida = args.salida or RESULTADOS_DIR / f"{datetime.now():%Y%m%d-%H%M%S}.json"
+    salida.parent.mkdir(parents=True, exist_ok=True)
+    salida.write_text(json.dumps(documento, indent=2, ensure_ascii=False))
+    print(f"\nresultados guardados en {salida}")
+
+    if args.guardar_base:
+        args.base.write_text(json.dumps(documento, indent=2, ensure_ascii=False))
+        print(f"linea base guardada en {args.base}")
+    elif args.base.exists():
+        base = json.loads(args.base.read_text())["resultados"]
+        regresiones = comparar(resultados, base, args.tolerancia, args.ruido_ms)
+        if regresiones:
+            print(f"\nregresiones: {', '.join(regresiones)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
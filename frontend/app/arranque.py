@@ -0,0 +1,74 @@
+# Mismo modulo que backend/app/services/arranque.py: backend y frontend se construyen
+# con contextos de Docker separados y no comparten codigo, asi que los cambios
+# se aplican en los dos archivos.
+import threading
+import time
+from typing import Callable, Optional
+
+# Modos de calentamiento: antes de aceptar trafico, en segundo plano o ninguno
+MODOS_CALENTAMIENTO = ("sincrono", "segundo_plano", "no")
+
+
+class Calentamiento:
+    """
+    Tareas que preparan el servicio antes de recibir trafico y estado de preparacion
+
+    Con ``modo`` ``sincrono`` las tareas se ejecutan en ``iniciar`` y el
+    servicio no acepta conexiones hasta terminar (el comportamiento de un
+    arranque sin carga perezosa). Con ``segundo_plano`` se ejecutan en un hilo
+    y el servicio atiende desde el primer momento: las peticiones que lleguen
+    antes pagan la carga perezosa y ``listo`` indica cuando ha terminado, para
+    la comprobacion de disponibilidad (readiness). Con ``no`` no se calienta
+    nada y el servicio se considera listo desde el arranque.
+
+    Un error en una tarea se registra en ``estado`` pero no impide que el
+    servicio quede listo: lo que no se calento se cargara en su primer uso.
+    """
+
+    def __init__(self, tareas: list[tuple[str, Callable[[], object]]], modo: str = "sincrono"):
+        if modo not in MODOS_CALENTAMIENTO:
+            raise ValueError(
+                f"Modo de calentamiento desconocido: {modo} (opciones: {', '.join(MODOS_CALENTAMIENTO)})"
+            )
+        self.tareas = tareas
+        self.modo = modo
+        self._listo = threading.Event()
+        self._hilo: Optional[threading.Thread] = None
+        self.segundos: dict[str, float] = {}
+        self.errores: dict[str, str] = {}
+
+    @property
+    def listo(self) -> bool:
+        return self._listo.is_set()
+
+    def iniciar(self) -> None:
+        """Ejecuta las tareas segun el modo (en este hilo o en uno nuevo)"""
+        if self.modo == "no":
+            self._listo.set()
+        elif self.modo == "sincrono":
+            self.ejecutar()
+        elif self._hilo is None:
+            self._hilo = threading.Thread(target=self.ejecutar, name="calentamiento", daemon=True)
+            self._hilo.start()
+
+    def ejecutar(self) -> None:
+        for nombre, tarea in self.tareas:
+            inicio = time.perf_counter()
+            try:
+                tarea()
+            except Exception as e:
+                self.errores[nombre] = str(e)
+            self.segundos[nombre] = round(time.perf_counter() - inicio, 4)
+        self._listo.set()
+
+    def esperar(self, timeout: Optional[float] = None) -> bool:
+        return self._listo.wait(timeout)
+
+    def estado(self) -> dict:
+        """Modo, si el servicio esta listo y la duracion y los errores de cada tarea"""
+        return {
+            "listo": self.listo,
+            "modo": self.modo,
+            "segundos": dict(self.segundos),
+            "errores": dict(self.errores),
+        }
@@ -0,0 +1,147 @@
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Union
+
+# Forma parte de la clave: cambiarlo al modificar la maqueta del PDF invalida
+# los archivos que ya esten en el directorio de la cache
+VERSION_PDF = 1
+
+
+class CachePDF:
+    """
+    Cache de PDF ya renderizados, indexada por el hash del JSON de la factura
+
+    Si la factura no ha cambiado, un acierto evita toda la maquetacion de
+    ReportLab. Tiene dos niveles, ambos LRU y acotados en bytes:
+
+    - memoria (``max_bytes_memoria``): los PDF mas recientes como ``bytes``;
+    - disco (``directorio``, opcional): cada PDF en un archivo
+      ``<clave>.pdf``. Se sirve por ruta para que el servidor WSGI pueda usar
+      ``sendfile`` (``wsgi.file_wrapper``) sin copiar el PDF a Python, y
+      sobrevive a los reinicios.
+
+    Los PDF nuevos se escriben en los dos niveles. Un acierto en disco no se
+    sube a memoria: leerlo desde la cache de paginas del sistema ya es barato.
+    """
+
+    def __init__(
+        self,
+        max_bytes_memoria: int = 64 * 1024 * 1024,
+        directorio: Optional[Path] = None,
+        max_bytes_disco: int = 1024 * 1024 * 1024
+    ):
+        self.max_bytes_memoria = max_bytes_memoria
+        self.directorio = Path(directorio) if directorio else None
+        self.max_bytes_disco = max_bytes_disco
+        self._memoria: OrderedDict[str, bytes] = OrderedDict()
+        self._disco: OrderedDict[str, int] = OrderedDict()
+        self._bytes_memoria = 0
+        self._bytes_disco = 0
+        self._lock = threading.Lock()
+        self.aciertos_memoria = 0
+        self.aciertos_disco = 0
+        self.fallos = 0
+        self.expulsiones_memoria = 0
+        self.expulsiones_disco = 0
+
+        if self.directorio is not None:
+            self.directorio.mkdir(parents=True, exist_ok=True)
+            # Los archivos existentes se recuperan del mas antiguo al mas reciente
+            archivos = sorted(self.directorio.glob("*.pdf"), key=lambda p: p.stat().st_mtime)
+            for archivo in archivos:
+                tamano = archivo.stat().st_size
+                self._disco[archivo.stem] = tamano
+                self._bytes_disco += tamano
+            self._recortar_disco()
+
+    @property
+    def habilitada(self) -> bool:
+        return self.max_bytes_memoria > 0 or self.directorio is not None
+
+    @staticmethod
+    def calcular_clave(contenido: bytes) -> str:
+        """Clave de la factura: hash de su JSON tal como lo devuelve el backend"""
+        return hashlib.blake2b(contenido, digest_size=16, person=f"pdf-v{VERSION_PDF}".encode()).hexdigest()
+
+    def _ruta(self, clave: str) -> Path:
+        return self.directorio / f"{clave}.pdf"
+
+    def obtener(self, clave: str) -> Optional[Union[bytes, Path]]:
+        """Devuelve el PDF (``bytes`` si esta en memoria, ``Path`` si esta en disco) o None"""
+        with self._lock:
+            pdf = self._memoria.get(clave)
+            if pdf is not None:
+                self._memoria.move_to_end(clave)
+                self.aciertos_memoria += 1
+                return pdf
+            if clave in self._disco:
+                self._disco.move_to_end(clave)
+                self.aciertos_disco += 1
+                return self._ruta(clave)
+            self.fallos += 1
+            return None
+
+    def guardar(self, clave: str, pdf: bytes) -> None:
+        """Guarda el PDF en los dos niveles y expulsa los menos usados"""
+        if 0 < len(pdf) <= self.max_bytes_memoria:
+            with self._lock:
+                anterior = self._memoria.pop(clave, None)
+                if anterior is not None:
+                    self._bytes_memoria -= len(anterior)
+                self._memoria[clave] = pdf
+                self._bytes_memoria += len(pdf)
+                while self._bytes_memoria > self.max_bytes_memoria:
+                    _, expulsado = self._memoria.popitem(last=False)
+                    self._bytes_memoria -= len(expulsado)
+                    self.expulsiones_memoria += 1
+
+        if self.directorio is None or len(pdf) > self.max_bytes_disco:
+            return
+        with self._lock:
+            if clave in self._disco:
+                return
+        # Se escribe en un temporal y se renombra: nunca se sirve un PDF a medias
+        descriptor, temporal = tempfile.mkstemp(dir=self.directorio, suffix=".tmp")
+        try:
+            with os.fdopen(descriptor, "wb") as archivo:
+                archivo.write(pdf)
+            os.replace(temporal, self._ruta(clave))
+        except BaseException:
+            Path(temporal).unlink(missing_ok=True)
+            raise
+        with self._lock:
+            if clave not in self._disco:
+                self._disco[clave] = len(pdf)
+                self._bytes_disco += len(pdf)
+            self._recortar_disco()
+
+    def _recortar_disco(self) -> None:
+        while self._bytes_disco > self.max_bytes_disco:
+            clave, tamano = self._disco.popitem(last=False)
+            self._ruta(clave).unlink(missing_ok=True)
+            self._bytes_disco -= tamano
+            self.expulsiones_disco += 1
+
+    def estadisticas(self) -> dict:
+        """Devuelve la ocupacion de cada nivel y los contadores de aciertos"""
+        with self._lock:
+            aciertos = self.aciertos_memoria + self.aciertos_disco
+            consultas = aciertos + self.fallos
+            return {
+                "entradas_memoria": len(self._memoria),
+                "bytes_memoria": self._bytes_memoria,
+                "max_bytes_memoria": self.max_bytes_memoria,
+                "entradas_disco": len(self._disco),
+                "bytes_disco": self._bytes_disco,
+                "max_bytes_disco": self.max_bytes_disco if self.directorio is not None else 0,
+                "aciertos_memoria": self.aciertos_memoria,
+                "aciertos_disco": self.aciertos_disco,
+                "fallos": self.fallos,
+                "expulsiones_memoria": self.expulsiones_memoria,
+                "expulsiones_disco": self.expulsiones_disco,
+                "tasa_aciertos": aciertos / consultas if consultas else 0.0,
+            }
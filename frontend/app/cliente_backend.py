@@ -0,0 +1,115 @@
+import threading
+from typing import Callable, Optional
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+class ClienteBackend:
+    """
+    Cliente HTTP compartido para llamar al backend
+
+    Reutiliza conexiones keep-alive de un pool de tamaño fijo (``tamano_pool``
+    conexiones como maximo hacia el backend; si todas estan ocupadas la
+    peticion espera a que se libere una), aplica timeouts de conexion y de
+    lectura a todas las peticiones y reintenta errores de conexion y
+    respuestas 502/503/504 con espera exponencial. Solo se reintentan lecturas
+    y estados en metodos idempotentes; un 429 no se reintenta. ``cabeceras``
+    devuelve cabeceras que se anaden a cada peticion (por ejemplo, la
+    direccion del usuario para el limitador por cliente del backend).
+    """
+
+    ESTADOS_REINTENTO = (502, 503, 504)
+
+    def __init__(
+        self,
+        url_base: str,
+        tamano_pool: int = 20,
+        timeout_conexion: float = 2.0,
+        timeout_lectura: float = 10.0,
+        reintentos: int = 2,
+        backoff: float = 0.2,
+        cabeceras: Optional[Callable[[], dict]] = None
+    ):
+        self.url_base = url_base.rstrip("/")
+        self.tamano_pool = tamano_pool
+        self.timeout = (timeout_conexion, timeout_lectura)
+        self.cabeceras = cabeceras
+
+        reintento = Retry(
+            total=reintentos,
+            backoff_factor=backoff,
+            status_forcelist=self.ESTADOS_REINTENTO,
+            # Sin esto urllib3 reintenta los 429 tras dormir su Retry-After,
+            # ocupando el hilo y devolviendo la carga al limitador del backend
+            respect_retry_after_header=False,
+            raise_on_status=False,
+        )
+        self._adaptador = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=tamano_pool,
+            pool_block=True,
+            max_retries=reintento,
+        )
+        self.sesion = requests.Session()
+        self.sesion.mount("http://", self._adaptador)
+        self.sesion.mount("https://", self._adaptador)
+
+        self._lock = threading.Lock()
+        self._peticiones = 0
+        self._errores = 0
+        self._reintentos = 0
+
+    def _registrar(self, response: Optional[requests.Response]) -> None:
+        reintentos = getattr(getattr(response, "raw", None), "retries", None)
+        with self._lock:
+            self._peticiones += 1
+            if response is None:
+                self._errores += 1
+            elif reintentos is not None:
+                self._reintentos += len(reintentos.history)
+
+    def solicitar(self, metodo: str, ruta: str, **kwargs) -> requests.Response:
+        """Hace una peticion al backend con los timeouts por defecto"""
+        kwargs.setdefault("timeout", self.timeout)
+        if self.cabeceras is not None:
+            kwargs["headers"] = {**self.cabeceras(), **kwargs.get("headers", {})}
+        try:
+            response = self.sesion.request(metodo, f"{self.url_base}{ruta}", **kwargs)
+        except requests.RequestException:
+            self._registrar(None)
+            raise
+        self._registrar(response)
+        return response
+
+    def get(self, ruta: str, **kwargs) -> requests.Response:
+        return self.solicitar("GET", ruta, **kwargs)
+
+    def post(self, ruta: str, **kwargs) -> requests.Response:
+        return self.solicitar("POST", ruta, **kwargs)
+
+    def estadisticas(self) -> dict:
+        """Devuelve los contadores de peticiones y el uso del pool de conexiones"""
+        conexiones_creadas = 0
+        conexiones_libres = 0
+        for clave in self._adaptador.poolmanager.pools.keys():
+            pool = self._adaptador.poolmanager.pools.get(clave)
+            if pool is None:
+                continue
+            conexiones_creadas += pool.num_connections
+            # La cola del pool contiene las conexiones ociosas (o huecos vacios)
+            conexiones_libres += sum(1 for c in list(getattr(pool.pool, "queue", ())) if c is not None)
+        with self._lock:
+            return {
+                "tamano_pool": self.tamano_pool,
+                "conexiones_creadas": conexiones_creadas,
+                "conexiones_libres": conexiones_libres,
+                "peticiones": self._peticiones,
+                "errores": self._errores,
+                "reintentos": self._reintentos,
+                "timeout_conexion": self.timeout[0],
+                "timeout_lectura": self.timeout[1],
+            }
+
+    def cerrar(self) -> None:
+        self.sesion.close()
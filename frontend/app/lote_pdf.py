@@ -0,0 +1,128 @@
+import multiprocessing
+import os
+import threading
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import TYPE_CHECKING, Iterable, Iterator, Optional
+
+if TYPE_CHECKING:
+    from pdf_factura import RenderizadorFacturaPDF
+
+# Renderizador propio de cada proceso trabajador
+_renderizador_trabajador: Optional["RenderizadorFacturaPDF"] = None
+
+
+def _inicializar_trabajador() -> None:
+    """Construye una sola vez los estilos y elementos fijos del proceso"""
+    global _renderizador_trabajador
+    from pdf_factura import RenderizadorFacturaPDF
+    _renderizador_trabajador = RenderizadorFacturaPDF()
+
+
+def _renderizar(factura: dict) -> bytes:
+    return _renderizador_trabajador.renderizar(factura)
+
+
+def _renderizar_varias(facturas: list[dict]) -> bytes:
+    return _renderizador_trabajador.renderizar_varias(facturas)
+
+
+class _SalidaSinPosicion:
+    """Archivo de solo escritura que acumula lo escrito hasta que se vacia"""
+
+    def __init__(self):
+        self._partes: list[bytes] = []
+
+    def write(self, datos: bytes) -> int:
+        self._partes.append(bytes(datos))
+        return len(datos)
+
+    def flush(self) -> None:
+        pass
+
+    def vaciar(self) -> bytes:
+        datos = b"".join(self._partes)
+        self._partes.clear()
+        return datos
+
+
+def zip_en_stream(archivos: Iterable[tuple[str, bytes]]) -> Iterator[bytes]:
+    """
+    Empaqueta ``(nombre, contenido)`` en un ZIP que se emite a medida que se escribe
+
+    Como la salida no admite ``seek``, ``zipfile`` escribe el tamaño y el CRC de
+    cada entrada en un descriptor posterior, asi que nunca hay mas de un archivo
+    en memoria. Los PDF ya van comprimidos y se guardan sin volver a comprimir.
+    """
+    salida = _SalidaSinPosicion()
+    with zipfile.ZipFile(salida, "w", compression=zipfile.ZIP_STORED) as archivo_zip:
+        fecha = time.localtime()[:6]
+        for nombre, contenido in archivos:
+            archivo_zip.writestr(zipfile.ZipInfo(nombre, date_time=fecha), contenido)
+            yield salida.vaciar()
+    yield salida.vaciar()
+
+
+class RenderizadoLotePDF:
+    """
+    Renderiza lotes de facturas en PDF repartidos en un pool de procesos
+
+    Cada trabajador crea su ``RenderizadorFacturaPDF`` al arrancar. Las facturas
+    se devuelven en el orden de entrada y como maximo hay ``en_vuelo``
+    renderizados pendientes, de modo que la memoria no depende del tamaño del
+    lote. El PDF combinado se construye en un solo documento dentro de un
+    trabajador, para no ocupar el hilo de la peticion con la maquetacion.
+    """
+
+    def __init__(self, procesos: Optional[int] = None, en_vuelo: Optional[int] = None):
+        self.procesos = procesos or os.cpu_count() or 1
+        self.en_vuelo = en_vuelo or 4 * self.procesos
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _obtener_executor(self) -> ProcessPoolExecutor:
+        """Crea los procesos de renderizado con el primer lote; los siguientes lotes los comparten"""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.procesos,
+                    # Procesos nuevos: un fork copiaria la sesion HTTP y la cache de PDF de Flask
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_inicializar_trabajador,
+                )
+            return self._executor
+
+    def renderizar(self, facturas: Iterable[dict]) -> Iterator[tuple[str, bytes]]:
+        """Devuelve en orden ``(numero_factura, pdf)`` de cada factura"""
+        executor = self._obtener_executor()
+        facturas = iter(facturas)
+        pendientes: deque[tuple[str, Future]] = deque()
+        agotadas = False
+        try:
+            while True:
+                while not agotadas and len(pendientes) < self.en_vuelo:
+                    factura = next(facturas, None)
+                    if factura is None:
+                        agotadas = True
+                        break
+                    pendientes.append((factura["numero_factura"], executor.submit(_renderizar, factura)))
+                if not pendientes:
+                    return
+                numero, futuro = pendientes.popleft()
+                yield numero, futuro.result()
+        finally:
+            for _, futuro in pendientes:
+                futuro.cancel()
+
+    def renderizar_combinado(self, facturas: list[dict]) -> bytes:
+        """Genera un unico PDF con una factura por pagina"""
+        return self._obtener_executor().submit(_renderizar_varias, facturas).result()
+
+    def cerrar(self) -> None:
+        """Detiene los procesos trabajadores"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(cancel_futures=True)
+                self._executor = None
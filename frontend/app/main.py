@@ -1,19 +1,127 @@
-from flask import Flask, render_template, request, jsonify, send_file
+from flask import (
+    Flask, Response, has_request_context, render_template, request, jsonify, send_file, stream_with_context
+)
 import requests
-from reportlab.lib.pagesizes import letter
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+from prometheus_client import CONTENT_TYPE_LATEST
 from io import BytesIO
+import atexit
+import json
 import os
+import tempfile
+import metricas
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+from arranque import Calentamiento
+from cache_pdf import CachePDF
+from cliente_backend import ClienteBackend
+from lote_pdf import RenderizadoLotePDF, zip_en_stream
+from monitor_lote import eventos_lote
+from perfilado import AlmacenPerfiles, Perfilado, instrumentar as instrumentar_perfilado
 
 app = Flask(__name__)
 
+# Metricas Prometheus: latencia y peticiones por ruta (METRICAS_HABILITADAS=0 las
+# desactiva) y etapas de la generacion en uno de cada METRICAS_ETAPAS_CADA PDF
+METRICAS_HABILITADAS = os.getenv('METRICAS_HABILITADAS', '1') != '0'
+if METRICAS_HABILITADAS:
+    metricas.instrumentar(app)
+muestreo_etapas = metricas.MuestreoEtapas(
+    int(os.getenv('METRICAS_ETAPAS_CADA', '10')) if METRICAS_HABILITADAS else 0
+)
+
+# Perfilado bajo demanda: las peticiones con el token PERFIL_TOKEN (cabecera
+# X-Perfil-Token o parametro "perfil") y una fraccion PERFIL_MUESTREO del trafico
+# se perfilan por muestreo y se guardan en PERFIL_DIR (ultimos PERFIL_MAX_ARCHIVOS)
+perfilado = Perfilado(
+    AlmacenPerfiles(
+        Path(os.getenv('PERFIL_DIR', 'perfiles')),
+        max_archivos=int(os.getenv('PERFIL_MAX_ARCHIVOS', '200'))
+    ),
+    token=os.getenv('PERFIL_TOKEN'),
+    muestreo=float(os.getenv('PERFIL_MUESTREO', '0')),
+    intervalo=float(os.getenv('PERFIL_INTERVALO_MS', '1')) / 1000
+)
+if perfilado.habilitado:
+    instrumentar_perfilado(app, perfilado)
+
 # URL del backend
 BACKEND_URL = os.getenv('BACKEND_URL', 'http://backend:8000')
 
 
+def _cabeceras_usuario() -> dict:
+    """Anade la direccion del usuario a X-Forwarded-For para el limitador por cliente del backend"""
+    if not has_request_context() or not request.remote_addr:
+        return {}
+    anteriores = request.headers.get('X-Forwarded-For')
+    return {'X-Forwarded-For': f"{anteriores}, {request.remote_addr}" if anteriores else request.remote_addr}
+
+
+# Cliente compartido: conexiones keep-alive, timeouts (segundos) y reintentos
+backend = ClienteBackend(
+    BACKEND_URL,
+    tamano_pool=int(os.getenv('BACKEND_POOL', '20')),
+    timeout_conexion=float(os.getenv('BACKEND_TIMEOUT_CONEXION', '2')),
+    timeout_lectura=float(os.getenv('BACKEND_TIMEOUT_LECTURA', '10')),
+    reintentos=int(os.getenv('BACKEND_REINTENTOS', '2')),
+    backoff=float(os.getenv('BACKEND_BACKOFF', '0.2')),
+    cabeceras=_cabeceras_usuario
+)
+atexit.register(backend.cerrar)
+
+
+# ReportLab solo se importa al generar el primer PDF: /health y las consultas
+# JSON no lo necesitan
+@lru_cache(maxsize=1)
+def renderizador_pdf():
+    """Estilos y elementos fijos del PDF construidos una sola vez por proceso"""
+    from pdf_factura import RenderizadorFacturaPDF
+    return RenderizadorFacturaPDF()
+
+
+@lru_cache(maxsize=1)
+def renderizador_pdf_grande():
+    from pdf_grande import RenderizadorFacturaGrandePDF
+    return RenderizadorFacturaGrandePDF()
+
+
+# Cache de PDF por hash del JSON de la factura: memoria acotada a
+# PDF_CACHE_MEMORIA_MB (0 la desactiva) y, con PDF_CACHE_DIR, un segundo nivel
+# en disco acotado a PDF_CACHE_DISCO_MB que se sirve por ruta (sendfile)
+PDF_CACHE_DIR = os.getenv('PDF_CACHE_DIR')
+cache_pdf = CachePDF(
+    max_bytes_memoria=int(float(os.getenv('PDF_CACHE_MEMORIA_MB', '64')) * 1024 * 1024),
+    directorio=Path(PDF_CACHE_DIR) if PDF_CACHE_DIR else None,
+    max_bytes_disco=int(float(os.getenv('PDF_CACHE_DISCO_MB', '1024')) * 1024 * 1024)
+)
+if METRICAS_HABILITADAS and cache_pdf.habilitada:
+    metricas.registrar_cache_pdf(cache_pdf)
+
+# Facturas grandes: el PDF se escribe en un archivo temporal que pasa a disco
+# a partir de PDF_GRANDE_MEMORIA_MAX bytes
+PDF_GRANDE_MEMORIA_MAX = int(os.getenv('PDF_GRANDE_MEMORIA_MAX', str(16 * 1024 * 1024)))
+
+# Lotes de PDF: procesos de renderizado (por defecto uno por CPU) y tamaño maximo
+PDF_PROCESOS = int(os.getenv('PDF_PROCESOS', '0')) or None
+PDF_LOTE_MAX = int(os.getenv('PDF_LOTE_MAX', '5000'))
+renderizado_lote = RenderizadoLotePDF(procesos=PDF_PROCESOS)
+atexit.register(renderizado_lote.cerrar)
+
+# Monitor de lotes en vivo: facturas maximas por lote y por evento SSE
+MONITOR_LOTE_MAX = int(os.getenv('MONITOR_LOTE_MAX', '1000000'))
+MONITOR_FACTURAS_POR_EVENTO = int(os.getenv('MONITOR_FACTURAS_POR_EVENTO', '50'))
+
+# Calentamiento al arrancar (CALENTAMIENTO): "sincrono" carga ReportLab y
+# renderiza un PDF de prueba antes de aceptar trafico, "segundo_plano" lo hace
+# en un hilo mientras el servicio ya responde (/ready devuelve 503 hasta
+# terminar) y "no" lo deja para el primer PDF
+calentamiento = Calentamiento(
+    [('pdf', lambda: renderizador_pdf().calentar())],
+    modo=os.getenv('CALENTAMIENTO', 'sincrono')
+)
+calentamiento.iniciar()
+
+
 @app.route("/")
 def index():
     """Pagina principal"""
@@ -24,7 +132,9 @@ def index():
 def obtener_factura(numero_factura):
     """Consulta el backend para obtener una factura"""
     try:
-        response = requests.get(f"{BACKEND_URL}/api/factura/{numero_factura}")
+        response = backend.get(f"/api/factura/{numero_factura}")
+        if response.status_code == 429:
+            return _backend_limitado(response)
         response.raise_for_status()
         return jsonify(response.json())
     except requests.RequestException as e:
@@ -33,171 +143,295 @@ def obtener_factura(numero_factura):
 
 @app.route("/api/generar-pdf/<numero_factura>")
 def generar_pdf(numero_factura):
-    """Genera un PDF de la factura"""
+    """
+    Genera un PDF de la factura
+
+    Si el JSON de la factura ya se renderizo antes, el PDF sale de la cache
+    sin volver a maquetarlo; el hash del JSON se usa tambien como ETag. Solo
+    se cachean las facturas que el backend marca como estables con su propio
+    ETag (modo determinista o almacen): las aleatorias cambian en cada
+    peticion y no volverian a usarse.
+    """
+    cronometro = muestreo_etapas.cronometro()
     try:
         # Obtener datos de la factura desde el backend
-        response = requests.get(f"{BACKEND_URL}/api/factura/{numero_factura}")
+        response = backend.get(f"/api/factura/{numero_factura}")
+        if response.status_code == 429:
+            return _backend_limitado(response)
         response.raise_for_status()
+        clave = None
+        if cache_pdf.habilitada and 'ETag' in response.headers:
+            clave = cache_pdf.calcular_clave(response.content)
+            cacheado = cache_pdf.obtener(clave)
+            if cacheado is not None:
+                try:
+                    return _enviar_pdf(cacheado, numero_factura, clave)
+                except FileNotFoundError:
+                    pass  # Expulsado del disco entre la consulta y el envio: se renderiza
         factura = response.json()
+        if cronometro:
+            cronometro.marcar("backend")
         
-        # Crear el PDF en memoria
-        buffer = BytesIO()
-        pdf = SimpleDocTemplate(buffer, pagesize=letter, rightMargin=50, leftMargin=50,
-                               topMargin=50, bottomMargin=50)
-        
-        # Contenedor de elementos del PDF
-        elementos = []
-        estilos = getSampleStyleSheet()
+        # Crear el PDF en memoria con el renderizador compartido
+        pdf = renderizador_pdf().renderizar(factura, cronometro)
+        if cronometro:
+            cronometro.publicar()
+        if clave is not None:
+            cache_pdf.guardar(clave, pdf)
         
-        # Estilo personalizado para el titulo
-        estilo_titulo = ParagraphStyle(
-            'CustomTitle',
-            parent=estilos['Heading1'],
-            fontSize=24,
-            textColor=colors.HexColor('#D2691E'),
-            spaceAfter=30,
-            alignment=1  # Centrado
-        )
+        return _enviar_pdf(pdf, numero_factura, clave)
         
-        # Estilo para subtitulos
-        estilo_subtitulo = ParagraphStyle(
-            'CustomSubtitle',
-            parent=estilos['Heading2'],
-            fontSize=14,
-            textColor=colors.HexColor('#8B4513'),
-            spaceAfter=12
+    except requests.RequestException as e:
+        return jsonify({"error": f"Error al conectar con el backend: {str(e)}"}), 500
+    except Exception as e:
+        return jsonify({"error": f"Error al generar PDF: {str(e)}"}), 500
+
+
+def _backend_limitado(response):
+    """Traslada al usuario el 429 del backend (tasa por cliente o generacion saturada) con su Retry-After"""
+    with response:
+        try:
+            detalle = response.json().get('detail')
+        except ValueError:
+            detalle = None
+    respuesta = jsonify({"error": detalle or "Backend saturado, reintente mas tarde"})
+    respuesta.status_code = 429
+    if 'Retry-After' in response.headers:
+        respuesta.headers['Retry-After'] = response.headers['Retry-After']
+    return respuesta
+
+
+def _enviar_pdf(pdf, numero_factura: str, etag: Optional[str]):
+    """Envia el PDF (``bytes`` o ruta en disco); con ``etag`` responde 304 si el cliente ya lo tiene"""
+    return send_file(
+        BytesIO(pdf) if isinstance(pdf, bytes) else pdf,
+        mimetype='application/pdf',
+        as_attachment=True,
+        download_name=f'factura_{numero_factura}.pdf',
+        etag=etag or True
+    )
+
+
+@app.route("/api/cache-pdf/estadisticas")
+def estadisticas_cache_pdf():
+    """Ocupacion, aciertos por nivel y tasa de aciertos de la cache de PDF"""
+    return jsonify({"habilitada": cache_pdf.habilitada, **cache_pdf.estadisticas()})
+
+
+@app.route("/api/generar-pdf-grande/<numero_factura>")
+def generar_pdf_grande(numero_factura):
+    """
+    Genera el PDF de una factura con muchas lineas (parametro ``lineas``)
+
+    La factura se pide al backend como NDJSON y cada linea se dibuja al
+    llegar, sin tener la factura completa en memoria.
+    """
+    lineas = request.args.get('lineas', 10000, type=int)
+    if lineas < 1:
+        return jsonify({"error": "'lineas' debe ser un entero positivo"}), 400
+    try:
+        response = backend.get(
+            f"/api/factura/{numero_factura}/grande",
+            params={"lineas": lineas, "formato": "ndjson"},
+            stream=True
         )
-        
-        # Titulo
-        elementos.append(Paragraph("FACTURA DE VENTA", estilo_titulo))
-        elementos.append(Spacer(1, 0.3*inch))
-        
-        # Informacion de la factura
-        info_factura = [
-            ['Numero de Factura:', factura['numero_factura']],
-            ['Fecha de Emision:', factura['fecha_emision']]
-        ]
-        tabla_info = Table(info_factura, colWidths=[2*inch, 4*inch])
-        tabla_info.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#F5DEB3')),
-            ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-            ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#D2691E'))
-        ]))
-        elementos.append(tabla_info)
-        elementos.append(Spacer(1, 0.3*inch))
-        
-        # Datos de la empresa
-        elementos.append(Paragraph("Datos de la Empresa", estilo_subtitulo))
-        empresa = factura['empresa']
-        datos_empresa = [
-            ['Nombre:', empresa['nombre']],
-            ['Direccion:', empresa['direccion']],
-            ['Telefono:', empresa['telefono']],
-            ['Email:', empresa['email']]
-        ]
-        tabla_empresa = Table(datos_empresa, colWidths=[1.5*inch, 4.5*inch])
-        tabla_empresa.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#FFE4B5')),
-            ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 9),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey)
-        ]))
-        elementos.append(tabla_empresa)
-        elementos.append(Spacer(1, 0.2*inch))
-        
-        # Datos del cliente
-        elementos.append(Paragraph("Datos del Cliente", estilo_subtitulo))
-        cliente = factura['cliente']
-        datos_cliente = [
-            ['Nombre:', cliente['nombre']],
-            ['Direccion:', cliente['direccion']],
-            ['Telefono:', cliente['telefono']]
-        ]
-        tabla_cliente = Table(datos_cliente, colWidths=[1.5*inch, 4.5*inch])
-        tabla_cliente.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#FFE4B5')),
-            ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 9),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey)
-        ]))
-        elementos.append(tabla_cliente)
-        elementos.append(Spacer(1, 0.3*inch))
-        
-        # Detalle de productos
-        elementos.append(Paragraph("Detalle de Productos", estilo_subtitulo))
-        datos_productos = [['Producto', 'Categoria', 'Cantidad', 'P. Unitario', 'Subtotal']]
-        for item in factura['detalle']:
-            subtotal_item = item['cantidad'] * item['precio_unitario']
-            datos_productos.append([
-                item['producto'],
-                item['categoria'],
-                str(item['cantidad']),
-                f"${item['precio_unitario']:,.0f}",
-                f"${subtotal_item:,.0f}"
-            ])
-        
-        tabla_productos = Table(datos_productos, colWidths=[2*inch, 1.3*inch, 0.8*inch, 1*inch, 1*inch])
-        tabla_productos.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#D2691E')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#8B4513')),
-            ('FONTSIZE', (0, 1), (-1, -1), 9)
-        ]))
-        elementos.append(tabla_productos)
-        elementos.append(Spacer(1, 0.3*inch))
-        
-        # Totales
-        datos_totales = [
-            ['Subtotal:', f"${factura['subtotal']:,.2f}"],
-            ['Impuesto (IVA 19%):', f"${factura['impuesto']:,.2f}"],
-            ['TOTAL:', f"${factura['total']:,.2f}"]
-        ]
-        tabla_totales = Table(datos_totales, colWidths=[4*inch, 2*inch])
-        tabla_totales.setStyle(TableStyle([
-            ('ALIGN', (0, 0), (-1, -1), 'RIGHT'),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTNAME', (0, 2), (1, 2), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 11),
-            ('FONTSIZE', (0, 2), (1, 2), 14),
-            ('TEXTCOLOR', (0, 2), (1, 2), colors.HexColor('#D2691E')),
-            ('BACKGROUND', (1, 2), (1, 2), colors.HexColor('#FFE4B5')),
-            ('LINEABOVE', (0, 2), (-1, 2), 2, colors.HexColor('#D2691E')),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 8)
-        ]))
-        elementos.append(tabla_totales)
-        
-        # Construir el PDF
-        pdf.build(elementos)
-        buffer.seek(0)
-        
+        if response.status_code == 422:
+            response.close()
+            return jsonify({"error": "Numero de lineas fuera del limite del backend"}), 400
+        if response.status_code == 429:
+            return _backend_limitado(response)
+        response.raise_for_status()
+        salida = tempfile.SpooledTemporaryFile(max_size=PDF_GRANDE_MEMORIA_MAX)
+        try:
+            renderizador_pdf_grande().renderizar(_lineas_json(response), salida)
+        except BaseException:
+            salida.close()
+            raise
+        salida.seek(0)
         return send_file(
-            buffer,
+            salida,
             mimetype='application/pdf',
             as_attachment=True,
             download_name=f'factura_{numero_factura}.pdf'
         )
-        
     except requests.RequestException as e:
         return jsonify({"error": f"Error al conectar con el backend: {str(e)}"}), 500
     except Exception as e:
         return jsonify({"error": f"Error al generar PDF: {str(e)}"}), 500
 
 
+def _solicitud_lote(datos: dict) -> dict:
+    """Valida el cuerpo del lote de PDF y construye la solicitud al backend"""
+    if not isinstance(datos, dict):
+        raise ValueError("El cuerpo debe ser un objeto JSON")
+    numeros = datos.get('numeros')
+    if numeros is not None:
+        if not isinstance(numeros, list) or not numeros or not all(isinstance(n, str) for n in numeros):
+            raise ValueError("'numeros' debe ser una lista no vacia de numeros de factura")
+        cantidad = len(numeros)
+        solicitud = {"numeros": numeros}
+    else:
+        cantidad = datos.get('cantidad')
+        if not isinstance(cantidad, int) or cantidad < 1:
+            raise ValueError("Indica 'numeros' o una 'cantidad' positiva")
+        solicitud = {
+            "cantidad": cantidad,
+            "prefijo": datos.get('prefijo', 'FAC-'),
+            "inicio": datos.get('inicio', 1)
+        }
+    if cantidad > PDF_LOTE_MAX:
+        raise ValueError(f"El lote admite como maximo {PDF_LOTE_MAX} facturas")
+    return solicitud
+
+
+def _facturas_lote(solicitud: dict):
+    """Pide el lote al backend en una sola llamada y lo lee linea a linea (NDJSON)"""
+    response = backend.post("/api/facturas/lote", json=solicitud, stream=True)
+    try:
+        response.raise_for_status()
+    except requests.RequestException:
+        response.close()
+        raise
+    return _lineas_json(response)
+
+
+def _lineas_json(response):
+    # Cerrar la respuesta devuelve la conexion al pool aunque el cliente corte el stream
+    with response:
+        for linea in response.iter_lines():
+            if linea:
+                yield json.loads(linea)
+
+
+@app.route("/api/generar-pdf-lote", methods=["POST"])
+def generar_pdf_lote():
+    """
+    Genera los PDF de un lote de facturas
+
+    Acepta ``numeros`` (lista) o ``prefijo``/``inicio``/``cantidad`` (rango) y
+    ``formato``: ``zip`` (por defecto, un PDF por factura emitido en stream) o
+    ``pdf`` (un unico documento con una factura por pagina).
+    """
+    datos = request.get_json(silent=True)
+    formato = (datos or {}).get('formato', 'zip')
+    try:
+        if formato not in ('zip', 'pdf'):
+            raise ValueError("'formato' debe ser 'zip' o 'pdf'")
+        solicitud = _solicitud_lote(datos)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        facturas = _facturas_lote(solicitud)
+        if formato == 'pdf':
+            pdf = renderizado_lote.renderizar_combinado(list(facturas))
+            return send_file(
+                BytesIO(pdf),
+                mimetype='application/pdf',
+                as_attachment=True,
+                download_name='facturas.pdf'
+            )
+    except requests.RequestException as e:
+        return jsonify({"error": f"Error al conectar con el backend: {str(e)}"}), 500
+    except Exception as e:
+        return jsonify({"error": f"Error al generar PDF: {str(e)}"}), 500
+
+    pdfs = (
+        (f"factura_{numero}.pdf", pdf)
+        for numero, pdf in renderizado_lote.renderizar(facturas)
+    )
+    return Response(
+        stream_with_context(zip_en_stream(pdfs)),
+        mimetype='application/zip',
+        headers={"Content-Disposition": "attachment; filename=facturas.zip"}
+    )
+
+
+@app.route("/api/monitor-lote")
+def monitor_lote():
+    """
+    Genera un lote en el backend y lo emite en vivo como server-sent events
+
+    Parametros: ``cantidad``, ``prefijo``, ``inicio`` y ``semilla``. El lote
+    se lee del NDJSON de ``/api/facturas/lote`` factura a factura y se
+    reenvia en grupos, sin guardarlo en memoria.
+    """
+    cantidad = request.args.get('cantidad', type=int)
+    if cantidad is None or not 1 <= cantidad <= MONITOR_LOTE_MAX:
+        return jsonify({"error": f"'cantidad' debe estar entre 1 y {MONITOR_LOTE_MAX}"}), 400
+    solicitud = {
+        "cantidad": cantidad,
+        "prefijo": request.args.get('prefijo', 'FAC-'),
+        "inicio": request.args.get('inicio', 1, type=int),
+    }
+    semilla = request.args.get('semilla', type=int)
+    if semilla is not None:
+        solicitud["semilla"] = semilla
+
+    try:
+        facturas = _facturas_lote(solicitud)
+    except requests.RequestException as e:
+        return jsonify({"error": f"Error al conectar con el backend: {str(e)}"}), 500
+    return Response(
+        stream_with_context(eventos_lote(facturas, cantidad, por_evento=MONITOR_FACTURAS_POR_EVENTO)),
+        mimetype='text/event-stream',
+        # Sin cache ni buffering de proxies intermedios (nginx) para que los eventos lleguen al momento
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.route("/api/backend/estadisticas")
+def estadisticas_backend():
+    """Uso del pool de conexiones hacia el backend"""
+    return jsonify(backend.estadisticas())
+
+
+def _autorizar_perfiles():
+    """Los perfiles solo se consultan con ``Authorization: Bearer <PERFIL_TOKEN>``"""
+    if perfilado.token is None:
+        return jsonify({"error": "Perfilado no habilitado"}), 404
+    esquema, _, token = request.headers.get('Authorization', '').partition(' ')
+    if esquema.lower() != 'bearer' or not perfilado.token_valido(token):
+        return jsonify({"error": "Token de perfilado invalido"}), 403
+    return None
+
+
+@app.route("/api/perfiles")
+def listar_perfiles():
+    """Perfiles guardados, del mas reciente al mas antiguo"""
+    error = _autorizar_perfiles()
+    if error:
+        return error
+    return jsonify(perfilado.almacen.listar())
+
+
+@app.route("/api/perfiles/<nombre>")
+def obtener_perfil(nombre):
+    """Perfil en formato de pilas plegadas (flamegraph.pl, speedscope)"""
+    error = _autorizar_perfiles()
+    if error:
+        return error
+    contenido = perfilado.almacen.leer(nombre)
+    if contenido is None:
+        return jsonify({"error": "Perfil no encontrado"}), 404
+    return Response(contenido, mimetype='text/plain')
+
+
+@app.route("/metrics")
+def exponer_metricas():
+    """Metricas en formato de texto de Prometheus"""
+    return Response(metricas.exponer(), mimetype=CONTENT_TYPE_LATEST)
+
+
+@app.route("/ready")
+def readiness_check():
+    """Indica si el servicio termino de calentarse y puede recibir trafico (503 si no)"""
+    estado = calentamiento.estado()
+    if not estado['listo']:
+        return jsonify({"status": "calentando", **estado}), 503
+    return jsonify({"status": "ok", **estado})
+
+
 @app.route("/health")
 def health_check():
     """Endpoint para verificar el estado del servicio"""
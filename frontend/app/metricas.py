@@ -0,0 +1,133 @@
+import itertools
+import time
+from typing import Optional
+from flask import Flask, g, request
+from prometheus_client import CollectorRegistry, Counter, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+# Registro propio del servicio (no el global de prometheus_client)
+REGISTRO = CollectorRegistry(auto_describe=True)
+
+PETICIONES = Counter(
+    "frontend_peticiones",
+    "Peticiones HTTP atendidas",
+    ["metodo", "ruta", "estado"],
+    registry=REGISTRO,
+)
+LATENCIA = Histogram(
+    "frontend_peticion_segundos",
+    "Latencia de las peticiones HTTP por ruta (hasta devolver la respuesta, sin el stream)",
+    ["metodo", "ruta"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+    registry=REGISTRO,
+)
+ETAPAS = Histogram(
+    "frontend_etapa_segundos",
+    "Duracion de cada etapa de la generacion de un PDF (peticiones muestreadas)",
+    ["etapa"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+    registry=REGISTRO,
+)
+
+# Rutas que no encajan con ninguna regla comparten etiqueta (evita cardinalidad ilimitada)
+RUTA_DESCONOCIDA = "desconocida"
+
+
+class Cronometro:
+    """Mide etapas consecutivas: cada ``marcar`` registra el tiempo desde la marca anterior"""
+
+    __slots__ = ("_ultima", "_etapas")
+
+    def __init__(self):
+        self._ultima = time.perf_counter()
+        self._etapas: list[tuple[str, float]] = []
+
+    def marcar(self, etapa: str) -> None:
+        ahora = time.perf_counter()
+        self._etapas.append((etapa, ahora - self._ultima))
+        self._ultima = ahora
+
+    def publicar(self) -> None:
+        for etapa, segundos in self._etapas:
+            ETAPAS.labels(etapa).observe(segundos)
+
+
+class MuestreoEtapas:
+    """Decide que peticiones miden sus etapas: una de cada ``cada`` (0 desactiva)"""
+
+    def __init__(self, cada: int = 10):
+        self.cada = cada
+        self._contador = itertools.count()
+
+    def cronometro(self) -> Optional[Cronometro]:
+        """Devuelve un cronometro si a esta peticion le toca medir sus etapas"""
+        if self.cada <= 0 or next(self._contador) % self.cada:
+            return None
+        return Cronometro()
+
+
+def instrumentar(app: Flask) -> None:
+    """Cuenta las peticiones de la app y mide su latencia por regla de ruta"""
+    # ``labels`` toma un lock y construye la clave en cada llamada: los hijos se cachean
+    latencias: dict[tuple[str, str], object] = {}
+    peticiones: dict[tuple[str, str, int], object] = {}
+
+    @app.before_request
+    def _iniciar():
+        g.metricas_inicio = time.perf_counter()
+
+    @app.after_request
+    def _observar(response):
+        inicio = g.pop("metricas_inicio", None)
+        if inicio is None:
+            return response
+        segundos = time.perf_counter() - inicio
+        metodo = request.method
+        regla = request.url_rule.rule if request.url_rule is not None else RUTA_DESCONOCIDA
+        estado = response.status_code
+
+        latencia = latencias.get((metodo, regla))
+        if latencia is None:
+            latencia = latencias[(metodo, regla)] = LATENCIA.labels(metodo, regla)
+        contador = peticiones.get((metodo, regla, estado))
+        if contador is None:
+            contador = peticiones[(metodo, regla, estado)] = PETICIONES.labels(metodo, regla, str(estado))
+        latencia.observe(segundos)
+        contador.inc()
+        return response
+
+
+class _ColectorCachePDF:
+    """Lee los contadores de la cache de PDF al exponer las metricas"""
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    def collect(self):
+        estadisticas = self.cache.estadisticas()
+        aciertos = CounterMetricFamily(
+            "frontend_cache_pdf_aciertos", "PDF servidos desde la cache, por nivel", labels=["nivel"]
+        )
+        aciertos.add_metric(["memoria"], estadisticas["aciertos_memoria"])
+        aciertos.add_metric(["disco"], estadisticas["aciertos_disco"])
+        yield aciertos
+        yield CounterMetricFamily(
+            "frontend_cache_pdf_fallos", "PDF que no estaban en la cache y se renderizaron",
+            value=estadisticas["fallos"]
+        )
+        ocupacion = GaugeMetricFamily(
+            "frontend_cache_pdf_bytes", "Bytes ocupados por la cache de PDF, por nivel", labels=["nivel"]
+        )
+        ocupacion.add_metric(["memoria"], estadisticas["bytes_memoria"])
+        ocupacion.add_metric(["disco"], estadisticas["bytes_disco"])
+        yield ocupacion
+
+
+def registrar_cache_pdf(cache) -> None:
+    """Expone los aciertos, fallos y ocupacion de la cache de PDF sin coste en las peticiones"""
+    REGISTRO.register(_ColectorCachePDF(cache))
+
+
+def exponer() -> bytes:
+    """Devuelve las metricas en el formato de texto de Prometheus"""
+    return generate_latest(REGISTRO)
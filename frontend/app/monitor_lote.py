@@ -0,0 +1,69 @@
+import json
+import time
+from typing import Iterable, Iterator
+
+
+def evento_sse(nombre: str, datos) -> bytes:
+    """Codifica un evento ``text/event-stream`` con datos JSON en una sola linea"""
+    return f"event: {nombre}\ndata: {json.dumps(datos, separators=(',', ':'))}\n\n".encode()
+
+
+def resumen_factura(factura: dict) -> dict:
+    """Campos de una factura que se muestran en el monitor (sin el detalle)"""
+    return {
+        "numero_factura": factura["numero_factura"],
+        "fecha_emision": factura["fecha_emision"],
+        "cliente": factura["cliente"]["nombre"],
+        "ciudad": factura["cliente"]["direccion"].rpartition(", ")[2],
+        "lineas": len(factura["detalle"]),
+        "total": factura["total"],
+    }
+
+
+def eventos_lote(
+    facturas: Iterable[dict],
+    cantidad: int,
+    por_evento: int = 50,
+    intervalo: float = 0.25
+) -> Iterator[bytes]:
+    """
+    Convierte el stream de facturas de un lote en server-sent events
+
+    Agrupa los resumenes en eventos ``lote`` de hasta ``por_evento`` facturas
+    (o los que hayan llegado en ``intervalo`` segundos) con el progreso
+    acumulado, y termina con un evento ``fin`` o ``fallo``. Solo hay un grupo
+    en memoria: el generador lee la siguiente factura cuando el servidor WSGI
+    ha entregado el evento anterior, asi que un cliente lento frena la lectura
+    del backend (y este la generacion) en lugar de acumular el lote aqui.
+    """
+    inicio = ultimo = time.monotonic()
+    grupo: list[dict] = []
+    emitidas = 0
+    importe = 0.0
+
+    def progreso() -> dict:
+        return {
+            "emitidas": emitidas,
+            "cantidad": cantidad,
+            "importe": round(importe, 2),
+            "segundos": round(time.monotonic() - inicio, 3),
+        }
+
+    # Un comentario inicial envia las cabeceras sin esperar a la primera factura
+    yield b": inicio\n\n"
+    try:
+        for factura in facturas:
+            grupo.append(resumen_factura(factura))
+            emitidas += 1
+            importe += factura["total"]
+            ahora = time.monotonic()
+            if len(grupo) >= por_evento or ahora - ultimo >= intervalo:
+                yield evento_sse("lote", {"facturas": grupo, **progreso()})
+                grupo = []
+                ultimo = ahora
+    except Exception as e:
+        yield evento_sse("fallo", {"error": f"Error al leer el lote del backend: {str(e)}", **progreso()})
+        return
+    if grupo:
+        yield evento_sse("lote", {"facturas": grupo, **progreso()})
+    yield evento_sse("fin", progreso())
@@ -0,0 +1,208 @@
+import copy
+from io import BytesIO
+from reportlab import rl_config
+from reportlab.lib.pagesizes import letter
+from reportlab.lib import colors
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import inch
+from typing import Iterable
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
+
+# Los streams comprimidos se escriben en binario: codificarlos en ASCII85 (en
+# Python puro) cuesta mas de un 10% del renderizado y aumenta el tamaño del PDF
+rl_config.useA85 = 0
+
+
+class RenderizadorFacturaPDF:
+    """
+    Renderizador reutilizable del PDF de una factura
+
+    Los estilos de parrafo, los estilos de tabla y los parrafos fijos (titulo y
+    subtitulos) se construyen una sola vez por proceso; en cada factura solo se
+    maquetan sus datos. ReportLab guarda en cada elemento el resultado de la
+    maquetacion y el lienzo en que se dibuja, asi que ningun elemento se
+    comparte entre renderizados: los parrafos fijos se copian y los
+    espaciadores se crean de nuevo. Asi el renderizador puede usarse desde
+    varios hilos a la vez.
+    """
+
+    def __init__(self):
+        estilos = getSampleStyleSheet()
+
+        # Estilo personalizado para el titulo
+        self.estilo_titulo = ParagraphStyle(
+            'CustomTitle',
+            parent=estilos['Heading1'],
+            fontSize=24,
+            textColor=colors.HexColor('#D2691E'),
+            spaceAfter=30,
+            alignment=1  # Centrado
+        )
+
+        # Estilo para subtitulos
+        self.estilo_subtitulo = ParagraphStyle(
+            'CustomSubtitle',
+            parent=estilos['Heading2'],
+            fontSize=14,
+            textColor=colors.HexColor('#8B4513'),
+            spaceAfter=12
+        )
+
+        self.estilo_info = TableStyle([
+            ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#F5DEB3')),
+            ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+            ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#D2691E'))
+        ])
+
+        # Empresa y cliente comparten estilo
+        self.estilo_datos = TableStyle([
+            ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#FFE4B5')),
+            ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 9),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey)
+        ])
+
+        self.estilo_productos = TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#D2691E')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+            ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#8B4513')),
+            ('FONTSIZE', (0, 1), (-1, -1), 9)
+        ])
+
+        self.estilo_totales = TableStyle([
+            ('ALIGN', (0, 0), (-1, -1), 'RIGHT'),
+            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+            ('FONTNAME', (0, 2), (1, 2), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 11),
+            ('FONTSIZE', (0, 2), (1, 2), 14),
+            ('TEXTCOLOR', (0, 2), (1, 2), colors.HexColor('#D2691E')),
+            ('BACKGROUND', (1, 2), (1, 2), colors.HexColor('#FFE4B5')),
+            ('LINEABOVE', (0, 2), (-1, 2), 2, colors.HexColor('#D2691E')),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 8)
+        ])
+
+        # Elementos fijos
+        self.titulo = Paragraph("FACTURA DE VENTA", self.estilo_titulo)
+        self.subtitulo_empresa = Paragraph("Datos de la Empresa", self.estilo_subtitulo)
+        self.subtitulo_cliente = Paragraph("Datos del Cliente", self.estilo_subtitulo)
+        self.subtitulo_productos = Paragraph("Detalle de Productos", self.estilo_subtitulo)
+
+    def elementos(self, factura: dict) -> list:
+        """Construye los elementos del PDF con los datos de la factura"""
+        elementos = [copy.copy(self.titulo), Spacer(1, 0.3*inch)]
+
+        # Informacion de la factura
+        info_factura = [
+            ['Numero de Factura:', factura['numero_factura']],
+            ['Fecha de Emision:', factura['fecha_emision']]
+        ]
+        tabla_info = Table(info_factura, colWidths=[2*inch, 4*inch])
+        tabla_info.setStyle(self.estilo_info)
+        elementos.extend([tabla_info, Spacer(1, 0.3*inch)])
+
+        # Datos de la empresa
+        empresa = factura['empresa']
+        datos_empresa = [
+            ['Nombre:', empresa['nombre']],
+            ['Direccion:', empresa['direccion']],
+            ['Telefono:', empresa['telefono']],
+            ['Email:', empresa['email']]
+        ]
+        tabla_empresa = Table(datos_empresa, colWidths=[1.5*inch, 4.5*inch])
+        tabla_empresa.setStyle(self.estilo_datos)
+        elementos.extend([copy.copy(self.subtitulo_empresa), tabla_empresa, Spacer(1, 0.2*inch)])
+
+        # Datos del cliente
+        cliente = factura['cliente']
+        datos_cliente = [
+            ['Nombre:', cliente['nombre']],
+            ['Direccion:', cliente['direccion']],
+            ['Telefono:', cliente['telefono']]
+        ]
+        tabla_cliente = Table(datos_cliente, colWidths=[1.5*inch, 4.5*inch])
+        tabla_cliente.setStyle(self.estilo_datos)
+        elementos.extend([copy.copy(self.subtitulo_cliente), tabla_cliente, Spacer(1, 0.3*inch)])
+
+        # Detalle de productos
+        datos_productos = [['Producto', 'Categoria', 'Cantidad', 'P. Unitario', 'Subtotal']]
+        for item in factura['detalle']:
+            subtotal_item = item['cantidad'] * item['precio_unitario']
+            datos_productos.append([
+                item['producto'],
+                item['categoria'],
+                str(item['cantidad']),
+                f"${item['precio_unitario']:,.0f}",
+                f"${subtotal_item:,.0f}"
+            ])
+        tabla_productos = Table(datos_productos, colWidths=[2*inch, 1.3*inch, 0.8*inch, 1*inch, 1*inch])
+        tabla_productos.setStyle(self.estilo_productos)
+        elementos.extend([copy.copy(self.subtitulo_productos), tabla_productos, Spacer(1, 0.3*inch)])
+
+        # Totales
+        datos_totales = [
+            ['Subtotal:', f"${factura['subtotal']:,.2f}"],
+            ['Impuesto (IVA 19%):', f"${factura['impuesto']:,.2f}"],
+            ['TOTAL:', f"${factura['total']:,.2f}"]
+        ]
+        tabla_totales = Table(datos_totales, colWidths=[4*inch, 2*inch])
+        tabla_totales.setStyle(self.estilo_totales)
+        elementos.append(tabla_totales)
+
+        return elementos
+
+    def calentar(self) -> None:
+        """Renderiza una factura de ejemplo para cargar fuentes y modulos de ReportLab"""
+        self.renderizar({
+            'numero_factura': 'CALENTAMIENTO',
+            'fecha_emision': '2025-01-01',
+            'empresa': {'nombre': '-', 'direccion': '-', 'telefono': '-', 'email': '-'},
+            'cliente': {'nombre': '-', 'direccion': '-', 'telefono': '-'},
+            'detalle': [{'producto': '-', 'categoria': '-', 'cantidad': 1, 'precio_unitario': 1.0}],
+            'subtotal': 1.0,
+            'impuesto': 0.19,
+            'total': 1.19,
+        })
+
+    @staticmethod
+    def _construir(elementos: list) -> bytes:
+        buffer = BytesIO()
+        pdf = SimpleDocTemplate(buffer, pagesize=letter, rightMargin=50, leftMargin=50,
+                                topMargin=50, bottomMargin=50)
+        pdf.build(elementos)
+        return buffer.getvalue()
+
+    def renderizar(self, factura: dict, cronometro=None) -> bytes:
+        """
+        Genera el PDF de la factura y devuelve su contenido
+
+        Con ``cronometro`` se marcan por separado la maquetacion de los
+        elementos y ``pdf.build``.
+        """
+        elementos = self.elementos(factura)
+        if cronometro is None:
+            return self._construir(elementos)
+        cronometro.marcar("maquetacion")
+        contenido = self._construir(elementos)
+        cronometro.marcar("pdf_build")
+        return contenido
+
+    def renderizar_varias(self, facturas: Iterable[dict]) -> bytes:
+        """Genera un unico PDF con las facturas, cada una empezando en una pagina nueva"""
+        elementos = []
+        for factura in facturas:
+            if elementos:
+                elementos.append(PageBreak())
+            elementos.extend(self.elementos(factura))
+        return self._construir(elementos)
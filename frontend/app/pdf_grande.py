@@ -0,0 +1,172 @@
+from typing import BinaryIO, Iterable
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfgen.canvas import Canvas
+
+MARGEN = 50
+ALTO_FILA = 13
+# Columnas del detalle: (titulo, x, alineacion); las numericas se alinean a la derecha
+COLUMNAS = (
+    ("Producto", MARGEN, "izquierda"),
+    ("Categoria", MARGEN + 190, "izquierda"),
+    ("Cantidad", MARGEN + 340, "derecha"),
+    ("P. Unitario", MARGEN + 420, "derecha"),
+    ("Subtotal", MARGEN + 512, "derecha"),
+)
+NARANJA = colors.HexColor('#D2691E')
+MARRON = colors.HexColor('#8B4513')
+
+
+class RenderizadorFacturaGrandePDF:
+    """
+    PDF de facturas con miles de lineas, dibujado linea a linea sobre el canvas
+
+    ``RenderizadorFacturaPDF`` maqueta el detalle en una sola tabla de
+    platypus, que necesita todas las filas en memoria y cuyo coste crece mas
+    que linealmente. Aqui las lineas llegan de un iterador (el NDJSON del
+    backend) y se dibujan directamente: cada pagina repite la cabecera de la
+    tabla y lleva al pie el subtotal acumulado. ReportLab conserva las paginas
+    ya terminadas (comprimidas) hasta ``save``, asi que la memoria crece con
+    el PDF comprimido, no con las lineas.
+    """
+
+    def __init__(self, pagesize=letter):
+        self.pagesize = pagesize
+        self.ancho, self.alto = pagesize
+
+    def renderizar(self, filas: Iterable[dict], salida: BinaryIO) -> int:
+        """
+        Escribe en ``salida`` el PDF de una factura en formato NDJSON del backend
+
+        ``filas`` empieza con el encabezado, sigue con una fila por producto y
+        termina con los totales. Devuelve el numero de paginas.
+        """
+        filas = iter(filas)
+        encabezado = next(filas)
+        canvas = Canvas(salida, pagesize=self.pagesize, pageCompression=1)
+        canvas.setTitle(f"Factura {encabezado['numero_factura']}")
+
+        pagina = 1
+        y = self._encabezado(canvas, encabezado)
+        y = self._cabecera_tabla(canvas, y)
+        subtotal = 0.0
+        totales = None
+        for fila in filas:
+            if 'producto' not in fila:
+                totales = fila
+                break
+            if y < MARGEN + 2 * ALTO_FILA:
+                self._pie(canvas, pagina, subtotal)
+                canvas.showPage()
+                pagina += 1
+                y = self._cabecera_tabla(canvas, self.alto - MARGEN)
+            subtotal_fila = fila['cantidad'] * fila['precio_unitario']
+            subtotal += subtotal_fila
+            self._fila(canvas, y, (
+                fila['producto'],
+                fila['categoria'],
+                str(fila['cantidad']),
+                f"${fila['precio_unitario']:,.0f}",
+                f"${subtotal_fila:,.0f}",
+            ))
+            y -= ALTO_FILA
+        if totales is None:
+            raise ValueError("El stream de la factura termino sin totales")
+
+        if y < MARGEN + 5 * ALTO_FILA:
+            self._pie(canvas, pagina, subtotal)
+            canvas.showPage()
+            pagina += 1
+            y = self.alto - MARGEN
+        self._totales(canvas, y - ALTO_FILA, totales)
+        self._pie(canvas, pagina, subtotal)
+        canvas.save()
+        return pagina
+
+    def _encabezado(self, canvas: Canvas, factura: dict) -> float:
+        """Titulo y datos de la factura, la empresa y el cliente; devuelve la altura libre"""
+        y = self.alto - MARGEN - 20
+        canvas.setFillColor(NARANJA)
+        canvas.setFont('Helvetica-Bold', 20)
+        canvas.drawCentredString(self.ancho / 2, y, "FACTURA DE VENTA")
+        y -= 30
+
+        empresa = factura['empresa']
+        cliente = factura['cliente']
+        bloques = (
+            ("Factura", (
+                ("Numero de Factura:", factura['numero_factura']),
+                ("Fecha de Emision:", factura['fecha_emision']),
+            )),
+            ("Datos de la Empresa", (
+                ("Nombre:", empresa['nombre']),
+                ("Direccion:", empresa['direccion']),
+                ("Telefono:", empresa['telefono']),
+                ("Email:", empresa['email']),
+            )),
+            ("Datos del Cliente", (
+                ("Nombre:", cliente['nombre']),
+                ("Direccion:", cliente['direccion']),
+                ("Telefono:", cliente['telefono']),
+            )),
+        )
+        for titulo, datos in bloques:
+            canvas.setFillColor(MARRON)
+            canvas.setFont('Helvetica-Bold', 12)
+            canvas.drawString(MARGEN, y, titulo)
+            y -= 16
+            canvas.setFillColor(colors.black)
+            for etiqueta, valor in datos:
+                canvas.setFont('Helvetica-Bold', 9)
+                canvas.drawString(MARGEN, y, etiqueta)
+                canvas.setFont('Helvetica', 9)
+                canvas.drawString(MARGEN + 110, y, valor)
+                y -= ALTO_FILA
+            y -= 8
+        return y - 8
+
+    def _cabecera_tabla(self, canvas: Canvas, y: float) -> float:
+        canvas.setFillColor(NARANJA)
+        canvas.rect(MARGEN - 4, y - 4, self.ancho - 2 * MARGEN + 8, ALTO_FILA + 2, stroke=0, fill=1)
+        canvas.setFillColor(colors.whitesmoke)
+        canvas.setFont('Helvetica-Bold', 9)
+        self._fila(canvas, y, [titulo for titulo, _, _ in COLUMNAS])
+        canvas.setFillColor(colors.black)
+        canvas.setFont('Helvetica', 8)
+        return y - ALTO_FILA - 4
+
+    @staticmethod
+    def _fila(canvas: Canvas, y: float, valores) -> None:
+        for (_, x, alineacion), valor in zip(COLUMNAS, valores, strict=True):
+            if alineacion == "derecha":
+                canvas.drawRightString(x, y, valor)
+            else:
+                canvas.drawString(x, y, valor[:36])
+
+    def _pie(self, canvas: Canvas, pagina: int, subtotal: float) -> None:
+        canvas.setFillColor(colors.grey)
+        canvas.setFont('Helvetica', 8)
+        canvas.drawString(MARGEN, MARGEN / 2, f"Pagina {pagina}")
+        canvas.drawRightString(self.ancho - MARGEN, MARGEN / 2, f"Subtotal acumulado: ${subtotal:,.2f}")
+        canvas.setFillColor(colors.black)
+
+    def _totales(self, canvas: Canvas, y: float, totales: dict) -> None:
+        x_etiqueta = self.ancho - MARGEN - 150
+        x_valor = self.ancho - MARGEN
+        canvas.setFont('Helvetica-Bold', 11)
+        canvas.drawRightString(x_etiqueta, y, "Subtotal:")
+        canvas.drawRightString(x_valor, y, f"${totales['subtotal']:,.2f}")
+        y -= 16
+        canvas.drawRightString(x_etiqueta, y, "Impuesto (IVA 19%):")
+        canvas.drawRightString(x_valor, y, f"${totales['impuesto']:,.2f}")
+        y -= 8
+        canvas.setStrokeColor(NARANJA)
+        canvas.setLineWidth(2)
+        canvas.line(x_etiqueta - 100, y, x_valor, y)
+        y -= 16
+        canvas.setFillColor(NARANJA)
+        canvas.setFont('Helvetica-Bold', 14)
+        canvas.drawRightString(x_etiqueta, y, "TOTAL:")
+        canvas.drawRightString(x_valor, y, f"${totales['total']:,.2f}")
+        canvas.setFillColor(colors.black)
+
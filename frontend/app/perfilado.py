@@ -0,0 +1,212 @@
+import hmac
+import itertools
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter, deque
+from pathlib import Path
+from typing import Optional
+from flask import Flask, g, request
+
+# Cabecera o parametro de consulta con el token que activa el perfil de una peticion
+CABECERA_TOKEN = "x-perfil-token"
+PARAMETRO_TOKEN = "perfil"
+# Cabecera de respuesta con el nombre del perfil guardado
+CABECERA_PERFIL = "x-perfil"
+
+# Archivos de los que cuelgan los hilos que esperan sin consumir CPU
+_ESPERA = ("selectors.py", "threading.py", "queue.py")
+
+
+class Perfil:
+    """
+    Perfilador por muestreo del hilo que atiende una peticion
+
+    Un hilo auxiliar lee cada ``intervalo`` segundos la pila de los hilos
+    registrados (``sys._current_frames``) y cuenta cada pila distinta. El
+    resultado se exporta en formato de pilas plegadas (``a;b;c 12``), que
+    leen flamegraph.pl, speedscope o inferno. Las muestras de hilos en espera
+    (``select``, ``Condition.wait``, colas) se descartan.
+    """
+
+    def __init__(self, intervalo: float = 0.001):
+        self.intervalo = intervalo
+        self.pilas: Counter[str] = Counter()
+        self.muestras = 0
+        self._hilos: set[int] = set()
+        self._etiquetas: dict[object, str] = {}
+        self._parar = threading.Event()
+        self._hilo = threading.Thread(target=self._muestrear, name="perfilador", daemon=True)
+
+    def registrar_hilo(self, ident: Optional[int] = None) -> None:
+        self._hilos.add(ident or threading.get_ident())
+
+    def iniciar(self) -> None:
+        self._hilo.start()
+
+    def detener(self) -> None:
+        self._parar.set()
+        self._hilo.join()
+
+    def _etiqueta(self, codigo) -> str:
+        etiqueta = self._etiquetas.get(codigo)
+        if etiqueta is None:
+            etiqueta = self._etiquetas[codigo] = (
+                f"{codigo.co_name} ({os.path.basename(codigo.co_filename)}:{codigo.co_firstlineno})"
+            )
+        return etiqueta
+
+    def _muestrear(self) -> None:
+        while not self._parar.wait(self.intervalo):
+            marcos = sys._current_frames()
+            for ident in tuple(self._hilos):
+                marco = marcos.get(ident)
+                if marco is None or marco.f_code.co_filename.endswith(_ESPERA):
+                    continue
+                pila = []
+                while marco is not None:
+                    pila.append(self._etiqueta(marco.f_code))
+                    marco = marco.f_back
+                self.pilas[";".join(reversed(pila))] += 1
+                self.muestras += 1
+
+    def plegado(self) -> str:
+        """Devuelve el perfil en formato de pilas plegadas"""
+        return "".join(f"{pila} {cuenta}\n" for pila, cuenta in self.pilas.most_common())
+
+
+class AlmacenPerfiles:
+    """
+    Directorio con los ultimos ``max_archivos`` perfiles (los mas antiguos se borran)
+
+    Los nombres empiezan por la fecha y un contador, de modo que su orden
+    alfabetico es el orden de llegada.
+    """
+
+    _NOMBRE_VALIDO = re.compile(r"^[\w.-]+\.folded$")
+
+    def __init__(self, directorio: Path, max_archivos: int = 200):
+        self.directorio = Path(directorio)
+        self.max_archivos = max_archivos
+        self._contador = itertools.count(1)
+        self._lock = threading.Lock()
+        self._nombres: Optional[deque[str]] = None
+
+    def _cargar(self) -> deque[str]:
+        if self._nombres is None:
+            self.directorio.mkdir(parents=True, exist_ok=True)
+            self._nombres = deque(sorted(p.name for p in self.directorio.glob("*.folded")))
+        return self._nombres
+
+    def nuevo_nombre(self, ruta: str) -> str:
+        """Nombre unico para el perfil de una peticion a ``ruta``"""
+        etiqueta = re.sub(r"[^A-Za-z0-9]+", "_", ruta).strip("_")[:60] or "raiz"
+        return f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{next(self._contador):06d}-{etiqueta}.folded"
+
+    def guardar(self, nombre: str, contenido: str) -> None:
+        with self._lock:
+            nombres = self._cargar()
+            (self.directorio / nombre).write_text(contenido)
+            nombres.append(nombre)
+            while len(nombres) > self.max_archivos:
+                (self.directorio / nombres.popleft()).unlink(missing_ok=True)
+
+    def listar(self) -> list[dict]:
+        """Perfiles guardados, del mas reciente al mas antiguo"""
+        with self._lock:
+            nombres = list(self._cargar())
+        resultado = []
+        for nombre in reversed(nombres):
+            ruta = self.directorio / nombre
+            if ruta.exists():
+                resultado.append({"nombre": nombre, "bytes": ruta.stat().st_size})
+        return resultado
+
+    def leer(self, nombre: str) -> Optional[str]:
+        """Contenido de un perfil guardado, o ``None`` si no existe"""
+        if not self._NOMBRE_VALIDO.match(nombre):
+            return None
+        ruta = self.directorio / nombre
+        return ruta.read_text() if ruta.is_file() else None
+
+
+class Perfilado:
+    """
+    Decide que peticiones se perfilan
+
+    Se perfila una peticion si trae ``token`` en la cabecera
+    ``X-Perfil-Token`` o en el parametro ``perfil`` y, ademas, una fraccion
+    ``muestreo`` del trafico elegida al azar. Sin token ni muestreo no se
+    instala nada y el coste es nulo.
+    """
+
+    def __init__(
+        self,
+        almacen: AlmacenPerfiles,
+        token: Optional[str] = None,
+        muestreo: float = 0.0,
+        intervalo: float = 0.001
+    ):
+        self.almacen = almacen
+        self.token = token or None
+        self.muestreo = muestreo
+        self.intervalo = intervalo
+
+    @property
+    def habilitado(self) -> bool:
+        return self.token is not None or self.muestreo > 0
+
+    def token_valido(self, token: Optional[str]) -> bool:
+        return (
+            self.token is not None
+            and token is not None
+            and hmac.compare_digest(token.encode(), self.token.encode())
+        )
+
+    def muestrear(self) -> bool:
+        """Decide al azar si una peticion sin token entra en el muestreo"""
+        return self.muestreo > 0 and random.random() < self.muestreo
+
+
+def instrumentar(app: Flask, perfilado: Perfilado) -> None:
+    """
+    Perfila las peticiones de la app elegidas por ``perfilado``
+
+    Se muestrea el hilo que atiende la peticion hasta el final de la
+    respuesta (incluido el stream con ``stream_with_context``); el trabajo de
+    los procesos de renderizado de lotes no aparece en el perfil. Si la
+    peticion trae el token, el perfil se guarda siempre y su nombre se
+    devuelve en la cabecera ``X-Perfil``; los del muestreo solo se guardan si
+    tienen muestras.
+    """
+
+    @app.before_request
+    def _iniciar():
+        token = request.headers.get(CABECERA_TOKEN) or request.args.get(PARAMETRO_TOKEN)
+        solicitado = perfilado.token_valido(token)
+        if not solicitado and not perfilado.muestrear():
+            return
+        perfil = Perfil(perfilado.intervalo)
+        perfil.registrar_hilo()
+        perfil.iniciar()
+        g.perfil = (perfil, perfilado.almacen.nuevo_nombre(request.path), solicitado)
+
+    @app.after_request
+    def _cabecera(response):
+        actual = g.get("perfil")
+        if actual is not None and actual[2]:
+            response.headers[CABECERA_PERFIL] = actual[1]
+        return response
+
+    @app.teardown_request
+    def _guardar(error=None):
+        actual = g.pop("perfil", None)
+        if actual is None:
+            return
+        perfil, nombre, solicitado = actual
+        perfil.detener()
+        if solicitado or perfil.muestras:
+            perfilado.almacen.guardar(nombre, perfil.plegado())
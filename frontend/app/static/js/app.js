@@ -1,11 +1,19 @@
 let facturaActual = null;
 
+// Monitor de lotes: filas visibles como maximo y facturas pendientes de pintar
+const MAX_FILAS_MONITOR = 100;
+let fuenteLote = null;
+let facturasPendientes = [];
+let progresoPendiente = null;
+let pintadoProgramado = false;
+
 document.addEventListener('DOMContentLoaded', function() {
     const form = document.getElementById('facturaForm');
     const descargarBtn = document.getElementById('descargarPDF');
     
     form.addEventListener('submit', generarFactura);
     descargarBtn.addEventListener('click', descargarPDF);
+    document.getElementById('monitorForm').addEventListener('submit', alternarMonitor);
 });
 
 async function generarFactura(e) {
@@ -117,6 +125,122 @@ async function descargarPDF() {
     }
 }
 
+function alternarMonitor(e) {
+    e.preventDefault();
+    
+    if (fuenteLote) {
+        detenerMonitor();
+        mostrarAlerta('Monitor detenido', 'warning');
+        return;
+    }
+    
+    const parametros = new URLSearchParams({
+        cantidad: document.getElementById('monitorCantidad').value,
+        prefijo: document.getElementById('monitorPrefijo').value,
+        inicio: document.getElementById('monitorInicio').value
+    });
+    
+    document.getElementById('monitorFacturas').innerHTML = '';
+    facturasPendientes = [];
+    progresoPendiente = null;
+    actualizarProgreso({ emitidas: 0, cantidad: 1, importe: 0, segundos: 0 });
+    
+    fuenteLote = new EventSource(`/api/monitor-lote?${parametros}`);
+    document.getElementById('monitorBoton').textContent = 'Detener';
+    
+    fuenteLote.addEventListener('lote', evento => {
+        const datos = JSON.parse(evento.data);
+        // Solo se conservan las facturas que caben en la tabla: la memoria no crece con el lote
+        facturasPendientes.push(...datos.facturas);
+        if (facturasPendientes.length > MAX_FILAS_MONITOR) {
+            facturasPendientes.splice(0, facturasPendientes.length - MAX_FILAS_MONITOR);
+        }
+        progresoPendiente = datos;
+        programarPintado();
+    });
+    
+    fuenteLote.addEventListener('fin', evento => {
+        progresoPendiente = JSON.parse(evento.data);
+        programarPintado();
+        detenerMonitor();
+        mostrarAlerta(`Lote completado: ${progresoPendiente.emitidas} facturas`, 'success');
+    });
+    
+    fuenteLote.addEventListener('fallo', evento => {
+        detenerMonitor();
+        mostrarAlerta(JSON.parse(evento.data).error, 'danger');
+    });
+    
+    // Sin este cierre EventSource se reconectaria y volveria a lanzar el lote
+    fuenteLote.onerror = () => {
+        if (!fuenteLote) return;
+        detenerMonitor();
+        mostrarAlerta('Se perdio la conexion con el monitor de lotes', 'danger');
+    };
+}
+
+function detenerMonitor() {
+    if (fuenteLote) {
+        fuenteLote.close();
+        fuenteLote = null;
+    }
+    document.getElementById('monitorBoton').textContent = 'Iniciar';
+}
+
+function programarPintado() {
+    // Se pinta como mucho una vez por fotograma aunque lleguen muchos eventos
+    if (pintadoProgramado) return;
+    pintadoProgramado = true;
+    requestAnimationFrame(pintarMonitor);
+}
+
+function pintarMonitor() {
+    pintadoProgramado = false;
+    
+    const cuerpo = document.getElementById('monitorFacturas');
+    const fragmento = document.createDocumentFragment();
+    for (let i = facturasPendientes.length - 1; i >= 0; i--) {
+        const factura = facturasPendientes[i];
+        const fila = document.createElement('tr');
+        const celdas = [
+            [factura.numero_factura, ''],
+            [factura.fecha_emision, ''],
+            [factura.cliente, ''],
+            [factura.ciudad, ''],
+            [factura.lineas, 'text-center'],
+            ['$' + formatearNumero(factura.total), 'text-end']
+        ];
+        for (const [valor, clase] of celdas) {
+            const celda = document.createElement('td');
+            celda.textContent = valor;
+            if (clase) celda.className = clase;
+            fila.appendChild(celda);
+        }
+        fragmento.appendChild(fila);
+    }
+    facturasPendientes = [];
+    cuerpo.prepend(fragmento);
+    while (cuerpo.rows.length > MAX_FILAS_MONITOR) {
+        cuerpo.deleteRow(-1);
+    }
+    
+    if (progresoPendiente) {
+        actualizarProgreso(progresoPendiente);
+        progresoPendiente = null;
+    }
+}
+
+function actualizarProgreso(progreso) {
+    const porcentaje = Math.min(100, Math.round(progreso.emitidas / progreso.cantidad * 100));
+    const barra = document.getElementById('monitorProgreso');
+    barra.style.width = `${porcentaje}%`;
+    barra.textContent = `${porcentaje}%`;
+    document.getElementById('monitorEmitidas').textContent = formatearNumero(progreso.emitidas);
+    document.getElementById('monitorImporte').textContent = '$' + formatearNumero(progreso.importe);
+    const ritmo = progreso.segundos > 0 ? Math.round(progreso.emitidas / progreso.segundos) : 0;
+    document.getElementById('monitorRitmo').textContent = formatearNumero(ritmo);
+}
+
 function mostrarAlerta(mensaje, tipo) {
     const alertContainer = document.getElementById('alertContainer');
     
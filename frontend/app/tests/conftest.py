@@ -0,0 +1,43 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# Agregar el directorio app al path para imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+@pytest.fixture
+def client():
+    """Fixture que proporciona un cliente de prueba para el frontend"""
+    from main import app
+    return app.test_client()
+
+
+@pytest.fixture
+def factura():
+    """Fixture que proporciona una factura con el formato que devuelve el backend"""
+    return {
+        "numero_factura": "FAC-TEST-001",
+        "fecha_emision": "2025-03-14",
+        "empresa": {
+            "nombre": "Distribuidora Andina S.A.S.",
+            "direccion": "Calle 10 #20-30, Bogota",
+            "telefono": "+57 310 555 1234",
+            "email": "ventas@andina.com.co",
+        },
+        "cliente": {
+            "nombre": "Tienda Gomez",
+            "direccion": "Carrera 5 #12-40, Medellin",
+            "telefono": "+57 320 555 9876",
+        },
+        "detalle": [
+            {"producto": "Arroz Diana", "categoria": "Granos", "cantidad": 2,
+             "precio_unitario": 4500.0, "subtotal": 9000.0},
+            {"producto": "Coca-Cola", "categoria": "Bebidas", "cantidad": 3,
+             "precio_unitario": 3000.0, "subtotal": 9000.0},
+        ],
+        "subtotal": 18000.0,
+        "impuesto": 3420.0,
+        "total": 21420.0,
+    }
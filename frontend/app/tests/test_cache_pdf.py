@@ -0,0 +1,201 @@
+import json
+import os
+
+import pytest
+
+from cache_pdf import CachePDF
+
+
+def pdf(tamano: int, relleno: bytes = b"x") -> bytes:
+    return b"%PDF" + relleno * (tamano - 4)
+
+
+class RespuestaBackend:
+    """Respuesta minima del backend para los endpoints de PDF"""
+
+    def __init__(self, datos: dict, estable: bool = True):
+        self.status_code = 200
+        self.content = json.dumps(datos).encode()
+        # El backend solo envia ETag con facturas deterministas o almacenadas
+        self.headers = {"ETag": '"backend"'} if estable else {}
+
+    def json(self) -> dict:
+        return json.loads(self.content)
+
+    def raise_for_status(self) -> None:
+        pass
+
+
+class BackendFalso:
+    """Backend que devuelve siempre la misma factura y cuenta las peticiones"""
+
+    def __init__(self, factura: dict):
+        self.factura = factura
+        self.estable = True
+        self.peticiones = 0
+
+    def get(self, ruta: str, **kwargs) -> RespuestaBackend:
+        self.peticiones += 1
+        return RespuestaBackend(self.factura, self.estable)
+
+
+class TestCachePDF:
+    """Tests para la cache de PDF en memoria y en disco"""
+
+    def test_clave_por_contenido(self):
+        """Test que la clave depende solo del JSON de la factura"""
+        assert CachePDF.calcular_clave(b'{"a":1}') == CachePDF.calcular_clave(b'{"a":1}')
+        assert CachePDF.calcular_clave(b'{"a":1}') != CachePDF.calcular_clave(b'{"a":2}')
+
+    def test_expulsion_lru_en_memoria(self):
+        """Test que la memoria se acota en bytes expulsando el PDF menos usado"""
+        cache = CachePDF(max_bytes_memoria=250)
+        cache.guardar("a", pdf(100))
+        cache.guardar("b", pdf(100))
+        assert cache.obtener("a") is not None
+        cache.guardar("c", pdf(100))
+
+        assert cache.obtener("b") is None
+        assert cache.obtener("a") == pdf(100)
+        assert cache.obtener("c") == pdf(100)
+        estadisticas = cache.estadisticas()
+        assert estadisticas["bytes_memoria"] == 200
+        assert estadisticas["expulsiones_memoria"] == 1
+        assert estadisticas["fallos"] == 1
+
+    def test_pdf_mayor_que_la_memoria(self):
+        """Test que un PDF que no cabe en memoria no expulsa a los demas"""
+        cache = CachePDF(max_bytes_memoria=150)
+        cache.guardar("a", pdf(100))
+        cache.guardar("grande", pdf(200))
+
+        assert cache.obtener("a") is not None
+        assert cache.obtener("grande") is None
+
+    def test_nivel_de_disco(self, tmp_path):
+        """Test que un PDF expulsado de memoria se sirve por ruta desde el disco"""
+        cache = CachePDF(max_bytes_memoria=100, directorio=tmp_path, max_bytes_disco=1000)
+        cache.guardar("a", pdf(100, b"a"))
+        cache.guardar("b", pdf(100, b"b"))
+
+        ruta = cache.obtener("a")
+        assert ruta == tmp_path / "a.pdf"
+        assert ruta.read_bytes() == pdf(100, b"a")
+        assert cache.obtener("b") == pdf(100, b"b")
+        assert cache.estadisticas()["aciertos_disco"] == 1
+        assert not list(tmp_path.glob("*.tmp"))
+
+    def test_expulsion_lru_en_disco(self, tmp_path):
+        """Test que el disco se acota en bytes borrando los archivos menos usados"""
+        cache = CachePDF(max_bytes_memoria=0, directorio=tmp_path, max_bytes_disco=250)
+        cache.guardar("a", pdf(100))
+        cache.guardar("b", pdf(100))
+        cache.obtener("a")
+        cache.guardar("c", pdf(100))
+
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["a.pdf", "c.pdf"]
+        assert cache.obtener("b") is None
+        assert cache.estadisticas()["expulsiones_disco"] == 1
+
+    def test_recarga_desde_disco(self, tmp_path):
+        """Test que al reiniciar se recuperan los archivos del mas antiguo al mas reciente"""
+        cache = CachePDF(max_bytes_memoria=0, directorio=tmp_path, max_bytes_disco=1000)
+        for i, clave in enumerate(("a", "b", "c")):
+            cache.guardar(clave, pdf(100))
+            os.utime(tmp_path / f"{clave}.pdf", (1000 + i, 1000 + i))
+
+        # Con menos espacio, el reinicio descarta el archivo mas antiguo
+        recargada = CachePDF(max_bytes_memoria=0, directorio=tmp_path, max_bytes_disco=250)
+
+        assert recargada.obtener("a") is None
+        assert recargada.obtener("b") == tmp_path / "b.pdf"
+        assert recargada.obtener("c") == tmp_path / "c.pdf"
+        assert not (tmp_path / "a.pdf").exists()
+        assert recargada.estadisticas()["bytes_disco"] == 200
+
+
+class TestEndpointPDF:
+    """Tests del PDF de una factura servido desde la cache con ETag"""
+
+    @pytest.fixture
+    def backend(self, monkeypatch, factura):
+        import main
+
+        backend = BackendFalso(factura)
+        monkeypatch.setattr(main, "backend", backend)
+        monkeypatch.setattr(main, "cache_pdf", CachePDF(max_bytes_memoria=1024 * 1024))
+        return backend
+
+    def test_etag_es_la_clave_de_la_cache(self, client, backend):
+        """Test que el ETag del PDF es el hash del JSON de la factura"""
+        import main
+
+        response = client.get("/api/generar-pdf/FAC-TEST-001")
+
+        assert response.status_code == 200
+        assert response.data.startswith(b"%PDF")
+        clave = CachePDF.calcular_clave(RespuestaBackend(backend.factura).content)
+        assert response.headers["ETag"] == f'"{clave}"'
+        assert main.cache_pdf.obtener(clave) == response.data
+
+    def test_segunda_descarga_desde_la_cache(self, client, backend):
+        """Test que la misma factura no se vuelve a renderizar"""
+        import main
+
+        primera = client.get("/api/generar-pdf/FAC-TEST-001")
+        segunda = client.get("/api/generar-pdf/FAC-TEST-001")
+
+        assert segunda.data == primera.data
+        assert main.cache_pdf.estadisticas()["aciertos_memoria"] == 1
+
+    def test_if_none_match_responde_304(self, client, backend):
+        """Test que con el ETag vigente se responde 304 sin cuerpo"""
+        etag = client.get("/api/generar-pdf/FAC-TEST-001").headers["ETag"]
+        response = client.get("/api/generar-pdf/FAC-TEST-001", headers={"If-None-Match": etag})
+
+        assert response.status_code == 304
+        assert response.data == b""
+        assert response.headers["ETag"] == etag
+
+    def test_factura_cambiada_responde_200(self, client, backend):
+        """Test que si la factura cambia el ETag anterior ya no vale"""
+        etag = client.get("/api/generar-pdf/FAC-TEST-001").headers["ETag"]
+        backend.factura = {**backend.factura, "total": 99999.0}
+        response = client.get("/api/generar-pdf/FAC-TEST-001", headers={"If-None-Match": etag})
+
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+
+    def test_pdf_desde_disco_con_etag(self, client, backend, monkeypatch, tmp_path):
+        """Test que un PDF servido desde el disco lleva el mismo ETag y admite 304"""
+        import main
+
+        monkeypatch.setattr(main, "cache_pdf", CachePDF(max_bytes_memoria=0, directorio=tmp_path))
+        primera = client.get("/api/generar-pdf/FAC-TEST-001")
+        segunda = client.get("/api/generar-pdf/FAC-TEST-001")
+        no_modificado = client.get(
+            "/api/generar-pdf/FAC-TEST-001", headers={"If-None-Match": primera.headers["ETag"]}
+        )
+
+        assert segunda.data == primera.data
+        assert segunda.headers["ETag"] == primera.headers["ETag"]
+        assert main.cache_pdf.estadisticas()["aciertos_disco"] == 2
+        assert no_modificado.status_code == 304
+
+    def test_factura_aleatoria_no_se_cachea(self, client, backend, monkeypatch, tmp_path):
+        """Test que una factura sin ETag del backend no se guarda en memoria ni en disco"""
+        import main
+
+        monkeypatch.setattr(main, "cache_pdf", CachePDF(max_bytes_memoria=1024 * 1024, directorio=tmp_path))
+        backend.estable = False
+        primera = client.get("/api/generar-pdf/FAC-TEST-001")
+        segunda = client.get("/api/generar-pdf/FAC-TEST-001")
+
+        assert primera.status_code == segunda.status_code == 200
+        assert primera.data.startswith(b"%PDF")
+        estadisticas = main.cache_pdf.estadisticas()
+        assert estadisticas["bytes_memoria"] == 0
+        assert estadisticas["bytes_disco"] == 0
+        assert estadisticas["aciertos_memoria"] == 0
+        assert estadisticas["fallos"] == 0
+        assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,161 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from cliente_backend import ClienteBackend
+
+
+class BackendDePrueba(ThreadingHTTPServer):
+    """Servidor HTTP local que responde los estados programados y registra las peticiones"""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), ManejadorPrueba)
+        self.estados: list[tuple[int, dict]] = []
+        self.peticiones: list[tuple[str, dict]] = []
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class ManejadorPrueba(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _responder(self):
+        longitud = int(self.headers.get("Content-Length", 0))
+        if longitud:
+            self.rfile.read(longitud)
+        self.server.peticiones.append((self.command, dict(self.headers)))
+        estado, cabeceras = self.server.estados.pop(0) if self.server.estados else (200, {})
+        cuerpo = b'{"ok": true}'
+        self.send_response(estado)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(cuerpo)))
+        for nombre, valor in cabeceras.items():
+            self.send_header(nombre, valor)
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    do_GET = _responder
+    do_POST = _responder
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def servidor():
+    servidor = BackendDePrueba()
+    hilo = threading.Thread(target=servidor.serve_forever, daemon=True)
+    hilo.start()
+    yield servidor
+    servidor.shutdown()
+    servidor.server_close()
+
+
+class TestClienteBackend:
+    """Tests para el cliente HTTP compartido del backend"""
+
+    def test_reintenta_503(self, servidor):
+        """Test que un 503 transitorio se reintenta y se cuenta"""
+        servidor.estados = [(503, {}), (200, {})]
+        cliente = ClienteBackend(servidor.url, backoff=0)
+        response = cliente.get("/api/factura/FAC-1")
+
+        assert response.status_code == 200
+        assert len(servidor.peticiones) == 2
+        assert cliente.estadisticas()["reintentos"] == 1
+        cliente.cerrar()
+
+    def test_agota_los_reintentos(self, servidor):
+        """Test que tras los reintentos se devuelve el ultimo error sin lanzar excepcion"""
+        servidor.estados = [(502, {})] * 3
+        cliente = ClienteBackend(servidor.url, reintentos=2, backoff=0)
+        response = cliente.get("/api/factura/FAC-1")
+
+        assert response.status_code == 502
+        assert len(servidor.peticiones) == 3
+        cliente.cerrar()
+
+    def test_429_no_se_reintenta(self, servidor):
+        """Test que un 429 se devuelve al momento sin dormir su Retry-After"""
+        servidor.estados = [(429, {"Retry-After": "5"})]
+        cliente = ClienteBackend(servidor.url, backoff=0)
+        inicio = time.monotonic()
+        response = cliente.get("/api/factura/FAC-1")
+
+        assert response.status_code == 429
+        assert response.headers["Retry-After"] == "5"
+        assert time.monotonic() - inicio < 1
+        assert len(servidor.peticiones) == 1
+        cliente.cerrar()
+
+    def test_503_con_retry_after_no_espera(self, servidor):
+        """Test que el Retry-After de un 503 no bloquea el hilo: se usa la espera exponencial"""
+        servidor.estados = [(503, {"Retry-After": "5"}), (200, {})]
+        cliente = ClienteBackend(servidor.url, backoff=0)
+        inicio = time.monotonic()
+
+        assert cliente.get("/api/factura/FAC-1").status_code == 200
+        assert time.monotonic() - inicio < 1
+        cliente.cerrar()
+
+    def test_post_no_se_reintenta(self, servidor):
+        """Test que las peticiones no idempotentes no se repiten tras un 503"""
+        servidor.estados = [(503, {})]
+        cliente = ClienteBackend(servidor.url, backoff=0)
+        response = cliente.post("/api/facturas/lote", json={"cantidad": 1})
+
+        assert response.status_code == 503
+        assert len(servidor.peticiones) == 1
+        cliente.cerrar()
+
+    def test_error_de_conexion(self):
+        """Test que un backend caido lanza RequestException y cuenta el error"""
+        cliente = ClienteBackend("http://127.0.0.1:9", reintentos=1, backoff=0, timeout_conexion=0.5)
+
+        with pytest.raises(requests.RequestException):
+            cliente.get("/health")
+        assert cliente.estadisticas()["errores"] == 1
+
+    def test_conexiones_reutilizadas(self, servidor):
+        """Test que las peticiones consecutivas comparten una conexion keep-alive"""
+        cliente = ClienteBackend(servidor.url)
+        for _ in range(5):
+            cliente.get("/health").close()
+
+        estadisticas = cliente.estadisticas()
+        assert estadisticas["peticiones"] == 5
+        assert estadisticas["conexiones_creadas"] == 1
+        cliente.cerrar()
+
+    def test_cabeceras_por_peticion(self, servidor):
+        """Test que las cabeceras dinamicas se anaden y las explicitas tienen prioridad"""
+        cliente = ClienteBackend(servidor.url, cabeceras=lambda: {"X-Forwarded-For": "1.1.1.1", "X-A": "a"})
+        cliente.get("/health", headers={"X-A": "b"})
+
+        cabeceras = servidor.peticiones[0][1]
+        assert cabeceras["X-Forwarded-For"] == "1.1.1.1"
+        assert cabeceras["X-A"] == "b"
+        cliente.cerrar()
+
+
+class TestBackendLimitado:
+    """Tests del 429 del backend trasladado al usuario"""
+
+    def test_429_con_retry_after(self, client, servidor, monkeypatch):
+        """Test que el frontend responde 429 con el Retry-After del backend"""
+        import main
+
+        servidor.estados = [(429, {"Retry-After": "3"})]
+        monkeypatch.setattr(main, "backend", ClienteBackend(servidor.url, cabeceras=main._cabeceras_usuario))
+        response = client.get("/api/obtener-factura/FAC-1", environ_base={"REMOTE_ADDR": "10.1.2.3"})
+
+        assert response.status_code == 429
+        assert response.headers["Retry-After"] == "3"
+        assert servidor.peticiones[0][1]["X-Forwarded-For"] == "10.1.2.3"
@@ -0,0 +1,46 @@
+import io
+import zipfile
+
+from lote_pdf import zip_en_stream
+
+
+class TestZipEnStream:
+    """Tests para el ZIP que se emite a medida que se escribe"""
+
+    def test_contenido(self):
+        """Test que el ZIP unido contiene cada archivo sin comprimir y con su contenido"""
+        archivos = [(f"FAC-{i}.pdf", b"%PDF-1.4 " + bytes([i]) * (1000 * i)) for i in range(1, 4)]
+        partes = list(zip_en_stream(archivos))
+
+        # Una parte por archivo y una final con el directorio central
+        assert len(partes) == len(archivos) + 1
+        assert all(partes)
+        with zipfile.ZipFile(io.BytesIO(b"".join(partes))) as archivo_zip:
+            assert archivo_zip.testzip() is None
+            assert archivo_zip.namelist() == [nombre for nombre, _ in archivos]
+            for nombre, contenido in archivos:
+                assert archivo_zip.getinfo(nombre).compress_type == zipfile.ZIP_STORED
+                assert archivo_zip.read(nombre) == contenido
+
+    def test_lee_un_archivo_por_parte(self):
+        """Test que cada archivo se pide cuando se consume la parte anterior"""
+        leidos = []
+
+        def archivos():
+            for i in range(3):
+                leidos.append(i)
+                yield f"FAC-{i}.pdf", b"pdf"
+
+        stream = zip_en_stream(archivos())
+        next(stream)
+        assert leidos == [0]
+        next(stream)
+        assert leidos == [0, 1]
+
+    def test_sin_archivos(self):
+        """Test que un lote vacio produce un ZIP valido sin entradas"""
+        partes = list(zip_en_stream([]))
+
+        assert len(partes) == 1
+        with zipfile.ZipFile(io.BytesIO(partes[0])) as archivo_zip:
+            assert archivo_zip.namelist() == []
@@ -0,0 +1,142 @@
+import json
+
+from monitor_lote import evento_sse, eventos_lote, resumen_factura
+
+
+def leer_eventos(cuerpo: bytes) -> list[tuple[str, dict]]:
+    """Separa un stream ``text/event-stream`` en ``(evento, datos)``, sin los comentarios"""
+    eventos = []
+    for bloque in cuerpo.decode().split("\n\n"):
+        if not bloque or bloque.startswith(":"):
+            continue
+        campos = dict(linea.split(": ", 1) for linea in bloque.split("\n"))
+        assert set(campos) == {"event", "data"}
+        eventos.append((campos["event"], json.loads(campos["data"])))
+    return eventos
+
+
+def lote(factura: dict, cantidad: int) -> list[dict]:
+    return [{**factura, "numero_factura": f"FAC-{i}", "total": 100.5} for i in range(cantidad)]
+
+
+class TestEventoSSE:
+    """Tests para la codificacion de un server-sent event"""
+
+    def test_formato(self):
+        """Test que el evento tiene nombre, datos JSON compactos y termina en linea vacia"""
+        assert evento_sse("fin", {"emitidas": 2, "cantidad": 2}) == (
+            b'event: fin\ndata: {"emitidas":2,"cantidad":2}\n\n'
+        )
+
+    def test_datos_en_una_linea(self):
+        """Test que los saltos de linea de los datos no rompen el evento"""
+        evento = evento_sse("fallo", {"error": "linea 1\nlinea 2\n\ndata: falsa"})
+
+        assert evento.count(b"\n") == 3
+        assert leer_eventos(evento) == [("fallo", {"error": "linea 1\nlinea 2\n\ndata: falsa"})]
+
+
+class TestEventosLote:
+    """Tests para el stream de eventos del monitor de lotes"""
+
+    def test_resumen_factura(self, factura):
+        """Test que el resumen lleva la ciudad del cliente y el numero de lineas"""
+        assert resumen_factura(factura) == {
+            "numero_factura": "FAC-TEST-001",
+            "fecha_emision": "2025-03-14",
+            "cliente": "Tienda Gomez",
+            "ciudad": "Medellin",
+            "lineas": 2,
+            "total": 21420.0,
+        }
+
+    def test_grupos_y_fin(self, factura):
+        """Test que las facturas se agrupan por evento y el fin lleva el progreso total"""
+        partes = list(eventos_lote(lote(factura, 5), 5, por_evento=2, intervalo=60))
+
+        # Cada evento sale en su propia parte, precedido por el comentario inicial
+        assert partes[0] == b": inicio\n\n"
+        eventos = leer_eventos(b"".join(partes))
+        assert len(partes) == len(eventos) + 1
+        assert [nombre for nombre, _ in eventos] == ["lote", "lote", "lote", "fin"]
+        assert [len(datos["facturas"]) for _, datos in eventos[:3]] == [2, 2, 1]
+        assert [datos["emitidas"] for _, datos in eventos] == [2, 4, 5, 5]
+        assert eventos[0][1]["facturas"][0]["numero_factura"] == "FAC-0"
+        fin = eventos[-1][1]
+        assert fin["cantidad"] == 5
+        assert fin["importe"] == 502.5
+        assert fin["segundos"] >= 0
+
+    def test_agrupa_por_intervalo(self, factura):
+        """Test que con intervalo 0 cada factura sale en su propio evento"""
+        eventos = leer_eventos(b"".join(eventos_lote(lote(factura, 3), 3, por_evento=50, intervalo=0)))
+
+        assert [len(datos["facturas"]) for _, datos in eventos[:-1]] == [1, 1, 1]
+
+    def test_lote_vacio(self):
+        """Test que sin facturas solo se emite el fin"""
+        eventos = leer_eventos(b"".join(eventos_lote([], 0)))
+
+        assert [nombre for nombre, _ in eventos] == ["fin"]
+        assert eventos[0][1]["emitidas"] == 0
+        assert eventos[0][1]["importe"] == 0
+
+    def test_fallo_del_backend(self, factura):
+        """Test que un error al leer el lote termina el stream con un evento fallo"""
+        def facturas():
+            yield from lote(factura, 3)
+            raise ConnectionError("conexion cortada")
+
+        eventos = leer_eventos(b"".join(eventos_lote(facturas(), 10, por_evento=2, intervalo=60)))
+
+        assert [nombre for nombre, _ in eventos] == ["lote", "fallo"]
+        fallo = eventos[-1][1]
+        assert "conexion cortada" in fallo["error"]
+        assert fallo["emitidas"] == 3
+        assert fallo["cantidad"] == 10
+
+    def test_lee_bajo_demanda(self, factura):
+        """Test que el stream no lee la siguiente factura hasta entregar el evento anterior"""
+        leidas = []
+
+        def facturas():
+            for f in lote(factura, 4):
+                leidas.append(f["numero_factura"])
+                yield f
+
+        stream = eventos_lote(facturas(), 4, por_evento=1, intervalo=60)
+        next(stream)
+        assert leidas == []
+        next(stream)
+        assert leidas == ["FAC-0"]
+
+
+class TestEndpointMonitor:
+    """Tests del endpoint /api/monitor-lote"""
+
+    def test_stream_de_eventos(self, client, factura, monkeypatch):
+        """Test que el endpoint responde text/event-stream sin cache ni buffering"""
+        import main
+
+        solicitudes = []
+
+        def facturas_lote(solicitud):
+            solicitudes.append(solicitud)
+            return iter(lote(factura, solicitud["cantidad"]))
+
+        monkeypatch.setattr(main, "_facturas_lote", facturas_lote)
+        response = client.get("/api/monitor-lote?cantidad=3&semilla=7")
+
+        assert response.status_code == 200
+        assert response.mimetype == "text/event-stream"
+        assert response.headers["Cache-Control"] == "no-cache"
+        assert response.headers["X-Accel-Buffering"] == "no"
+        assert solicitudes == [{"cantidad": 3, "prefijo": "FAC-", "inicio": 1, "semilla": 7}]
+        eventos = leer_eventos(response.data)
+        assert eventos[-1][0] == "fin"
+        assert eventos[-1][1]["emitidas"] == 3
+
+    def test_cantidad_invalida(self, client):
+        """Test que una cantidad fuera de rango se rechaza con 400"""
+        assert client.get("/api/monitor-lote").status_code == 400
+        assert client.get("/api/monitor-lote?cantidad=0").status_code == 400
@@ -0,0 +1,39 @@
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from pdf_factura import RenderizadorFacturaPDF
+
+
+class TestRenderizadorFacturaPDF:
+    """Tests para el renderizador reutilizable del PDF de una factura"""
+
+    def test_renderiza_pdf(self, factura):
+        """Test que el renderizador produce un PDF y puede reutilizarse"""
+        renderizador = RenderizadorFacturaPDF()
+        primero = renderizador.renderizar(factura)
+
+        assert primero.startswith(b"%PDF")
+        assert len(renderizador.renderizar(factura)) == len(primero)
+
+    def test_elementos_no_compartidos(self, factura):
+        """Test que cada factura recibe sus propios elementos, sin compartirlos con otros renderizados"""
+        renderizador = RenderizadorFacturaPDF()
+        primeros = renderizador.elementos(factura)
+        segundos = renderizador.elementos(factura)
+
+        assert not {id(e) for e in primeros} & {id(e) for e in segundos}
+
+    def test_varios_hilos(self, factura):
+        """Test que varios hilos renderizan a la vez con el mismo renderizador"""
+        # Cambios de hilo muy frecuentes para que los renderizados se intercalen
+        intervalo = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        renderizador = RenderizadorFacturaPDF()
+        try:
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                pdfs = list(executor.map(lambda _: renderizador.renderizar(factura), range(300)))
+        finally:
+            sys.setswitchinterval(intervalo)
+
+        assert all(pdf.startswith(b"%PDF") for pdf in pdfs)
+        assert len({len(pdf) for pdf in pdfs}) == 1